@@ -1,5 +1,6 @@
 import uuid
 import asyncio
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 
@@ -14,13 +15,40 @@ from starlette.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
-from memory_store import MemoryStore
-from llm_service import LLMService
+from memory_store import AsyncMemoryStore, MemoryStore, is_escalation, memory_version, risk_rank
+from llm_service import LLMOverloaded, LLMService, SessionDigest
 
-app = FastAPI(title="Crisis Memory Bridge")
-memory = MemoryStore()
+# Every store call is awaited: blocking I/O runs off the event loop so one
+# slow read or memU request never stalls other volunteers' SSE streams.
+memory = AsyncMemoryStore(MemoryStore())
 llm = LLMService()
 
+
+# Fire-and-forget work (handoff precompute) — held here so tasks aren't
+# garbage-collected mid-flight, and cancelled on shutdown.
+background_tasks: set = set()
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await memory.aopen()
+    yield
+    for task in list(background_tasks):
+        task.cancel()
+    # Let cancelled tasks unwind before the store closes under them.
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await memory.aclose()
+
+
+app = FastAPI(title="Crisis Memory Bridge", lifespan=lifespan)
+
 # Active sessions in memory
 sessions: dict = {}
 
@@ -40,20 +68,59 @@ class EndSessionRequest(BaseModel):
     session_id: str
 
 
+async def _generate_handoff(caller_id: str, caller_memory: dict, language: str, memory_context: str) -> tuple:
+    """Briefing + opener suggestions for a returning caller, saved for reuse
+    when both were generated."""
+    briefing_task = asyncio.create_task(llm.generate_briefing(caller_memory, language, memory_context))
+    opener_task = asyncio.create_task(llm.generate_opener_suggestions(caller_memory, language, memory_context))
+    briefing = await briefing_task
+    suggestions = await opener_task
+    # Not saved without both parts: a failed call would otherwise be reused
+    # until the caller's memory changes.
+    if briefing and suggestions:
+        await memory.put_handoff(
+            caller_id,
+            memory_version(caller_memory),
+            language,
+            {"briefing": briefing, "suggestions": suggestions},
+        )
+    return briefing, suggestions
+
+
+async def _precompute_handoff(caller_id: str, language: str):
+    try:
+        caller_memory = await memory.get_caller_memory(caller_id)
+        if caller_memory:
+            await _generate_handoff(
+                caller_id, caller_memory, language, llm.build_memory_context(caller_memory)
+            )
+    except Exception as e:
+        print(f"WARNING: handoff precompute failed for {caller_id} ({e})")
+
+
 @app.post("/api/sessions/start")
 async def start_session(req: StartSessionRequest):
     session_id = uuid.uuid4().hex[:8]
 
-    caller_memory = memory.get_caller_memory(req.caller_id)
+    caller_memory = await memory.get_caller_memory(req.caller_id)
     briefing = None
     session_diff = None
+    memory_context = None
     initial_suggestions = []
     if caller_memory:
-        briefing_task = asyncio.create_task(llm.generate_briefing(caller_memory, req.language))
-        opener_task = asyncio.create_task(llm.generate_opener_suggestions(caller_memory, req.language))
-        briefing = await briefing_task
-        initial_suggestions = await opener_task
-        session_diff = memory.get_session_diff(req.caller_id)
+        # Compact prompt block, built once and reused for every call this session
+        memory_context = llm.build_memory_context(caller_memory)
+        # Usually precomputed at the previous end_session; generated here only
+        # if that is missing, stale, or in another language.
+        handoff = await memory.get_handoff(req.caller_id, memory_version(caller_memory), req.language)
+        if handoff:
+            briefing = handoff["briefing"]
+            initial_suggestions = handoff["suggestions"]
+        else:
+            briefing, initial_suggestions = await _generate_handoff(
+                req.caller_id, caller_memory, req.language, memory_context
+            )
+        session_diff = await memory.get_session_diff(req.caller_id)
     else:
         if req.language == "ja":
             initial_suggestions = [
@@ -79,7 +146,14 @@ async def start_session(req: StartSessionRequest):
         "language": req.language,
         "messages": [],
         "caller_memory": caller_memory,
+        "memory_context": memory_context,
         "prev_risk": initial_risk,
+        # Bounded transcript for per-turn analysis prompts
+        "digest": SessionDigest(),
+        "digest_task": None,
+        # Analysis still running for the latest turn, cancelled once stale
+        "turn": 0,
+        "turn_tasks": set(),
     }
 
     return {
@@ -101,11 +175,11 @@ async def send_message(req: MessageRequest):
     session["messages"].append({"role": "volunteer", "content": req.message})
 
     caller_response = await llm.generate_caller_response(
-        session["messages"], session["caller_memory"]
+        session["messages"], session["caller_memory"], session.get("memory_context")
     )
     session["messages"].append({"role": "caller", "content": caller_response})
 
-    live_context = await llm.extract_live_context(session["messages"], session.get("language", "en"))
+    live_context = await llm.extract_live_context(session["messages"], session.get("language", "en"), session["digest"])
 
     return {
         "caller_response": caller_response,
@@ -113,6 +187,36 @@ async def send_message(req: MessageRequest):
     }
 
 
+async def _update_digest(digest: SessionDigest, messages: list):
+    try:
+        await llm.update_digest(digest, messages)
+    except Exception as e:
+        print(f"WARNING: session digest update failed ({e}), keeping full transcript")
+
+
+# Analysis tasks cancelled before finishing, by reason
+turn_cancellations = {"superseded": 0, "disconnected": 0, "session_end": 0}
+
+
+def _cancel_turn_tasks(session: dict, reason: str) -> list:
+    """Cancel a session's unfinished per-turn analysis; its results would
+    no longer be delivered. Returns the cancelled tasks."""
+    cancelled = [task for task in session["turn_tasks"] if not task.done()]
+    for task in cancelled:
+        task.cancel()
+        turn_cancellations[reason] += 1
+    session["turn_tasks"].clear()
+    return cancelled
+
+
+def _risk_alert(session: dict, curr_risk):
+    """Escalation from the session's last final risk level, if any."""
+    prev_risk = session.get("prev_risk")
+    if is_escalation(prev_risk, curr_risk):
+        return {"from": prev_risk, "to": curr_risk}
+    return None
+
+
 @app.get("/api/messages/stream")
 async def stream_message(
     session_id: str = Query(...),
@@ -122,56 +226,121 @@ async def stream_message(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    # A new message makes the previous turn's analysis obsolete
+    _cancel_turn_tasks(session, "superseded")
+    session["turn"] += 1
+    turn = session["turn"]
+    turn_tasks = session["turn_tasks"] = set()
+
     session["messages"].append({"role": "volunteer", "content": message})
 
     async def event_generator():
-        full_response = ""
-        async for chunk in llm.generate_caller_response_stream(
-            session["messages"], session["caller_memory"], session.get("language", "en")
-        ):
-            full_response += chunk
-            payload = json.dumps({"type": "token", "content": chunk})
-            yield f"data: {payload}\n\n"
-
-        # Store the complete caller message in the session
-        session["messages"].append({"role": "caller", "content": full_response})
-
-        # Signal caller response complete — frontend re-enables input immediately
-        stream_end_payload = json.dumps({
-            "type": "stream_end",
-            "caller_response": full_response,
-        })
-        yield f"data: {stream_end_payload}\n\n"
-
-        # Extract live context, coaching, and suggestions in parallel
-        lang = session.get("language", "en")
-        live_context_task = asyncio.create_task(llm.extract_live_context(session["messages"], lang))
-        coaching_task = asyncio.create_task(llm.score_volunteer_response(session["messages"], lang))
-        suggestions_task = asyncio.create_task(llm.generate_reply_suggestions(session["messages"], session["caller_memory"], session.get("language", "en")))
-        live_context = await live_context_task
-        coaching = await coaching_task
-        suggestions = await suggestions_task
-
-        # Detect risk escalation
-        risk_alert = None
-        risk_order = {"low": 0, "moderate": 1, "high": 2}
-        curr_risk = live_context.get("risk_level", "unknown")
-        prev_risk = session.get("prev_risk")
-        if prev_risk and curr_risk in risk_order and prev_risk in risk_order:
-            if risk_order[curr_risk] > risk_order[prev_risk]:
-                risk_alert = {"from": prev_risk, "to": curr_risk}
-        if curr_risk in risk_order:
-            session["prev_risk"] = curr_risk
-
-        done_payload = json.dumps({
-            "type": "done",
-            "caller_response": full_response,
-            "live_context": live_context,
-            "coaching": coaching,
-            "risk_alert": risk_alert,
-            "suggestions": suggestions,
-        })
-        yield f"data: {done_payload}\n\n"
+        # Coaching needs only the volunteer's message: run it alongside the
+        # caller stream so "done" waits on the caller-dependent parts alone.
+        coaching_task = llm.begin_coaching(
+            session["messages"], session.get("language", "en"), session["digest"]
+        )
+        if coaching_task is not None:
+            turn_tasks.add(coaching_task)
+        disconnected = False
+        try:
+            full_response = ""
+            async for chunk in llm.generate_caller_response_stream(
+                session["messages"], session["caller_memory"], session.get("language", "en"), session.get("memory_context")
+            ):
+                full_response += chunk
+                payload = json.dumps({"type": "token", "content": chunk})
+                yield f"data: {payload}\n\n"
+
+            # Store the complete caller message in the session
+            session["messages"].append({"role": "caller", "content": full_response})
+
+            # Signal caller response complete — frontend re-enables input immediately
+            stream_end_payload = json.dumps({
+                "type": "stream_end",
+                "caller_response": full_response,
+            })
+            yield f"data: {stream_end_payload}\n\n"
+
+            if session["turn"] != turn:
+                return  # superseded mid-stream; the newer turn does the analysis
+
+            # Live context, coaching, and suggestions — in parallel or one fused call.
+            # Risk level and warnings are sent as soon as the model has written
+            # them, each at most once (a redone analysis reports them again);
+            # the queue's None marks the end of the analysis.
+            partials = asyncio.Queue()
+            analysis_task = asyncio.create_task(llm.analyze_turn(
+                session["messages"], session["caller_memory"], session.get("language", "en"), session.get("memory_context"), session["digest"],
+                coaching=coaching_task,
+                on_partial=lambda field, value: partials.put_nowait((field, value)),
+            ))
+            analysis_task.add_done_callback(lambda _: partials.put_nowait(None))
+            turn_tasks.add(analysis_task)
+            partials_sent = set()
+            try:
+                while (partial := await partials.get()) is not None:
+                    field, value = partial
+                    if field in partials_sent:
+                        continue
+                    partials_sent.add(field)
+                    partial_alert = _risk_alert(session, value) if field == "risk_level" else None
+                    partial_payload = json.dumps({
+                        "type": "live_context_partial",
+                        "field": field,
+                        "value": value,
+                        "risk_alert": partial_alert,
+                    })
+                    yield f"data: {partial_payload}\n\n"
+                analysis = await analysis_task
+            except asyncio.CancelledError:
+                if session["turn"] != turn:
+                    return  # superseded: only the newest turn's results are sent
+                raise
+            live_context = analysis["live_context"]
+            coaching = analysis["coaching"]
+            suggestions = analysis["suggestions"]
+
+            # The baseline moves only on a final, parsed risk level, never on
+            # a partial that the full analysis did not confirm.
+            curr_risk = live_context.get("risk_level") if isinstance(live_context, dict) else None
+            risk_alert = _risk_alert(session, curr_risk)
+            if risk_rank(curr_risk) >= 0:
+                session["prev_risk"] = curr_risk
+
+            # Fold turns that left the verbatim window into the running summary,
+            # off the response path; the next turn's analysis picks it up.
+            digest_task = session.get("digest_task")
+            if session["digest"].needs_fold(session["messages"]) and (digest_task is None or digest_task.done()):
+                session["digest_task"] = asyncio.create_task(
+                    _update_digest(session["digest"], list(session["messages"]))
+                )
+
+            done_payload = json.dumps({
+                "type": "done",
+                "caller_response": full_response,
+                "live_context": live_context,
+                "coaching": coaching,
+                "risk_alert": risk_alert,
+                "suggestions": suggestions,
+            })
+            yield f"data: {done_payload}\n\n"
+        except (asyncio.CancelledError, GeneratorExit):
+            disconnected = True
+            raise
+        finally:
+            # The turn ended early: the client went away (counted) or the
+            # stream failed. A disconnect has usually cancelled the awaited
+            # tasks already.
+            for task in turn_tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # finished or failed with the turn; already reported
+                    continue
+                if disconnected:
+                    turn_cancellations["disconnected"] += 1
+            turn_tasks.clear()
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -182,74 +351,72 @@ async def end_session(req: EndSessionRequest):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    extracted = await llm.extract_memories(session["messages"], session.get("language", "en"))
+    try:
+        extracted = await llm.extract_memories(session["messages"], session.get("language", "en"))
+    except LLMOverloaded:
+        # Session is kept, so the client can simply retry
+        raise HTTPException(status_code=503, detail="Busy — please try ending the session again")
 
-    memory.store_session(
+    await memory.store_session(
         caller_id=session["caller_id"],
         volunteer_name=session["volunteer_name"],
         conversation=session["messages"],
         extracted_memories=extracted,
     )
 
+    # Nothing may write to the session once it has ended.
+    stopped = _cancel_turn_tasks(session, "session_end")
+    digest_task = session.get("digest_task")
+    if digest_task is not None and not digest_task.done():
+        digest_task.cancel()
+        stopped.append(digest_task)
+    await asyncio.gather(*stopped, return_exceptions=True)
     del sessions[req.session_id]
 
+    # Have the next volunteer's briefing ready before the caller rings again
+    _spawn(_precompute_handoff(session["caller_id"], session.get("language", "en")))
+
     return {"status": "ok", "extracted_memories": extracted}
 
 
 @app.get("/api/callers/{caller_id}/timeline")
 async def get_timeline(caller_id: str):
-    timeline = memory.get_timeline(caller_id)
+    timeline = await memory.get_timeline(caller_id)
     if not timeline:
         raise HTTPException(status_code=404, detail="No timeline data for this caller")
     return timeline
 
 
+@app.post("/api/callers/{caller_id}/prefetch")
+async def prefetch_caller(caller_id: str):
+    """Warm a queued caller's memory (local + memU) before a volunteer picks up."""
+    return {"caller_id": caller_id, "prefetched": await memory.prefetch(caller_id)}
+
+
 @app.get("/api/callers")
 async def list_callers():
-    return {"callers": memory.list_callers()}
+    return {"callers": await memory.list_callers()}
 
 
 @app.get("/api/callers/summary")
 async def callers_summary():
     """Return summary data for all callers — powers the supervisor dashboard."""
-    callers = memory.list_callers()
-    summaries = []
-    for cid in callers:
-        timeline = memory.get_timeline(cid)
-        if not timeline or not timeline.get("sessions"):
-            continue
-        sess = timeline["sessions"]
-        latest = sess[-1]
-        summaries.append({
-            "caller_id": cid,
-            "total_sessions": len(sess),
-            "risk_level": latest.get("risk_level", "unknown"),
-            "last_volunteer": latest.get("volunteer", ""),
-            "last_date": latest.get("date", ""),
-            "last_summary": latest.get("summary", ""),
-            "escalations": any(
-                len(s.get("escalations", [])) > 0 for s in sess
-            ),
-        })
-    return {"callers": summaries}
+    return {"callers": await memory.get_callers_summary()}
 
 
 @app.get("/api/callers/{caller_id}/sessions/{session_number}")
 async def get_session_detail(caller_id: str, session_number: int):
     """Return full session data including conversation for replay."""
-    caller_mem = memory.get_caller_memory(caller_id)
-    if not caller_mem or "sessions" not in caller_mem:
-        raise HTTPException(status_code=404, detail="Caller not found")
-    for sess in caller_mem["sessions"]:
-        if sess.get("session_number") == session_number:
-            return sess
-    raise HTTPException(status_code=404, detail="Session not found")
+    sess = await memory.get_session(caller_id, session_number)
+    if not sess:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return sess
 
 
 @app.get("/api/callers/{caller_id}/analytics")
 async def get_analytics(caller_id: str):
     """Return analytics data for charts."""
-    timeline = memory.get_timeline(caller_id)
+    timeline = await memory.get_timeline(caller_id)
     if not timeline:
         raise HTTPException(status_code=404, detail="No data")
     risk_map = {"low": 1, "moderate": 2, "high": 3, "unknown": 0}
@@ -271,6 +438,27 @@ async def get_analytics(caller_id: str):
     }
 
 
+@app.get("/api/health")
+async def health():
+    """Liveness plus memU breaker state; "degraded" while memU is bypassed."""
+    breakers = memory.metrics().get("memu_breaker", {})
+    memu = {
+        name: b["state"] for name, b in breakers.items() if isinstance(b, dict)
+    }
+    degraded = any(state != "closed" for state in memu.values())
+    return {"status": "degraded" if degraded else "ok", "memu": memu}
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Operational counters for sizing caches and queues."""
+    return {
+        "memory": memory.metrics(),
+        "llm": llm.metrics(),
+        "turn_cancellations": dict(turn_cancellations),
+    }
+
+
 @app.get("/supervisor")
 async def supervisor():
     return FileResponse("static/supervisor.html")
@@ -0,0 +1,146 @@
+"""
+Compare per-turn analysis modes: three separate LLM calls (default) against
+one fused call (FUSED_ANALYSIS=1).
+
+By default the Anthropic client is replaced by a simulator whose latency
+follows a simple model — fixed overhead, prefill cost per input token and a
+decode rate per output token — so the comparison runs offline. Pass --live
+to use the real API (needs ANTHROPIC_API_KEY; costs tokens).
+
+Usage:
+    python bench_analysis.py [--turns 12] [--live]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from types import SimpleNamespace
+
+import llm_service
+from llm_backends import AnthropicBackend, estimate_request_tokens
+from llm_service import LLMService
+
+CALLER_LINES = [
+    "I don't really know why I'm calling.",
+    "My partner left last month and I lost my job two weeks ago.",
+    "I haven't been sleeping. Max is the only reason I get up.",
+    "Sometimes I think everyone would be better off without me... but I wouldn't do anything.",
+    "I tried the breathing thing once, it helped a little.",
+    "I got an eviction notice yesterday. It's all too much.",
+]
+VOLUNTEER_LINES = [
+    "Thank you for calling. I'm here to listen, take your time.",
+    "That sounds like a lot to carry at once.",
+    "It makes sense you'd feel overwhelmed with all of that.",
+    "Would you like to try a slow breath together?",
+    "What has helped you get through the past few days?",
+    "You reached out tonight, and that matters.",
+]
+
+# Typical reply sizes in tokens, per task
+OUTPUT_TOKENS = {"fused": 330, "live_context": 180, "coaching": 45, "suggestions": 70}
+REPLIES = {
+    "fused": {
+        "live_context": {"risk_level": "moderate", "warnings": ["Mentions passive ideation"]},
+        "coaching": {"score": "good", "feedback": "Warm validation.", "technique": "Validation"},
+        "suggestions": ["That sounds exhausting.", "What helped before?", "Shall we breathe?"],
+    },
+    "live_context": {"risk_level": "moderate", "warnings": ["Mentions passive ideation"]},
+    "coaching": {"score": "good", "feedback": "Warm validation.", "technique": "Validation"},
+    "suggestions": ["That sounds exhausting.", "What helped before?", "Shall we breathe?"],
+}
+
+
+class SimulatedMessages:
+    """Stands in for client.messages with a latency model."""
+
+    def __init__(self, overhead: float, prefill_per_1k: float, decode_rate: float):
+        self.overhead = overhead
+        self.prefill_per_1k = prefill_per_1k
+        self.decode_rate = decode_rate
+
+    @staticmethod
+    def _task(request: dict) -> str:
+        system = request["system"]
+        if "analyst" in system:
+            return "fused"
+        if "clinical insights" in system:
+            return "live_context"
+        if "trainer" in system:
+            return "coaching"
+        return "suggestions"
+
+    async def create(self, **request):
+        task = self._task(request)
+        input_tokens = estimate_request_tokens(request["system"], request["messages"])
+        output_tokens = OUTPUT_TOKENS[task]
+        await asyncio.sleep(
+            self.overhead
+            + input_tokens / 1000 * self.prefill_per_1k
+            + output_tokens / self.decode_rate
+        )
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=json.dumps(REPLIES[task]))],
+            usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens),
+        )
+
+
+def _conversation(turns: int) -> list:
+    conversation = []
+    for i in range(turns):
+        conversation.append({"role": "volunteer", "content": VOLUNTEER_LINES[i % len(VOLUNTEER_LINES)]})
+        conversation.append({"role": "caller", "content": CALLER_LINES[i % len(CALLER_LINES)]})
+    return conversation
+
+
+async def _run_mode(fused: bool, turns: int) -> dict:
+    llm_service.FUSED_ANALYSIS = fused
+    llm_service.usage = llm_service.UsageCounters()
+    service = LLMService()
+    conversation = _conversation(turns)
+    latencies = []
+    for turn in range(1, turns + 1):
+        start = time.perf_counter()
+        await service.analyze_turn(conversation[: turn * 2])
+        latencies.append(time.perf_counter() - start)
+    usage = service.metrics()["usage"]
+    return {
+        "calls": sum(row["calls"] for row in usage.values()),
+        "input_tokens": sum(
+            row["input_tokens"] + row["cache_read_input_tokens"] + row["cache_creation_input_tokens"]
+            for row in usage.values()
+        ),
+        "output_tokens": sum(row["output_tokens"] for row in usage.values()),
+        "mean_s": statistics.mean(latencies),
+        "max_s": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--live", action="store_true", help="Call the real API")
+    parser.add_argument("--overhead", type=float, default=0.35, help="Simulated seconds per request")
+    parser.add_argument("--prefill", type=float, default=0.05, help="Simulated seconds per 1k input tokens")
+    parser.add_argument("--decode-rate", type=float, default=80.0, help="Simulated output tokens/s")
+    args = parser.parse_args()
+
+    if not args.live:
+        llm_service.backend = AnthropicBackend(SimpleNamespace(
+            messages=SimulatedMessages(args.overhead, args.prefill, args.decode_rate)
+        ))
+
+    print(f"{args.turns} turns, {'live API' if args.live else 'simulated client'}\n")
+    print(f"{'mode':<10} {'calls':>6} {'input tok':>10} {'output tok':>11} {'mean/turn':>10} {'max/turn':>9}")
+    for label, fused in (("separate", False), ("fused", True)):
+        r = asyncio.run(_run_mode(fused, args.turns))
+        print(
+            f"{label:<10} {r['calls']:>6} {r['input_tokens']:>10} {r['output_tokens']:>11} "
+            f"{r['mean_s']:>9.2f}s {r['max_s']:>8.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
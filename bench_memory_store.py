@@ -0,0 +1,116 @@
+"""
+Benchmark the structured memory stores against each other.
+
+Writes CALLERS x SESSIONS sessions into a throwaway directory for each
+backend, then times the read paths the app uses.
+
+Usage:
+    python bench_memory_store.py [--callers 200] [--sessions 10] [--messages 30]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from memory_store import LocalMemoryStore
+from sqlite_store import SqliteMemoryStore
+
+RISKS = ["low", "moderate", "high"]
+
+
+def _conversation(n_messages: int) -> list:
+    return [
+        {
+            "role": "volunteer" if i % 2 == 0 else "caller",
+            "content": f"Message {i}: " + "I have been feeling overwhelmed lately. " * 3,
+        }
+        for i in range(n_messages)
+    ]
+
+
+def _extracted(rng: random.Random, session: int) -> dict:
+    return {
+        "triggers": [f"Trigger {rng.randint(0, 20)}" for _ in range(4)],
+        "effective_strategies": [f"Strategy {rng.randint(0, 10)}" for _ in range(3)],
+        "safety_plan": ["Call hotline if dark thoughts intensify"],
+        "situation": {
+            "description": "Recently lost job, living alone with dog.",
+            "key_events": [f"Event {session}"],
+        },
+        "warnings": ["Avoid pushing for details too early"],
+        "session_summary": f"Session {session} summary. Caller discussed stressors.",
+        "risk_level": rng.choice(RISKS),
+    }
+
+
+def _timed(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench(name: str, store, callers: int, sessions: int, messages: int) -> dict:
+    rng = random.Random(42)
+    caller_ids = [f"bench-{i:05d}" for i in range(callers)]
+    conversation = _conversation(messages)
+
+    def write_all():
+        for s in range(1, sessions + 1):
+            for cid in caller_ids:
+                store.store_session(cid, "Volunteer", conversation, _extracted(rng, s))
+
+    results = {"store_session": _timed(write_all) / (callers * sessions)}
+    results["get_caller_memory"] = _timed(
+        lambda: [store.get_caller_memory(cid) for cid in caller_ids]
+    ) / callers
+    results["get_timeline"] = _timed(
+        lambda: [store.get_timeline(cid) for cid in caller_ids]
+    ) / callers
+    results["get_session_diff"] = _timed(
+        lambda: [store.get_session_diff(cid) for cid in caller_ids]
+    ) / callers
+    results["get_session"] = _timed(
+        lambda: [store.get_session(cid, rng.randint(1, sessions)) for cid in caller_ids]
+    ) / callers
+    results["get_callers_summary"] = _timed(store.get_callers_summary, repeat=5) / 5
+
+    print(f"\n{name}")
+    for op, ms in results.items():
+        print(f"  {op:<22} {ms * 1000:>10.1f} us/op")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--callers", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=30)
+    args = parser.parse_args()
+
+    print(
+        f"{args.callers} callers x {args.sessions} sessions, "
+        f"{args.messages} messages per session"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        bench(
+            "LocalMemoryStore (files)",
+            LocalMemoryStore(os.path.join(tmp, "files"), session_storage="files"),
+            args.callers, args.sessions, args.messages,
+        )
+        bench(
+            "LocalMemoryStore (segments)",
+            LocalMemoryStore(os.path.join(tmp, "segments"), session_storage="segments"),
+            args.callers, args.sessions, args.messages,
+        )
+        bench(
+            "SqliteMemoryStore",
+            SqliteMemoryStore(os.path.join(tmp, "memory.db")),
+            args.callers, args.sessions, args.messages,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark memU retrieval: a fresh httpx.post per call (run in threads, as
+the sync path does) against the shared pooled AsyncClient.
+
+Starts a stub memU server on localhost, so no API key is needed.
+
+Usage:
+    python bench_memu_client.py [--requests 400] [--concurrency 20] [--delay-ms 5]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+
+
+def _stub_app(delay: float) -> FastAPI:
+    stub = FastAPI()
+
+    @stub.post("/api/v3/memory/retrieve")
+    async def retrieve(body: dict):
+        await asyncio.sleep(delay)
+        return {"items": [{"content": f"Known fact about {body['user_id']}"}]}
+
+    return stub
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(delay: float) -> tuple:
+    port = _free_port()
+    config = uvicorn.Config(
+        _stub_app(delay), host="127.0.0.1", port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def _run(label: str, call, n_requests: int, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with sem:
+            start = time.perf_counter()
+            result = await call(f"caller-{i % 50:03d}")
+            latencies.append(time.perf_counter() - start)
+            assert result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    total = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<18} {n_requests / total:8.0f} req/s   "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} ms   "
+        f"p95 {p95 * 1000:6.1f} ms"
+    )
+
+
+async def _bench(base_url: str, n_requests: int, concurrency: int) -> None:
+    os.environ["MEMU_API_KEY"] = "bench"
+    os.environ["MEMU_BASE_URL"] = base_url
+    from memory_store import HybridMemoryStore, LocalMemoryStore
+    from memu_queue import MemorizeQueue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hybrid = HybridMemoryStore(
+            local=LocalMemoryStore(tmp),
+            queue=MemorizeQueue(os.path.join(tmp, "memu_queue.db")),
+        )
+
+        async def per_call(caller_id):
+            return await asyncio.to_thread(hybrid._fetch_memu, caller_id)
+
+        await hybrid.aopen()
+        try:
+            # Warm both paths (imports, first connection) before timing.
+            await per_call("warmup")
+            await hybrid._afetch_memu("warmup")
+            await _run("httpx.post/call", per_call, n_requests, concurrency)
+            await _run("pooled client", hybrid._afetch_memu, n_requests, concurrency)
+        finally:
+            await hybrid.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    server, thread, base_url = _start_server(args.delay_ms / 1000)
+    print(
+        f"{args.requests} retrievals, concurrency {args.concurrency}, "
+        f"stub latency {args.delay_ms:g} ms\n"
+    )
+    try:
+        asyncio.run(_bench(base_url, args.requests, args.concurrency))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
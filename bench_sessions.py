@@ -0,0 +1,278 @@
+"""
+End-to-end session lifecycle benchmark.
+
+N simulated volunteers run concurrently through start → stream × K → end
+against app.py, served in this process by uvicorn on localhost, with the
+offline stub LLM backend (no API key, no cost). Callers are drawn from a
+pool smaller than the number of sessions, so later sessions hit returning
+callers (briefing, handoff, timeline paths).
+
+Reports p50/p95/p99 for start_session, time to first token, time to the
+"done" event and end_session; sessions/s and turns/s; and event-loop lag on
+the server's loop. Results are also written as JSON (config, git commit,
+metrics) so runs can be compared over time.
+
+Usage:
+    python bench_sessions.py [--volunteers 20] [--turns 5] [--sessions 2]
+                             [--callers 10] [--memory local|sqlite]
+                             [--response-cache] [--out bench_results/sessions.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+import uvicorn
+
+import app as app_module
+import llm_service
+from bench_analysis import VOLUNTEER_LINES
+from llm_backends import StubBackend
+from memory_store import AsyncMemoryStore, LocalMemoryStore
+
+LAG_INTERVAL = 0.01
+
+
+def _percentiles(values: list) -> dict:
+    """Nearest-rank p50/p95/p99 plus mean and max, in milliseconds."""
+    if not values:
+        return {"n": 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, -(-len(ordered) * p // 100) - 1)]
+
+    return {
+        "n": len(ordered),
+        "p50_ms": round(rank(50) * 1000, 1),
+        "p95_ms": round(rank(95) * 1000, 1),
+        "p99_ms": round(rank(99) * 1000, 1),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+async def _monitor_lag(samples: list, stop: asyncio.Event):
+    """Record how late each LAG_INTERVAL sleep wakes up on this loop."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - start - LAG_INTERVAL))
+
+
+class _Server:
+    """uvicorn on its own thread and event loop, with a lag monitor there."""
+
+    def __init__(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(
+            app_module.app, host="127.0.0.1", port=self.port,
+            log_level="warning", timeout_keep_alive=30,
+        ))
+        self.lag_samples = []
+        self._loop = None
+        self._stop_monitor = None
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_monitor = asyncio.Event()
+        await self.server.serve()
+
+    def start(self) -> str:
+        self._thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def start_lag_monitor(self):
+        asyncio.run_coroutine_threadsafe(
+            _monitor_lag(self.lag_samples, self._stop_monitor), self._loop
+        )
+
+    def stop_lag_monitor(self):
+        self._loop.call_soon_threadsafe(self._stop_monitor.set)
+
+    def drain_background_tasks(self):
+        async def drain():
+            while app_module.background_tasks:
+                await asyncio.gather(*app_module.background_tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(drain(), self._loop).result()
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join()
+
+
+async def _volunteer(client, v: int, args, results: dict):
+    for s in range(args.sessions):
+        caller_id = f"bench-caller-{(v * args.sessions + s) % args.callers:03d}"
+        t0 = time.perf_counter()
+        started = await client.post(
+            "/api/sessions/start",
+            json={"caller_id": caller_id, "volunteer_name": f"Volunteer {v}"},
+        )
+        if started.status_code != 200:
+            results["errors"] += 1
+            continue
+        results["start"].append(time.perf_counter() - t0)
+        session_id = started.json()["session_id"]
+
+        for turn in range(args.turns):
+            t0 = time.perf_counter()
+            first_token = done = None
+            try:
+                async with client.stream(
+                    "GET",
+                    "/api/messages/stream",
+                    params={
+                        "session_id": session_id,
+                        "message": VOLUNTEER_LINES[turn % len(VOLUNTEER_LINES)],
+                    },
+                ) as resp:
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data: "):
+                            continue
+                        event = json.loads(line[len("data: "):])
+                        if event["type"] == "token" and first_token is None:
+                            first_token = time.perf_counter() - t0
+                            results["ttft"].append(first_token)
+                        elif event["type"] == "done":
+                            done = time.perf_counter() - t0
+                            results["done"].append(done)
+            except httpx.HTTPError:
+                pass  # server aborted the stream; counted below
+            if done is None:  # stream failed (e.g. injected LLM errors)
+                results["errors"] += 1
+            results["turns"] += 1
+
+        t0 = time.perf_counter()
+        ended = await client.post("/api/sessions/end", json={"session_id": session_id})
+        if ended.status_code != 200:
+            results["errors"] += 1
+            continue
+        results["end"].append(time.perf_counter() - t0)
+        results["sessions"] += 1
+
+
+async def _drive(base_url: str, args) -> dict:
+    results = {"start": [], "ttft": [], "done": [], "end": [], "turns": 0, "sessions": 0, "errors": 0}
+    limits = httpx.Limits(max_connections=args.volunteers * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_volunteer(client, v, args, results) for v in range(args.volunteers)))
+        results["wall_s"] = time.perf_counter() - t0
+        results["metrics"] = (await client.get("/api/metrics")).json()
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--volunteers", type=int, default=20, help="Concurrent volunteers")
+    parser.add_argument("--turns", type=int, default=5, help="Messages per session")
+    parser.add_argument("--sessions", type=int, default=2, help="Sessions per volunteer")
+    parser.add_argument("--callers", type=int, default=10, help="Distinct callers")
+    parser.add_argument("--memory", choices=["local", "sqlite"], default="local")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub seconds to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=80.0, help="Stub output rate")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Stub injected failures")
+    parser.add_argument(
+        "--response-cache", action="store_true",
+        help="Keep the LLM response cache on (the stub's identical replies make it hit often)",
+    )
+    parser.add_argument("--out", default=os.path.join("bench_results", "sessions.json"))
+    args = parser.parse_args()
+
+    llm_service.backend = StubBackend(
+        latency=args.latency, tokens_per_s=args.tokens_per_s, failure_rate=args.failure_rate
+    )
+    if not args.response_cache:
+        llm_service.response_cache = llm_service.ResponseCache(max_entries=0, directory="")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.memory == "sqlite":
+            from sqlite_store import SqliteMemoryStore
+
+            structured = SqliteMemoryStore(os.path.join(tmp, "memory.db"))
+        else:
+            structured = LocalMemoryStore(tmp)
+        app_module.memory = AsyncMemoryStore(structured)
+
+        server = _Server()
+        base_url = server.start()
+        try:
+            server.start_lag_monitor()
+            results = asyncio.run(_drive(base_url, args))
+            server.stop_lag_monitor()
+            server.drain_background_tasks()
+        finally:
+            server.stop()
+
+    report = {
+        "benchmark": "sessions",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "config": vars(args),
+        "sessions": results["sessions"],
+        "turns": results["turns"],
+        "errors": results["errors"],
+        "wall_s": round(results["wall_s"], 3),
+        "throughput": {
+            "sessions_per_s": round(results["sessions"] / results["wall_s"], 2),
+            "turns_per_s": round(results["turns"] / results["wall_s"], 2),
+        },
+        "latency": {
+            "start_session": _percentiles(results["start"]),
+            "ttft": _percentiles(results["ttft"]),
+            "done": _percentiles(results["done"]),
+            "end_session": _percentiles(results["end"]),
+        },
+        "event_loop_lag": _percentiles(server.lag_samples),
+        "llm": results["metrics"]["llm"],
+    }
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"{args.volunteers} volunteers × {args.sessions} sessions × {args.turns} turns, "
+        f"{args.memory} store, stub LLM\n"
+    )
+    print(f"{'':<16} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for label, row in list(report["latency"].items()) + [("event loop lag", report["event_loop_lag"])]:
+        print(
+            f"{label:<16} {row['p50_ms']:>6.1f}ms {row['p95_ms']:>6.1f}ms "
+            f"{row['p99_ms']:>6.1f}ms {row['max_ms']:>6.1f}ms"
+        )
+    print(
+        f"\n{report['throughput']['sessions_per_s']} sessions/s, "
+        f"{report['throughput']['turns_per_s']} turns/s over {report['wall_s']}s, "
+        f"{report['errors']} errors"
+    )
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Measure time from sending a volunteer message to the "done" event, with
+coaching started after the caller stream (sequential) and alongside it
+(pipelined, the default). Also reports when the streamed risk level
+arrives, ahead of "done".
+
+Serves the app on localhost and reads /api/messages/stream as the browser
+does, with the simulated Anthropic client from bench_analysis (streaming
+added, for the caller reply and live context), so no API key is needed.
+
+Usage:
+    python bench_turn_latency.py [--turns 8] [--caller-tokens 45] [--coaching-tokens 45]
+
+Pipelining only shortens "done" when coaching is on the critical path, i.e.
+when it would finish after live context and suggestions (try
+--coaching-tokens 250 for long-form feedback or a slower model).
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import uvicorn
+
+import app as app_module
+import llm_service
+from llm_backends import AnthropicBackend, estimate_request_tokens
+from bench_analysis import CALLER_LINES, OUTPUT_TOKENS, REPLIES, VOLUNTEER_LINES, SimulatedMessages
+from memory_store import AsyncMemoryStore, LocalMemoryStore
+
+
+class SimulatedStreamingMessages(SimulatedMessages):
+    """SimulatedMessages plus messages.stream() for the caller reply."""
+
+    def __init__(self, overhead, prefill_per_1k, decode_rate, caller_tokens: int):
+        super().__init__(overhead, prefill_per_1k, decode_rate)
+        self.caller_tokens = caller_tokens
+        self.turn = 0
+
+    def stream(self, **request):
+        sim = self
+        input_tokens = estimate_request_tokens(request["system"], request["messages"])
+        if isinstance(request["system"], str):
+            # Streamed analysis (live context): its JSON reply, word by word
+            task = self._task(request)
+            words = json.dumps(REPLIES[task]).split(" ")
+            words = [w if i == 0 else " " + w for i, w in enumerate(words)]
+            output_tokens = OUTPUT_TOKENS[task]
+        else:
+            words = [w + " " for w in CALLER_LINES[self.turn % len(CALLER_LINES)].split()]
+            output_tokens = sim.caller_tokens
+            self.turn += 1
+
+        class _Stream:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            @property
+            async def text_stream(self):
+                await asyncio.sleep(sim.overhead + input_tokens / 1000 * sim.prefill_per_1k)
+                for i in range(max(output_tokens, len(words))):
+                    await asyncio.sleep(1 / sim.decode_rate)
+                    if i < len(words):
+                        yield words[i]
+
+            async def get_final_message(self):
+                return SimpleNamespace(
+                    usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens)
+                )
+
+        return _Stream()
+
+
+def _start_server() -> tuple:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def _run(base_url: str, label: str, pipelined: bool, turns: int) -> dict:
+    if pipelined:
+        app_module.llm.__dict__.pop("begin_coaching", None)
+    else:
+        app_module.llm.begin_coaching = lambda *args, **kwargs: None
+
+    done, tail, risk = [], [], []
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        started = await client.post(
+            "/api/sessions/start",
+            json={"caller_id": f"bench-{label}", "volunteer_name": "Bench"},
+        )
+        session_id = started.json()["session_id"]
+        for turn in range(turns):
+            t0 = time.perf_counter()
+            stream_end = None
+            async with client.stream(
+                "GET",
+                "/api/messages/stream",
+                params={
+                    "session_id": session_id,
+                    "message": VOLUNTEER_LINES[turn % len(VOLUNTEER_LINES)],
+                },
+            ) as resp:
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[len("data: "):])
+                    if event["type"] == "stream_end":
+                        stream_end = time.perf_counter()
+                    elif event["type"] == "live_context_partial" and event["field"] == "risk_level":
+                        risk.append(time.perf_counter() - stream_end)
+                    elif event["type"] == "done":
+                        now = time.perf_counter()
+                        done.append(now - t0)
+                        tail.append(now - stream_end)
+    return {"done": done, "tail": tail, "risk": risk}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--caller-tokens", type=int, default=45, help="Simulated caller reply length")
+    parser.add_argument("--overhead", type=float, default=0.35, help="Simulated seconds per request")
+    parser.add_argument("--prefill", type=float, default=0.05, help="Simulated seconds per 1k input tokens")
+    parser.add_argument("--decode-rate", type=float, default=80.0, help="Simulated output tokens/s")
+    parser.add_argument("--coaching-tokens", type=int, default=OUTPUT_TOKENS["coaching"])
+    parser.add_argument("--max-in-flight", type=int, default=llm_service.LLM_MAX_IN_FLIGHT)
+    args = parser.parse_args()
+    OUTPUT_TOKENS["coaching"] = args.coaching_tokens
+
+    llm_service.backend = AnthropicBackend(SimpleNamespace(
+        messages=SimulatedStreamingMessages(
+            args.overhead, args.prefill, args.decode_rate, args.caller_tokens
+        )
+    ))
+    llm_service.FUSED_ANALYSIS = False
+    llm_service.scheduler = llm_service.LLMScheduler(max_in_flight=args.max_in_flight)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module.memory = AsyncMemoryStore(LocalMemoryStore(tmp))
+        server, thread, base_url = _start_server()
+        print(f"{args.turns} turns, simulated client, {args.max_in_flight} LLM requests in flight\n")
+        print(
+            f"{'mode':<11} {'done mean':>10} {'done max':>9} {'stream_end→done':>16} "
+            f"{'stream_end→risk':>16}"
+        )
+        try:
+            for label, pipelined in (("sequential", False), ("pipelined", True)):
+                r = asyncio.run(_run(base_url, label, pipelined, args.turns))
+                print(
+                    f"{label:<11} {statistics.mean(r['done']):>9.2f}s {max(r['done']):>8.2f}s "
+                    f"{statistics.mean(r['tail']):>15.2f}s {statistics.mean(r['risk']):>15.2f}s"
+                )
+        finally:
+            server.should_exit = True
+            thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Incremental parsing of a JSON object that arrives in streamed chunks.
+
+IncrementalJSONObject.feed() returns each top-level member as soon as its
+value is complete, so callers can act on early fields (e.g. risk_level)
+while the model is still generating the rest. Text before the opening
+brace — a markdown fence, a stray preamble — is skipped.
+"""
+
+import json
+
+
+class IncrementalJSONObject:
+    """Tracks string/escape state and nesting depth; a member ends at a
+    depth-1 comma or the closing brace and is decoded on its own."""
+
+    def __init__(self):
+        self.fields: dict = {}
+        self.complete = False
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member: list = []
+
+    def feed(self, chunk: str) -> dict:
+        """Consume a chunk; return the members completed by it."""
+        completed = {}
+        for ch in chunk:
+            if self.complete:
+                break
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                self._member.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_member(completed)
+                    self.complete = True
+                    continue
+            elif ch == "," and self._depth == 1:
+                self._finish_member(completed)
+                continue
+            self._member.append(ch)
+        return completed
+
+    def _finish_member(self, completed: dict):
+        text = "".join(self._member).strip()
+        self._member = []
+        if not text:
+            return
+        try:
+            member = json.loads("{" + text + "}")
+        except json.JSONDecodeError:
+            return  # malformed member; the full-text parse has the last word
+        self.fields.update(member)
+        completed.update(member)
@@ -0,0 +1,279 @@
+"""
+LLM backends behind llm_service._chat and the caller stream.
+
+LLM_BACKEND selects one:
+
+    anthropic  (default) the Anthropic API via the official SDK
+    stub       local canned replies with simulated latency — no network, no
+               API key, no cost; for load tests and offline demos
+
+Both expose the same two calls:
+
+    await backend.complete(task, **request) -> LLMReply(text, usage)
+    async with backend.stream(task, **request) as stream:
+        async for text in stream.text_stream: ...
+        usage = (await stream.get_final_message()).usage
+
+`request` holds the Messages API arguments (model, system, messages,
+max_tokens, temperature); `task` names the calling method ("live_context",
+"coaching", ...) so the stub can reply with JSON of the right shape.
+
+Stub settings (all optional):
+
+    STUB_LLM_LATENCY       seconds before the first token (default 0.3)
+    STUB_LLM_TOKENS_PER_S  output rate (default 80)
+    STUB_LLM_FAILURE_RATE  fraction of calls that fail (default 0)
+    STUB_LLM_FAILURE_MODE  error (HTTP 500), rate_limit (HTTP 429) or
+                           malformed (non-JSON reply) (default error)
+    STUB_LLM_REPLIES       JSON file of recorded replies, {task: reply or
+                           [replies, ...]}, served in turn (so a single
+                           JSON-array reply is written [[...]]); tasks
+                           missing from it use the built-in canned replies
+    STUB_LLM_SEED          seed for failure injection (default 0)
+"""
+
+import asyncio
+import json
+import os
+import random
+from types import SimpleNamespace
+from typing import NamedTuple
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "anthropic")
+
+STUB_LLM_LATENCY = float(os.getenv("STUB_LLM_LATENCY", "0.3"))
+STUB_LLM_TOKENS_PER_S = float(os.getenv("STUB_LLM_TOKENS_PER_S", "80"))
+STUB_LLM_FAILURE_RATE = float(os.getenv("STUB_LLM_FAILURE_RATE", "0"))
+STUB_LLM_FAILURE_MODE = os.getenv("STUB_LLM_FAILURE_MODE", "error")
+STUB_LLM_REPLIES = os.getenv("STUB_LLM_REPLIES", "")
+STUB_LLM_SEED = int(os.getenv("STUB_LLM_SEED", "0"))
+
+
+class LLMReply(NamedTuple):
+    text: str
+    usage: object
+
+
+class AnthropicBackend:
+    """The Anthropic Messages API. `client` defaults to an AsyncAnthropic
+    built from ANTHROPIC_API_KEY; anything with the same `messages.create`
+    and `messages.stream` will do."""
+
+    name = "anthropic"
+
+    def __init__(self, client=None):
+        if client is None:
+            from anthropic import AsyncAnthropic
+
+            client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY", ""))
+        self.client = client
+
+    async def complete(self, task: str, **request) -> LLMReply:
+        response = await self.client.messages.create(**request)
+        return LLMReply(response.content[0].text, getattr(response, "usage", None))
+
+    def stream(self, task: str, **request):
+        return self.client.messages.stream(**request)
+
+
+class StubBackendError(Exception):
+    """Injected failure; carries an HTTP-like status_code as API errors do."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"stub LLM backend: injected HTTP {status_code}")
+        self.status_code = status_code
+
+
+CALLER_LINES = [
+    "I... I don't really know why I called.",
+    "It's just been a lot lately. Yumi left, and then the job...",
+    "Max is the only reason I get out of bed, honestly.",
+    "Sometimes I think everyone would be better off... but I wouldn't do anything.",
+    "The breathing thing... okay. That helped a little.",
+    "I got an eviction notice yesterday. It's all too much.",
+]
+
+CANNED_REPLIES = {
+    "live_context": {
+        "risk_level": "moderate",
+        "warnings": ["Passive ideation mentioned"],
+        "triggers": ["Partner leaving", "Job loss"],
+        "effective_strategies": ["Validation"],
+        "current_mood": "Low, guarded but opening up",
+        "key_facts": ["Lost job two weeks ago", "Dog named Max"],
+        "addressed_items": [],
+    },
+    "coaching": {
+        "score": "good",
+        "feedback": "Warm validation of the caller's feelings.",
+        "technique": "Validation",
+    },
+    "suggestions": [
+        "That sounds like a lot to carry at once.",
+        "What has helped you get through the past few days?",
+        "Would you like to try a slow breath together?",
+    ],
+    "openers": [
+        "It's good to hear from you again.",
+        "Last time you mentioned Max — how is he doing?",
+        "I'm here, take your time.",
+    ],
+    "extract_memories": {
+        "triggers": ["Partner leaving", "Job loss"],
+        "effective_strategies": ["Breathing exercises"],
+        "safety_plan": ["Call the hotline if dark thoughts intensify"],
+        "situation": {
+            "description": "Recently lost job and partner; lives alone with dog.",
+            "key_events": ["Partner left", "Job loss"],
+        },
+        "warnings": ["Passive ideation mentioned"],
+        "session_summary": "Caller described recent losses. Breathing helped a little.",
+        "risk_level": "moderate",
+    },
+    "briefing": (
+        "RETURNING CALLER — previous session(s)\n"
+        "Risk Level: moderate\n\n"
+        "WARNINGS\n- Passive ideation mentioned\n\n"
+        "SITUATION\n- Recently lost job and partner\n\n"
+        "WHAT WORKS\n- Breathing exercises\n\n"
+        "SAFETY PLAN\n- Call the hotline if dark thoughts intensify\n\n"
+        "LAST SESSION\nCaller described recent losses."
+    ),
+    "digest": "Caller lost job and partner; passive dark thoughts; breathing helped.",
+}
+CANNED_REPLIES["fused_analysis"] = {
+    "live_context": CANNED_REPLIES["live_context"],
+    "coaching": CANNED_REPLIES["coaching"],
+    "suggestions": CANNED_REPLIES["suggestions"],
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~4 ASCII chars per token, ~1 token per CJK char."""
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+
+def estimate_request_tokens(system, messages: list) -> int:
+    """Estimated prompt tokens; system and contents may be str or text blocks."""
+    parts = []
+    for content in [system] + [m["content"] for m in messages]:
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block["text"] for block in content)
+    return estimate_tokens("".join(parts))
+
+
+class StubBackend:
+    """
+    Offline backend: deterministic replies streamed at a simulated rate.
+
+    Caller turns cycle through CALLER_LINES by conversation length; other
+    tasks get recorded replies (if given) or CANNED_REPLIES, serialized as
+    JSON where the real prompt asks for JSON. Failures are drawn from a
+    seeded RNG, so a given seed fails the same calls on every run.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency: float = STUB_LLM_LATENCY,
+        tokens_per_s: float = STUB_LLM_TOKENS_PER_S,
+        failure_rate: float = STUB_LLM_FAILURE_RATE,
+        failure_mode: str = STUB_LLM_FAILURE_MODE,
+        replies: dict = None,
+        seed: int = STUB_LLM_SEED,
+    ):
+        self.latency = latency
+        self.tokens_per_s = tokens_per_s
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        if replies is None and STUB_LLM_REPLIES:
+            with open(STUB_LLM_REPLIES, encoding="utf-8") as f:
+                replies = json.load(f)
+        self.replies = replies or {}
+        self._rng = random.Random(seed)
+        self._served: dict = {}  # task -> recorded replies served so far
+        self.calls = 0
+        self.failures = 0
+
+    def _reply(self, task: str, request: dict) -> str:
+        recorded = self.replies.get(task)
+        if isinstance(recorded, list) and recorded:
+            n = self._served.get(task, 0)
+            self._served[task] = n + 1
+            reply = recorded[n % len(recorded)]
+        elif recorded is not None:
+            reply = recorded
+        elif task in ("caller_stream", "caller_response"):
+            reply = CALLER_LINES[len(request["messages"]) // 2 % len(CALLER_LINES)]
+        else:
+            reply = CANNED_REPLIES.get(task, "")
+        return reply if isinstance(reply, str) else json.dumps(reply, ensure_ascii=False)
+
+    def _start(self, task: str, request: dict) -> str:
+        """Count the call and apply failure injection; return the reply."""
+        self.calls += 1
+        reply = self._reply(task, request)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            self.failures += 1
+            if self.failure_mode == "malformed":
+                return reply[: len(reply) // 2] or "not json"
+            raise StubBackendError(429 if self.failure_mode == "rate_limit" else 500)
+        return reply
+
+    def _usage(self, request: dict, text: str) -> SimpleNamespace:
+        return SimpleNamespace(
+            input_tokens=estimate_request_tokens(request.get("system", ""), request["messages"]),
+            output_tokens=estimate_tokens(text),
+            cache_read_input_tokens=0,
+            cache_creation_input_tokens=0,
+        )
+
+    async def complete(self, task: str, **request) -> LLMReply:
+        text = self._start(task, request)
+        await asyncio.sleep(self.latency + estimate_tokens(text) / self.tokens_per_s)
+        return LLMReply(text, self._usage(request, text))
+
+    def stream(self, task: str, **request):
+        return _StubStream(self, task, request)
+
+
+class _StubStream:
+    """Async context manager shaped like the SDK's MessageStream."""
+
+    def __init__(self, backend: StubBackend, task: str, request: dict):
+        self._backend = backend
+        self._task = task
+        self._request = request
+        self._text = ""
+
+    async def __aenter__(self):
+        self._text = self._backend._start(self._task, self._request)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        await asyncio.sleep(self._backend.latency)
+        for i, word in enumerate(self._text.split(" ")):
+            chunk = word if i == 0 else " " + word
+            await asyncio.sleep(estimate_tokens(chunk) / self._backend.tokens_per_s)
+            yield chunk
+
+    async def get_final_message(self):
+        return SimpleNamespace(usage=self._backend._usage(self._request, self._text))
+
+
+def create_llm_backend(name: str = None):
+    """Factory: the backend named by LLM_BACKEND (anthropic unless set)."""
+    name = name or LLM_BACKEND
+    if name == "stub":
+        return StubBackend()
+    if name != "anthropic":
+        print(f"WARNING: unknown LLM_BACKEND={name!r}, using anthropic")
+    return AnthropicBackend()
@@ -1,13 +1,67 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
 import os
 import json
-from anthropic import AsyncAnthropic
+import time
+from collections import OrderedDict, deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import NamedTuple
 
-client = AsyncAnthropic(
-    api_key=os.getenv("ANTHROPIC_API_KEY", ""),
-)
+from json_stream import IncrementalJSONObject
+from llm_backends import create_llm_backend, estimate_request_tokens, estimate_tokens
+
+# Anthropic API, or the offline stub with LLM_BACKEND=stub (see llm_backends)
+backend = create_llm_backend()
 
 MODEL = os.getenv("MODEL_NAME", "claude-sonnet-4-5-20250929")
 
+# Model routing: each task runs on a tier with its own max_tokens and timeout
+# (seconds). LLM_ROUTES overrides entries as "task=tier[:max_tokens[:timeout]]"
+# pairs separated by commas, e.g. "coaching=large,briefing=fast:600:20".
+# With LLM_FALLBACK_MODEL set, a call that times out or is rate-limited is
+# retried once on that model.
+FAST_MODEL = os.getenv("FAST_MODEL_NAME", "claude-haiku-4-5-20251001")
+MODEL_TIERS = {"large": MODEL, "fast": FAST_MODEL}
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+
+# Token budget for the caller-memory block placed into prompts.
+MEMORY_CONTEXT_TOKENS = int(os.getenv("MEMORY_CONTEXT_TOKENS", "1200"))
+
+# Sessions rendered with full summaries before older ones; the rest only fill
+# whatever budget is left.
+RECENT_SESSIONS = 3
+
+# FUSED_ANALYSIS=1: one LLM call per turn returns live context, coaching and
+# reply suggestions together instead of three separate requests.
+FUSED_ANALYSIS = os.getenv("FUSED_ANALYSIS", "") == "1"
+
+# Rolling session digest for analysis prompts: the last DIGEST_RECENT_MESSAGES
+# messages stay verbatim; older ones are folded into a running summary once
+# at least DIGEST_FOLD_CHUNK of them have accumulated.
+DIGEST_RECENT_MESSAGES = int(os.getenv("DIGEST_RECENT_MESSAGES", "8"))
+DIGEST_FOLD_CHUNK = int(os.getenv("DIGEST_FOLD_CHUNK", "6"))
+
+# Request scheduler: concurrent requests to the API, request rate (per
+# minute, 0 = unlimited) with a burst allowance, and queued requests before
+# the lowest priority class is shed.
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "16"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "10"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "100"))
+
+# Response cache for low-temperature calls whose inputs repeat exactly
+# (briefings, openers, end-of-session extraction): entries kept in memory
+# (0 disables), an optional directory for a shared on-disk tier, its TTL in
+# seconds, and the tasks that opt in.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_TASKS = os.getenv("LLM_CACHE_TASKS", "briefing,openers,extract_memories")
+
 
 def _structured_memory(caller_memory: dict) -> dict:
     """Return caller memory without the memu_supplementary key."""
@@ -15,6 +69,87 @@ def _structured_memory(caller_memory: dict) -> dict:
         return caller_memory
     return {k: v for k, v in caller_memory.items() if k != "memu_supplementary"}
 
+
+def _session_line(session: dict) -> str:
+    date = (session.get("date") or "")[:10]
+    header = f"Session {session.get('session_number', '?')}"
+    details = ", ".join(
+        part
+        for part in (date, session.get("volunteer"), f"risk {session.get('risk_level', 'unknown')}")
+        if part
+    )
+    summary = session.get("summary") or ""
+    return f"- {header} ({details}): {summary}".rstrip(": ")
+
+
+def build_memory_context(caller_memory: dict, budget_tokens: int = MEMORY_CONTEXT_TOKENS) -> str:
+    """
+    Render caller memory as a compact prompt block within a token budget.
+
+    Sections are filled in priority order — warnings, safety plan, recent
+    session summaries, triggers, what works, situation, earlier sessions —
+    and a section is cut off (with a note) once the next line would exceed
+    the budget. Raw conversations are never included.
+    """
+    memory = _structured_memory(caller_memory) or {}
+    sessions = sorted(
+        memory.get("sessions", []), key=lambda s: s.get("session_number") or 0
+    )
+    recent = list(reversed(sessions[-RECENT_SESSIONS:]))
+    earlier = list(reversed(sessions[:-RECENT_SESSIONS]))
+    situation = memory.get("situation") or {}
+    situation_lines = []
+    if isinstance(situation, dict):
+        if situation.get("description"):
+            situation_lines.append(f"- {situation['description']}")
+        situation_lines += [f"- {e}" for e in situation.get("key_events", [])]
+    elif situation:
+        situation_lines.append(f"- {situation}")
+
+    known = {
+        "sessions", "warnings", "safety_plan", "triggers",
+        "effective_strategies", "situation",
+    }
+    other_lines = [
+        f"- {key}: {json.dumps(value, ensure_ascii=False)}"
+        for key, value in memory.items()
+        if key not in known and value
+    ]
+
+    sections = [
+        ("WARNINGS", [f"- {w}" for w in memory.get("warnings", [])]),
+        ("SAFETY PLAN", [f"- {p}" for p in memory.get("safety_plan", [])]),
+        ("RECENT SESSIONS (newest first)", [_session_line(s) for s in recent]),
+        ("TRIGGERS", [f"- {t}" for t in memory.get("triggers", [])]),
+        ("WHAT WORKS", [f"- {t}" for t in memory.get("effective_strategies", [])]),
+        ("SITUATION", situation_lines),
+        ("EARLIER SESSIONS", [_session_line(s) for s in earlier]),
+        ("OTHER NOTES", other_lines),
+    ]
+
+    latest_risk = sessions[-1].get("risk_level", "unknown") if sessions else "unknown"
+    blocks = [f"Previous sessions: {len(sessions)}\nLatest risk level: {latest_risk}"]
+    used = estimate_tokens(blocks[0])
+    for title, lines in sections:
+        if not lines:
+            continue
+        kept = []
+        cost = estimate_tokens(title)
+        for line in lines:
+            line_cost = estimate_tokens(line)
+            if used + cost + line_cost > budget_tokens:
+                break
+            kept.append(line)
+            cost += line_cost
+        if not kept:
+            continue
+        if len(kept) < len(lines):
+            kept.append(f"- (+{len(lines) - len(kept)} more omitted)")
+        blocks.append("\n".join([title] + kept))
+        used += cost
+    return "\n\n".join(blocks)
+
+
 CALLER_SYSTEM_PROMPT = """\
 You are playing the role of a crisis caller for a training simulation.
 Your name is Takeshi. You are calling a crisis support hotline.
@@ -77,15 +212,754 @@ mild frustration:
 """
 
 
-async def _chat(system: str, messages: list, temperature: float = 0.7, max_tokens: int = 500) -> str:
-    response = await client.messages.create(
-        model=MODEL,
-        max_tokens=max_tokens,
-        temperature=temperature,
+# Prompt caching: a breakpoint caches everything up to and including its
+# block. On the next call the API also finds earlier cached prefixes by
+# walking back over block boundaries, so marking the newest block each turn
+# lets the system prompt, memory and earlier turns be read from cache.
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+class UsageCounters:
+    """Per-task token counters taken from the API's usage fields."""
+
+    FIELDS = (
+        "input_tokens",
+        "output_tokens",
+        "cache_read_input_tokens",
+        "cache_creation_input_tokens",
+    )
+
+    def __init__(self):
+        self._tasks: dict = {}
+
+    def _row(self, task: str) -> dict:
+        return self._tasks.setdefault(
+            task,
+            {"calls": 0, **dict.fromkeys(self.FIELDS, 0), "cancelled": 0, "tokens_saved_est": 0},
+        )
+
+    def record(self, task: str, usage):
+        if usage is None:
+            return
+        row = self._row(task)
+        row["calls"] += 1
+        for field in self.FIELDS:
+            row[field] += getattr(usage, field, 0) or 0
+
+    def record_cancelled(self, task: str, prompt_tokens: int, max_tokens: int):
+        """Count a call cancelled before its reply arrived. Saved tokens are
+        estimated: the task's mean reply size (max_tokens until one is seen),
+        plus the prompt if the request had not been sent yet."""
+        row = self._row(task)
+        output = row["output_tokens"] // row["calls"] if row["calls"] else max_tokens
+        row["cancelled"] += 1
+        row["tokens_saved_est"] += prompt_tokens + output
+
+    def snapshot(self) -> dict:
+        out = {}
+        for task, row in self._tasks.items():
+            prompt = (
+                row["input_tokens"]
+                + row["cache_read_input_tokens"]
+                + row["cache_creation_input_tokens"]
+            )
+            out[task] = {
+                **row,
+                "cache_hit_rate": round(row["cache_read_input_tokens"] / prompt, 3)
+                if prompt
+                else 0.0,
+            }
+        return out
+
+
+usage = UsageCounters()
+
+
+class LLMOverloaded(Exception):
+    """The scheduler shed this request to protect higher-priority work."""
+
+
+class LLMTimeout(LLMOverloaded):
+    """No reply within the task's timeout, fallback included. Handled like
+    a shed request: the result is skipped (or the client retries)."""
+
+
+class Route(NamedTuple):
+    tier: str
+    max_tokens: int
+    timeout: float
+
+    @property
+    def model(self) -> str:
+        return MODEL_TIERS.get(self.tier, MODEL)
+
+
+# The 300-token coaching/suggestion/opener calls and digest folds don't need
+# the role-play model; the caller, live context, extraction and briefing do.
+TASK_ROUTES = {
+    "caller_stream": Route("large", 500, LLM_TIMEOUT),
+    "caller_response": Route("large", 500, LLM_TIMEOUT),
+    "live_context": Route("large", 1500, 30),
+    "fused_analysis": Route("large", 2000, 45),
+    "extract_memories": Route("large", 2000, 90),
+    "briefing": Route("large", 500, 45),
+    "coaching": Route("fast", 300, 15),
+    "suggestions": Route("fast", 300, 15),
+    "openers": Route("fast", 300, 15),
+    "digest": Route("fast", 400, 30),
+}
+
+
+def _parse_routes(spec: str, routes: dict) -> dict:
+    routes = dict(routes)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            task, value = item.split("=", 1)
+            tier, *rest = value.split(":")
+            base = routes.get(task.strip(), Route("large", 500, LLM_TIMEOUT))
+            routes[task.strip()] = Route(
+                tier.strip() or base.tier,
+                int(rest[0]) if len(rest) > 0 and rest[0] else base.max_tokens,
+                float(rest[1]) if len(rest) > 1 and rest[1] else base.timeout,
+            )
+        except ValueError:
+            print(f"WARNING: ignoring malformed LLM_ROUTES entry {item!r}")
+    return routes
+
+
+TASK_ROUTES = _parse_routes(os.getenv("LLM_ROUTES", ""), TASK_ROUTES)
+
+
+def route_for(task: str) -> Route:
+    return TASK_ROUTES.get(task, Route("large", 500, LLM_TIMEOUT))
+
+
+class LatencyStats:
+    """Per-task API latency (scheduler wait excluded), models used, and
+    fallbacks taken, over the last `window` calls per task."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._tasks: dict = {}
+
+    def _row(self, task: str) -> dict:
+        return self._tasks.setdefault(task, {
+            "samples": deque(maxlen=self.window),
+            "models": {},
+            "fallbacks": {},
+            "failures": {},
+        })
+
+    def record(self, task: str, model: str, seconds: float):
+        row = self._row(task)
+        row["samples"].append(seconds)
+        row["models"][model] = row["models"].get(model, 0) + 1
+
+    def record_fallback(self, task: str, reason: str):
+        row = self._row(task)
+        row["fallbacks"][reason] = row["fallbacks"].get(reason, 0) + 1
+
+    def record_failure(self, task: str, reason: str):
+        row = self._row(task)
+        row["failures"][reason] = row["failures"].get(reason, 0) + 1
+
+    def snapshot(self) -> dict:
+        out = {}
+        for task, row in self._tasks.items():
+            samples = sorted(row["samples"])
+
+            def pct(q):
+                return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 1)
+
+            out[task] = {
+                "calls": len(samples),
+                "p50_ms": pct(0.5) if samples else 0.0,
+                "p95_ms": pct(0.95) if samples else 0.0,
+                "max_ms": round(samples[-1] * 1000, 1) if samples else 0.0,
+                "models": dict(row["models"]),
+                "fallbacks": dict(row["fallbacks"]),
+                "failures": dict(row["failures"]),
+            }
+        return out
+
+
+latency = LatencyStats()
+
+
+def _fallback_reason(error: Exception):
+    """Why `error` warrants retrying on the fallback model, or None."""
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        return "rate_limited"
+    if status == 529:
+        return "overloaded"
+    return None
+
+
+# Scheduler class per task, highest priority first: the caller's streamed
+# reply, then extraction (risk, memories, handoff), then coaching extras.
+TASK_CLASSES = {
+    "caller_stream": "stream",
+    "caller_response": "stream",
+    "live_context": "extraction",
+    "fused_analysis": "extraction",
+    "extract_memories": "extraction",
+    "briefing": "extraction",
+    "openers": "extraction",
+    "coaching": "coaching",
+    "suggestions": "coaching",
+    "digest": "coaching",
+}
+
+
+class LLMScheduler:
+    """
+    Admission control for API requests: priority queue, in-flight cap and a
+    token-bucket rate limit.
+
+    Requests wait in priority order (then FIFO) for a free slot and a rate
+    token. When the queue is full a new request evicts the oldest queued
+    request of a lower class; if there is none it is rejected itself.
+    Either way the loser gets LLMOverloaded. "stream" requests are never
+    shed. Runs on a single event loop.
+    """
+
+    CLASSES = ("stream", "extraction", "coaching")
+
+    def __init__(
+        self,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        burst: int = LLM_RATE_BURST,
+        max_queue: int = LLM_MAX_QUEUE,
+    ):
+        self.max_in_flight = max_in_flight
+        self.rate = requests_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_queue = max_queue
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._queue: list = []  # heap of [priority, seq, cls, enqueued_at, future]
+        self._seq = itertools.count()
+        self._timer = None
+        self._stats = {
+            cls: {"admitted": 0, "shed": 0, "waits": deque(maxlen=1000)}
+            for cls in self.CLASSES
+        }
+
+    @asynccontextmanager
+    async def slot(self, cls: str):
+        await self.acquire(cls)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, cls: str):
+        waiting = self._waiting()
+        if not waiting and self._can_start():
+            self._start(cls, 0.0)
+            return
+        priority = self.CLASSES.index(cls)
+        if cls != "stream" and waiting >= self.max_queue:
+            self._shed_for(priority, cls)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._queue, [priority, next(self._seq), cls, time.monotonic(), future]
+        )
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()  # granted just before the cancellation
+            raise
+
+    def release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _waiting(self) -> int:
+        # Cancelled or shed entries stay in the heap until _dispatch pops them.
+        return sum(not e[4].done() for e in self._queue)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _can_start(self) -> bool:
+        if self._in_flight >= self.max_in_flight:
+            return False
+        if not self.rate:
+            return True
+        self._refill()
+        return self._tokens >= 1
+
+    def _start(self, cls: str, waited: float):
+        self._in_flight += 1
+        if self.rate:
+            self._tokens -= 1
+        stats = self._stats[cls]
+        stats["admitted"] += 1
+        stats["waits"].append(waited)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            return
+        while self._queue:
+            entry = self._queue[0]
+            if entry[4].done():  # cancelled or shed while waiting
+                heapq.heappop(self._queue)
+                continue
+            if self._in_flight >= self.max_in_flight:
+                return
+            if not self._can_start():
+                delay = (1 - self._tokens) / self.rate
+                self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+            heapq.heappop(self._queue)
+            self._start(entry[2], time.monotonic() - entry[3])
+            entry[4].set_result(None)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _shed_for(self, priority: int, cls: str):
+        waiting = [e for e in self._queue if not e[4].done()]
+        if waiting:
+            victim = max(waiting, key=lambda e: (e[0], -e[1]))
+            if victim[0] > priority:
+                self._queue.remove(victim)
+                heapq.heapify(self._queue)
+                self._stats[victim[2]]["shed"] += 1
+                victim[4].set_exception(LLMOverloaded(f"shed {victim[2]} request"))
+                return
+        self._stats[cls]["shed"] += 1
+        raise LLMOverloaded(f"LLM queue full, rejected {cls} request")
+
+    def stats(self) -> dict:
+        classes = {}
+        for cls, stats in self._stats.items():
+            waits = sorted(stats["waits"])
+            queued = sum(1 for e in self._queue if e[2] == cls and not e[4].done())
+
+            def pct(q):
+                return round(waits[min(len(waits) - 1, int(len(waits) * q))] * 1000, 1) if waits else 0.0
+
+            classes[cls] = {
+                "admitted": stats["admitted"],
+                "shed": stats["shed"],
+                "queued": queued,
+                "wait_ms_p50": pct(0.5),
+                "wait_ms_p95": pct(0.95),
+                "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+            }
+        return {"in_flight": self._in_flight, "classes": classes}
+
+
+scheduler = LLMScheduler()
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of LLM replies for the tasks in `tasks`.
+
+    The key hashes everything that shapes the reply — model, system prompt,
+    messages (language instructions are part of the prompt), temperature,
+    max_tokens and task — so any change to the inputs is a miss rather than
+    a stale hit. A bounded LRU sits in front of an optional on-disk tier
+    (one JSON file per key under `directory`, expired after `ttl` seconds)
+    that survives restarts and can be shared between workers. Concurrent
+    misses on the same key wait for one request instead of each calling
+    the API.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_SIZE,
+        directory: str = LLM_CACHE_DIR,
+        ttl: float = LLM_CACHE_TTL,
+        tasks=LLM_CACHE_TASKS,
+    ):
+        self.max_entries = max_entries
+        self.directory = directory or None
+        self.ttl = ttl
+        if isinstance(tasks, str):
+            tasks = [t.strip() for t in tasks.split(",") if t.strip()]
+        self.tasks = frozenset(tasks)
+        self._entries: OrderedDict = OrderedDict()  # key -> reply text
+        self._inflight: dict = {}  # key -> Future for the reply
+        self._stats: dict = {}
+
+    def enabled_for(self, task: str) -> bool:
+        return task in self.tasks and (self.max_entries > 0 or self.directory is not None)
+
+    @staticmethod
+    def key(**request) -> str:
+        blob = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _count(self, task: str, field: str):
+        row = self._stats.setdefault(
+            task, {"memory_hits": 0, "disk_hits": 0, "coalesced": 0, "misses": 0}
+        )
+        row[field] += 1
+
+    def _remember(self, key: str, text: str):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _disk_get(self, key: str):
+        try:
+            with open(self._disk_path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("stored_at", 0) > self.ttl:
+            return None
+        return entry.get("text")
+
+    def _disk_put(self, key: str, text: str):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stored_at": time.time(), "text": text}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    async def get_or_call(self, task: str, key: str, call, validate=None) -> str:
+        """Return the cached reply for `key`, or await `call()` and cache it
+        if `validate(reply)` (when given) accepts it."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._count(task, "memory_hits")
+            return self._entries[key]
+        fill = self._inflight.get(key)
+        if fill is None:
+            fill = asyncio.ensure_future(self._fill(task, key, call, validate))
+            self._inflight[key] = fill
+            fill.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._count(task, "coalesced")
+        # Shielded: one waiter going away must not cancel the shared request.
+        return await asyncio.shield(fill)
+
+    async def _fill(self, task: str, key: str, call, validate=None) -> str:
+        text = None
+        if self.directory:
+            text = await asyncio.to_thread(self._disk_get, key)
+        if text is not None:
+            self._count(task, "disk_hits")
+        else:
+            self._count(task, "misses")
+            text = await call()
+            if validate is not None and not validate(text):
+                return text  # unusable reply: served once, retried next time
+            if self.directory:
+                try:
+                    await asyncio.to_thread(self._disk_put, key, text)
+                except OSError as e:
+                    print(f"WARNING: LLM response cache write failed ({e})")
+        self._remember(key, text)
+        return text
+
+    def stats(self) -> dict:
+        tasks = {}
+        for task, row in self._stats.items():
+            hits = row["memory_hits"] + row["disk_hits"] + row["coalesced"]
+            total = hits + row["misses"]
+            tasks[task] = {**row, "hit_rate": round(hits / total, 3) if total else 0.0}
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk": self.directory,
+            "tasks": tasks,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def _cached_system(text: str) -> list:
+    return [{"type": "text", "text": text, "cache_control": CACHE_CONTROL}]
+
+
+def _chat_messages(conversation: list) -> list:
+    """Conversation as chat turns (caller = assistant), with a cache
+    breakpoint on the newest turn."""
+    messages = []
+    for msg in conversation:
+        role = "assistant" if msg["role"] == "caller" else "user"
+        messages.append({"role": role, "content": msg["content"]})
+    if messages:
+        messages[-1]["content"] = [
+            {"type": "text", "text": messages[-1]["content"], "cache_control": CACHE_CONTROL}
+        ]
+    return messages
+
+
+class SessionDigest:
+    """
+    Bounded view of a live session for analysis prompts.
+
+    Messages before `folded` are represented only by `summary`; everything
+    after is sent verbatim. LLMService.update_digest() advances the fold, so
+    prompt size stays roughly constant however long the call runs.
+    """
+
+    def __init__(
+        self,
+        recent_messages: int = DIGEST_RECENT_MESSAGES,
+        fold_chunk: int = DIGEST_FOLD_CHUNK,
+    ):
+        self.recent_messages = recent_messages
+        self.fold_chunk = fold_chunk
+        self.summary = ""
+        self.folded = 0
+        self._lock = asyncio.Lock()
+
+    def needs_fold(self, conversation: list) -> bool:
+        return len(conversation) - self.folded - self.recent_messages >= self.fold_chunk
+
+    def recent(self, conversation: list) -> list:
+        return conversation[self.folded:]
+
+
+def _transcript_prompt(
+    instructions: str, conversation: list, digest: SessionDigest = None
+) -> list:
+    """User content for an analysis prompt that ends with the transcript.
+
+    Each message is its own block and the last one carries the breakpoint,
+    so the instructions and all earlier turns hit the cache on the next turn.
+    The blocks concatenate to the same text as a single prompt string.
+    With a digest, folded turns are replaced by its running summary.
+    """
+    blocks = [{"type": "text", "text": instructions}]
+    if digest is not None and digest.summary:
+        blocks.append({
+            "type": "text",
+            "text": f"\n[Summary of the {digest.folded} earlier messages: {digest.summary}]",
+        })
+        conversation = digest.recent(conversation)
+    for msg in conversation:
+        blocks.append({"type": "text", "text": f"\n{msg['role'].upper()}: {msg['content']}"})
+    blocks[-1]["cache_control"] = CACHE_CONTROL
+    return blocks
+
+
+def _parse_json(text: str):
+    """Parse a JSON reply, tolerating a markdown fence around it."""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("\n", 1)[1]
+        cleaned = cleaned.rsplit("```", 1)[0]
+    return json.loads(cleaned)
+
+
+def _json_of(kind: type):
+    """Reply validator: the text parses as JSON of the given type."""
+
+    def validate(text: str) -> bool:
+        try:
+            return isinstance(_parse_json(text), kind)
+        except (json.JSONDecodeError, IndexError):
+            return False
+
+    return validate
+
+
+async def _complete(task: str, route: Route, **request) -> tuple:
+    """One completion on the task's model, retried once on
+    LLM_FALLBACK_MODEL if it times out or is rate-limited. Returns the
+    reply and the model that gave it."""
+    model = route.model
+    start = time.perf_counter()
+    try:
+        reply = await asyncio.wait_for(
+            backend.complete(task, model=model, **request), route.timeout
+        )
+    except Exception as e:
+        reason = _fallback_reason(e)
+        if reason is None:
+            raise
+        if not LLM_FALLBACK_MODEL or LLM_FALLBACK_MODEL == model:
+            latency.record_failure(task, reason)
+            if reason == "timeout":
+                raise LLMTimeout(f"{task}: no reply from {model} in {route.timeout:g}s") from e
+            raise
+        latency.record_fallback(task, reason)
+        model = LLM_FALLBACK_MODEL
+        start = time.perf_counter()
+        try:
+            reply = await asyncio.wait_for(
+                backend.complete(task, model=model, **request), route.timeout
+            )
+        except asyncio.TimeoutError as e:
+            latency.record_failure(task, "timeout")
+            raise LLMTimeout(f"{task}: no reply from {model} in {route.timeout:g}s") from e
+    latency.record(task, model, time.perf_counter() - start)
+    return reply, model
+
+
+async def _chat(
+    system,
+    messages: list,
+    temperature: float = 0.7,
+    max_tokens: int = None,
+    task: str = "chat",
+    validate=None,
+) -> str:
+    """Run `task` on its routed model; max_tokens defaults to the route's.
+
+    For tasks in the response cache, a reply is stored only if it came from
+    the routed model (the key names that model, not LLM_FALLBACK_MODEL) and
+    `validate(reply)`, when given, accepts it.
+    """
+    route = route_for(task)
+    max_tokens = max_tokens or route.max_tokens
+    answered_by = None
+
+    async def call() -> str:
+        nonlocal answered_by
+        sent = False
+        try:
+            async with scheduler.slot(TASK_CLASSES.get(task, "coaching")):
+                sent = True
+                reply, answered_by = await _complete(
+                    task,
+                    route,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=system,
+                    messages=messages,
+                )
+        except asyncio.CancelledError:
+            prompt_tokens = 0 if sent else estimate_request_tokens(system, messages)
+            usage.record_cancelled(task, prompt_tokens, max_tokens)
+            raise
+        usage.record(task, reply.usage)
+        return reply.text
+
+    if not response_cache.enabled_for(task):
+        return await call()
+    key = ResponseCache.key(
+        model=route.model,
         system=system,
         messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        task=task,
     )
-    return response.content[0].text
+
+    def cacheable(text: str) -> bool:
+        return answered_by == route.model and (validate is None or bool(validate(text)))
+
+    return await response_cache.get_or_call(task, key, call, cacheable)
+
+
+async def _stream(task: str, **request):
+    """Yield `task`'s reply text as it streams from its routed model;
+    max_tokens defaults to the route's.
+
+    Opening the stream and its first chunk must arrive within the route's
+    timeout. If they don't, or the backend refuses to start (rate-limited or
+    overloaded), the stream is reopened once on LLM_FALLBACK_MODEL. A stream
+    that has started producing text is never restarted on another model.
+    """
+    route = route_for(task)
+    request.setdefault("max_tokens", route.max_tokens)
+    sent = False
+
+    async def open_stream(stack: AsyncExitStack, model: str) -> tuple:
+        attempt = AsyncExitStack()
+        try:
+            stream = await attempt.enter_async_context(
+                backend.stream(task, model=model, **request)
+            )
+            chunks = aiter(stream.text_stream)
+            first = await anext(chunks, None)
+        except BaseException:
+            await attempt.aclose()
+            raise
+        stack.push_async_callback(attempt.aclose)
+        return stream, chunks, first
+
+    try:
+        async with scheduler.slot(TASK_CLASSES.get(task, "coaching")), AsyncExitStack() as stack:
+            sent = True
+            model = route.model
+            start = time.perf_counter()
+            try:
+                stream, chunks, first = await asyncio.wait_for(
+                    open_stream(stack, model), route.timeout
+                )
+            except Exception as e:
+                reason = _fallback_reason(e)
+                if reason is None:
+                    raise
+                if not LLM_FALLBACK_MODEL or LLM_FALLBACK_MODEL == model:
+                    latency.record_failure(task, reason)
+                    if reason == "timeout":
+                        raise LLMTimeout(f"{task}: no text from {model} in {route.timeout:g}s") from e
+                    raise
+                latency.record_fallback(task, reason)
+                model = LLM_FALLBACK_MODEL
+                start = time.perf_counter()
+                try:
+                    stream, chunks, first = await asyncio.wait_for(
+                        open_stream(stack, model), route.timeout
+                    )
+                except asyncio.TimeoutError as e:
+                    latency.record_failure(task, "timeout")
+                    raise LLMTimeout(f"{task}: no text from {model} in {route.timeout:g}s") from e
+            if first is not None:
+                yield first
+                async for text in chunks:
+                    yield text
+            final = await stream.get_final_message()
+    except asyncio.CancelledError:
+        prompt_tokens = 0 if sent else estimate_request_tokens(request["system"], request["messages"])
+        usage.record_cancelled(task, prompt_tokens, request["max_tokens"])
+        raise
+    latency.record(task, model, time.perf_counter() - start)
+    usage.record(task, getattr(final, "usage", None))
+
+
+async def _chat_json_stream(
+    system, messages: list, on_member, temperature: float = 0.7, task: str = "chat"
+) -> str:
+    """_chat for a JSON-object reply, streamed: `on_member(name, value)` is
+    called for each top-level member as soon as it is complete. Returns the
+    full reply text. The route's timeout covers the whole stream."""
+    route = route_for(task)
+    parser = IncrementalJSONObject()
+    chunks = []
+
+    async def read():
+        async for text in _stream(task, temperature=temperature, system=system, messages=messages):
+            chunks.append(text)
+            for name, value in parser.feed(text).items():
+                on_member(name, value)
+
+    try:
+        await asyncio.wait_for(read(), route.timeout)
+    except asyncio.TimeoutError as e:
+        latency.record_failure(task, "timeout")
+        raise LLMTimeout(f"{task}: reply from {route.model} not finished in {route.timeout:g}s") from e
+    return "".join(chunks)
 
 
 LANGUAGE_INSTRUCTIONS = {
@@ -106,57 +980,80 @@ BRIEFING_LANG = {
 }
 
 
+# Live-context fields reported before the rest of the analysis is done:
+# escalation should reach the volunteer without waiting for suggestions.
+PARTIAL_FIELDS = ("risk_level", "warnings")
+
+
 class LLMService:
 
+    def build_memory_context(self, caller_memory: dict) -> str:
+        """Compact prompt block for a caller — compute once per session."""
+        return build_memory_context(caller_memory)
+
+    def metrics(self) -> dict:
+        """Token usage per task (with prompt-cache reads and writes),
+        scheduler queue state and response-cache hit rates."""
+        return {
+            "usage": usage.snapshot(),
+            "latency": latency.snapshot(),
+            "routes": {
+                task: {"model": route.model, "max_tokens": route.max_tokens, "timeout_s": route.timeout}
+                for task, route in TASK_ROUTES.items()
+            },
+            "scheduler": scheduler.stats(),
+            "response_cache": response_cache.stats(),
+            "backend": backend.name,
+        }
+
     async def generate_caller_response(
-        self, conversation: list, caller_memory: dict = None
+        self, conversation: list, caller_memory: dict = None, memory_context: str = None
     ) -> str:
         if caller_memory:
             system = CALLER_RETURNING_PROMPT.format(
-                memory_context=json.dumps(_structured_memory(caller_memory), indent=2, ensure_ascii=False)
+                memory_context=memory_context or build_memory_context(caller_memory)
             )
         else:
             system = CALLER_SYSTEM_PROMPT
 
-        messages = []
-        for msg in conversation:
-            role = "assistant" if msg["role"] == "caller" else "user"
-            messages.append({"role": role, "content": msg["content"]})
-
-        return await _chat(system, messages)
+        return await _chat(
+            _cached_system(system), _chat_messages(conversation), task="caller_response"
+        )
 
     async def generate_caller_response_stream(
-        self, conversation: list, caller_memory: dict = None, language: str = "en"
+        self,
+        conversation: list,
+        caller_memory: dict = None,
+        language: str = "en",
+        memory_context: str = None,
     ):
-        """Yields text chunks from the Anthropic streaming API."""
+        """Yields text chunks from the backend's streaming API."""
         if caller_memory:
             system = CALLER_RETURNING_PROMPT.format(
-                memory_context=json.dumps(_structured_memory(caller_memory), indent=2, ensure_ascii=False)
+                memory_context=memory_context or build_memory_context(caller_memory)
             )
         else:
             system = CALLER_SYSTEM_PROMPT
         system += LANGUAGE_INSTRUCTIONS.get(language, "")
 
-        messages = []
-        for msg in conversation:
-            role = "assistant" if msg["role"] == "caller" else "user"
-            messages.append({"role": role, "content": msg["content"]})
-
-        async with client.messages.stream(
-            model=MODEL,
-            max_tokens=500,
+        async for text in _stream(
+            "caller_stream",
             temperature=0.7,
-            system=system,
-            messages=messages,
-        ) as stream:
-            async for text in stream.text_stream:
-                yield text
-
-    async def extract_live_context(self, conversation: list, language: str = "en") -> dict:
-        conv_text = ""
-        for msg in conversation:
-            conv_text += f"\n{msg['role'].upper()}: {msg['content']}"
-
+            system=_cached_system(system),
+            messages=_chat_messages(conversation),
+        ):
+            yield text
+
+    async def extract_live_context(
+        self,
+        conversation: list,
+        language: str = "en",
+        digest: SessionDigest = None,
+        on_partial=None,
+    ) -> dict:
+        """Live context for the sidebar. With `on_partial`, the reply is
+        streamed and `on_partial(field, value)` is called for each of
+        PARTIAL_FIELDS as soon as the model has finished writing it."""
         system = "You extract clinical insights from counseling conversations. Return ONLY valid JSON, no markdown fences."
 
         prompt = f"""\
@@ -164,12 +1061,12 @@ Analyze this crisis counseling conversation and extract key context observed so
 Return ONLY a valid JSON object with these fields:
 
 {{
+    "risk_level": "low | moderate | high",
+    "warnings": ["things to be careful about or avoid"],
     "triggers": ["list of identified emotional triggers"],
     "effective_strategies": ["counseling techniques that seemed to help"],
     "current_mood": "brief description of caller's current emotional state",
-    "risk_level": "low | moderate | high",
     "key_facts": ["important facts learned about the caller"],
-    "warnings": ["things to be careful about or avoid"],
     "addressed_items": ["issues that have been discussed and appear resolved or calmed"]
 }}
 
@@ -177,18 +1074,27 @@ Only include what has ACTUALLY been revealed. Keep each item to 5-10 words max.
 "addressed_items" = things the caller has worked through or that the volunteer has successfully addressed. These should NOT appear in warnings or triggers — they are resolved.{ANALYSIS_LANG.get(language, '')}
 
 Conversation:
-{conv_text}"""
+"""
 
-        messages = [{"role": "user", "content": prompt}]
+        messages = [{"role": "user", "content": _transcript_prompt(prompt, conversation, digest)}]
 
-        result = await _chat(system, messages, temperature=0.2, max_tokens=1500)
         try:
+            if on_partial is None:
+                result = await _chat(system, messages, temperature=0.2, task="live_context")
+            else:
+                def on_member(name, value):
+                    if name in PARTIAL_FIELDS:
+                        on_partial(name, value)
+
+                result = await _chat_json_stream(
+                    system, messages, on_member, temperature=0.2, task="live_context"
+                )
             cleaned = result.strip()
             if cleaned.startswith("```"):
                 cleaned = cleaned.split("\n", 1)[1]
                 cleaned = cleaned.rsplit("```", 1)[0]
             return json.loads(cleaned)
-        except (json.JSONDecodeError, IndexError):
+        except (json.JSONDecodeError, IndexError, LLMOverloaded):
             return {
                 "triggers": [],
                 "effective_strategies": [],
@@ -198,6 +1104,193 @@ Conversation:
                 "warnings": [],
             }
 
+    async def analyze_turn(
+        self,
+        conversation: list,
+        caller_memory: dict = None,
+        language: str = "en",
+        memory_context: str = None,
+        digest: SessionDigest = None,
+        coaching: asyncio.Task = None,
+        on_partial=None,
+    ) -> dict:
+        """Per-turn analysis: {"live_context", "coaching", "suggestions"}.
+
+        With FUSED_ANALYSIS one structured call produces all three; any part
+        missing or malformed in its reply is redone by the dedicated method.
+        Otherwise the three dedicated calls run concurrently. `coaching` is
+        the task from begin_coaching(), already running since the
+        volunteer's message arrived; its result is used as-is. `on_partial`
+        is passed to extract_live_context() (or fed the same fields from the
+        fused reply) so risk level and warnings can be shown early.
+        """
+        parts = {}
+        if FUSED_ANALYSIS:
+            parts = await self._fused_analysis(
+                conversation, caller_memory, language, memory_context, digest, on_partial
+            )
+
+        pending = {}
+        if not isinstance(parts.get("live_context"), dict) or "risk_level" not in parts["live_context"]:
+            pending["live_context"] = self.extract_live_context(
+                conversation, language, digest, on_partial
+            )
+        if coaching is not None:
+            pending["coaching"] = coaching
+        elif "coaching" not in parts:
+            pending["coaching"] = self.score_volunteer_response(conversation, language, digest)
+        if not isinstance(parts.get("suggestions"), list):
+            pending["suggestions"] = self.generate_reply_suggestions(
+                conversation, caller_memory, language, memory_context, digest
+            )
+        if pending:
+            results = await asyncio.gather(*pending.values())
+            parts.update(zip(pending, results))
+        return parts
+
+    def begin_coaching(
+        self, conversation: list, language: str = "en", digest: SessionDigest = None
+    ):
+        """Start scoring the volunteer's message before the caller replies.
+
+        Coaching only depends on the volunteer's side, so it can overlap the
+        caller stream instead of following it. Returns the task to hand to
+        analyze_turn(), or None when FUSED_ANALYSIS covers coaching anyway.
+        """
+        if FUSED_ANALYSIS:
+            return None
+        return asyncio.create_task(
+            self.score_volunteer_response(list(conversation), language, digest)
+        )
+
+    async def _fused_analysis(
+        self,
+        conversation: list,
+        caller_memory: dict,
+        language: str,
+        memory_context: str,
+        digest: SessionDigest = None,
+        on_partial=None,
+    ) -> dict:
+        memory_hint = ""
+        if caller_memory:
+            memory_hint = f"\n\nCaller memory from previous sessions:\n{memory_context or build_memory_context(caller_memory)}"
+            memu_context = caller_memory.get("memu_supplementary")
+            if memu_context:
+                memory_hint += f"\n\nAdditional semantic context:\n{memu_context}"
+
+        lang_hint = ANALYSIS_LANG.get(language, "")
+        if language == "ja":
+            lang_hint += "\nAll suggestions MUST be written entirely in Japanese. Use natural, empathetic Japanese."
+
+        system = "You are a crisis counseling analyst and trainer. Return ONLY valid JSON, no markdown fences."
+
+        prompt = f"""\
+Analyze this crisis counseling conversation. Return ONLY a valid JSON object with three parts:
+
+{{
+    "live_context": {{
+        "risk_level": "low | moderate | high",
+        "warnings": ["things to be careful about or avoid"],
+        "triggers": ["list of identified emotional triggers"],
+        "effective_strategies": ["counseling techniques that seemed to help"],
+        "current_mood": "brief description of caller's current emotional state",
+        "key_facts": ["important facts learned about the caller"],
+        "addressed_items": ["issues that have been discussed and appear resolved or calmed"]
+    }},
+    "coaching": {{
+        "score": "good | needs_improvement | caution",
+        "feedback": "One sentence of specific feedback (max 15 words)",
+        "technique": "Name of technique used or suggested (e.g. Active listening, Validation, Reframing)"
+    }},
+    "suggestions": ["2-3 short replies the volunteer could say next"]
+}}
+
+live_context: only include what has ACTUALLY been revealed. Keep each item to 5-10 words max.
+"addressed_items" = things the caller has worked through or that the volunteer has successfully addressed. These should NOT appear in warnings or triggers — they are resolved.
+
+coaching: review the volunteer's LAST message. "good" = empathetic, validating, well paced; \
+"needs_improvement" = missed validation, jumped to solutions, too directive; \
+"caution" = potentially harmful (minimizing, unsolicited advice, pushing too hard). \
+Be encouraging and focus on the single most important observation. \
+If the volunteer has not spoken yet, set coaching to null.
+
+suggestions: natural, empathetic responses (1 sentence, max 20 words each). \
+Vary the approach: one validating, one exploratory question, one grounding/practical.{memory_hint}{lang_hint}
+
+Conversation:
+"""
+
+        messages = [{"role": "user", "content": _transcript_prompt(prompt, conversation, digest)}]
+
+        try:
+            if on_partial is None:
+                result = await _chat(system, messages, temperature=0.2, task="fused_analysis")
+            else:
+                def on_member(name, value):
+                    if name == "live_context" and isinstance(value, dict):
+                        for field in PARTIAL_FIELDS:
+                            if field in value:
+                                on_partial(field, value[field])
+
+                result = await _chat_json_stream(
+                    system, messages, on_member, temperature=0.2, task="fused_analysis"
+                )
+            cleaned = result.strip()
+            if cleaned.startswith("```"):
+                cleaned = cleaned.split("\n", 1)[1]
+                cleaned = cleaned.rsplit("```", 1)[0]
+            parsed = json.loads(cleaned)
+        except (json.JSONDecodeError, IndexError, LLMOverloaded):
+            return {}
+        if not isinstance(parsed, dict):
+            return {}
+
+        parts = {}
+        if isinstance(parsed.get("live_context"), dict):
+            parts["live_context"] = parsed["live_context"]
+        coaching = parsed.get("coaching")
+        if len(conversation) < 2:
+            parts["coaching"] = None
+        elif isinstance(coaching, dict) and "score" in coaching:
+            parts["coaching"] = coaching
+        if isinstance(parsed.get("suggestions"), list):
+            parts["suggestions"] = parsed["suggestions"][:3]
+        return parts
+
+    async def update_digest(self, digest: SessionDigest, conversation: list) -> bool:
+        """Fold messages that have left the verbatim window into the digest's
+        running summary. Returns whether a fold happened."""
+        async with digest._lock:
+            if not digest.needs_fold(conversation):
+                return False
+            end = len(conversation) - digest.recent_messages
+            older = conversation[digest.folded:end]
+
+            new_text = ""
+            for msg in older:
+                new_text += f"\n{msg['role'].upper()}: {msg['content']}"
+
+            system = "You keep running notes of a crisis counseling call. Plain text only."
+            prompt = f"""\
+Update the running summary of this crisis call with the new messages below.
+Keep everything a counselor needs later: risk indicators and any mention of self-harm, \
+triggers, key facts, what the volunteer tried and how the caller responded, \
+and anything agreed or resolved. Drop small talk. Maximum 150 words. \
+Write in the same language as the conversation.
+
+Summary so far:
+{digest.summary or "(none — this is the start of the call)"}
+
+New messages:
+{new_text}"""
+
+            messages = [{"role": "user", "content": prompt}]
+            summary = await _chat(system, messages, temperature=0.2, task="digest")
+            digest.summary = summary.strip()
+            digest.folded = end
+            return True
+
     async def extract_memories(self, conversation: list, language: str = "en") -> dict:
         conv_text = ""
         for msg in conversation:
@@ -230,25 +1323,21 @@ Full conversation:
 
         messages = [{"role": "user", "content": prompt}]
 
-        result = await _chat(system, messages, temperature=0.2, max_tokens=2000)
+        result = await _chat(
+            system, messages, temperature=0.2, task="extract_memories", validate=_json_of(dict)
+        )
         try:
-            cleaned = result.strip()
-            if cleaned.startswith("```"):
-                cleaned = cleaned.split("\n", 1)[1]
-                cleaned = cleaned.rsplit("```", 1)[0]
-            return json.loads(cleaned)
+            return _parse_json(result)
         except (json.JSONDecodeError, IndexError):
             return {"session_summary": result, "risk_level": "unknown"}
 
-    async def score_volunteer_response(self, conversation: list, language: str = "en") -> dict:
+    async def score_volunteer_response(
+        self, conversation: list, language: str = "en", digest: SessionDigest = None
+    ) -> dict:
         """Score the volunteer's latest message with brief coaching feedback."""
-        if len(conversation) < 2:
+        if not any(msg["role"] == "volunteer" for msg in conversation):
             return None
 
-        conv_text = ""
-        for msg in conversation:
-            conv_text += f"\n{msg['role'].upper()}: {msg['content']}"
-
         system = "You are a crisis counseling trainer. Return ONLY valid JSON, no markdown fences."
 
         prompt = f"""\
@@ -269,32 +1358,35 @@ Scoring guide:
 Be encouraging. Focus on the single most important observation.{ANALYSIS_LANG.get(language, '')}
 
 Conversation:
-{conv_text}"""
+"""
 
-        messages = [{"role": "user", "content": prompt}]
+        messages = [{"role": "user", "content": _transcript_prompt(prompt, conversation, digest)}]
 
         try:
-            result = await _chat(system, messages, temperature=0.2, max_tokens=300)
+            result = await _chat(system, messages, temperature=0.2, task="coaching")
             cleaned = result.strip()
             if cleaned.startswith("```"):
                 cleaned = cleaned.split("\n", 1)[1]
                 cleaned = cleaned.rsplit("```", 1)[0]
             return json.loads(cleaned)
-        except (json.JSONDecodeError, IndexError):
+        except (json.JSONDecodeError, IndexError, LLMOverloaded):
             return None
 
-    async def generate_reply_suggestions(self, conversation: list, caller_memory: dict = None, language: str = "en") -> list:
+    async def generate_reply_suggestions(
+        self,
+        conversation: list,
+        caller_memory: dict = None,
+        language: str = "en",
+        memory_context: str = None,
+        digest: SessionDigest = None,
+    ) -> list:
         """Generate 2-3 suggested replies for the volunteer based on conversation state."""
         if not conversation:
             return []
 
-        conv_text = ""
-        for msg in conversation:
-            conv_text += f"\n{msg['role'].upper()}: {msg['content']}"
-
         memory_hint = ""
         if caller_memory:
-            memory_hint = f"\n\nCaller memory from previous sessions:\n{json.dumps(_structured_memory(caller_memory), indent=2, ensure_ascii=False)}"
+            memory_hint = f"\n\nCaller memory from previous sessions:\n{memory_context or build_memory_context(caller_memory)}"
             memu_context = caller_memory.get("memu_supplementary")
             if memu_context:
                 memory_hint += f"\n\nAdditional semantic context:\n{memu_context}"
@@ -312,12 +1404,12 @@ Vary the approach: one validating, one exploratory question, one grounding/pract
 Return ONLY a JSON array of strings.{memory_hint}{lang_hint}
 
 Conversation:
-{conv_text}"""
+"""
 
-        messages = [{"role": "user", "content": prompt}]
+        messages = [{"role": "user", "content": _transcript_prompt(prompt, conversation, digest)}]
 
         try:
-            result = await _chat(system, messages, temperature=0.4, max_tokens=300)
+            result = await _chat(system, messages, temperature=0.4, task="suggestions")
             cleaned = result.strip()
             if cleaned.startswith("```"):
                 cleaned = cleaned.split("\n", 1)[1]
@@ -326,10 +1418,12 @@ Conversation:
             if isinstance(suggestions, list):
                 return suggestions[:3]
             return []
-        except (json.JSONDecodeError, IndexError):
+        except (json.JSONDecodeError, IndexError, LLMOverloaded):
             return []
 
-    async def generate_opener_suggestions(self, caller_memory: dict, language: str = "en") -> list:
+    async def generate_opener_suggestions(
+        self, caller_memory: dict, language: str = "en", memory_context: str = None
+    ) -> list:
         """Generate context-aware opener suggestions for a returning caller."""
         system = "You are a crisis counseling coach. Return ONLY valid JSON, no markdown fences."
 
@@ -349,24 +1443,24 @@ The openers should reference past context naturally and warmly, showing the call
 Return ONLY a JSON array of strings.{lang_hint}
 
 Caller memories:
-{json.dumps(_structured_memory(caller_memory), indent=2, ensure_ascii=False)}{memu_hint}"""
+{memory_context or build_memory_context(caller_memory)}{memu_hint}"""
 
         messages = [{"role": "user", "content": prompt}]
 
         try:
-            result = await _chat(system, messages, temperature=0.4, max_tokens=300)
-            cleaned = result.strip()
-            if cleaned.startswith("```"):
-                cleaned = cleaned.split("\n", 1)[1]
-                cleaned = cleaned.rsplit("```", 1)[0]
-            suggestions = json.loads(cleaned)
+            result = await _chat(
+                system, messages, temperature=0.4, task="openers", validate=_json_of(list)
+            )
+            suggestions = _parse_json(result)
             if isinstance(suggestions, list):
                 return suggestions[:3]
             return []
-        except (json.JSONDecodeError, IndexError):
+        except (json.JSONDecodeError, IndexError, LLMOverloaded):
             return []
 
-    async def generate_briefing(self, caller_memory: dict, language: str = "en") -> str:
+    async def generate_briefing(
+        self, caller_memory: dict, language: str = "en", memory_context: str = None
+    ) -> str:
         system = "You create concise clinical briefings. Be clear and actionable. No markdown formatting — plain text only."
 
         memu_section = ""
@@ -402,8 +1496,13 @@ LAST SESSION
 [brief summary]{BRIEFING_LANG.get(language, '')}
 
 Caller memories:
-{json.dumps(_structured_memory(caller_memory), indent=2, ensure_ascii=False)}{memu_section}"""
+{memory_context or build_memory_context(caller_memory)}{memu_section}"""
 
         messages = [{"role": "user", "content": prompt}]
 
-        return await _chat(system, messages, temperature=0.3)
+        try:
+            return await _chat(
+                system, messages, temperature=0.3, task="briefing", validate=str.strip
+            )
+        except LLMOverloaded:
+            return None
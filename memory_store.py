@@ -1,11 +1,200 @@
+import asyncio
+import copy
+import functools
+import inspect
 import json
 import os
+import struct
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
+# Compact per-caller summary index kept next to the caller directories.
+SUMMARY_INDEX_FILE = "callers_index.json"
+
+# Structured store behind create_memory_store(): "local" (JSON tree under
+# DATA_DIR) or "sqlite" (sqlite_store.SqliteMemoryStore).
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "local")
+
+# How LocalMemoryStore writes session records: "files" (one JSON file per
+# session under sessions/) or "segments" (append-only sessions.log + index).
+SESSION_STORAGE = os.getenv("SESSION_STORAGE", "files")
+
+# Max entries in the in-process get_caller_memory/get_timeline cache (0 = off).
+MEMORY_CACHE_SIZE = int(os.getenv("MEMORY_CACHE_SIZE", "256"))
+
+# Worker threads behind AsyncMemoryStore — caps concurrent blocking store calls.
+MEMORY_STORE_THREADS = int(os.getenv("MEMORY_STORE_THREADS", "8"))
+
+# Shared memU HTTP client (cloud mode): pool limits and per-operation
+# timeouts in seconds. MEMU_HTTP2=1 needs the optional h2 package.
+MEMU_MAX_CONNECTIONS = int(os.getenv("MEMU_MAX_CONNECTIONS", "20"))
+MEMU_MAX_KEEPALIVE = int(os.getenv("MEMU_MAX_KEEPALIVE", "10"))
+MEMU_RETRIEVE_TIMEOUT = float(os.getenv("MEMU_RETRIEVE_TIMEOUT", "30"))
+MEMU_MEMORIZE_TIMEOUT = float(os.getenv("MEMU_MEMORIZE_TIMEOUT", "60"))
+MEMU_HTTP2 = os.getenv("MEMU_HTTP2", "") == "1"
+
+# memU retrieval cache: results are fresh for MEMU_CACHE_TTL seconds, then
+# served stale (while refreshed in the background) for MEMU_CACHE_STALE more.
+MEMU_CACHE_TTL = float(os.getenv("MEMU_CACHE_TTL", "300"))
+MEMU_CACHE_STALE = float(os.getenv("MEMU_CACHE_STALE", "3600"))
+MEMU_CACHE_SIZE = int(os.getenv("MEMU_CACHE_SIZE", "1024"))
+
+# memU circuit breaker: open after MEMU_BREAKER_FAILURES consecutive failed
+# (or over-budget) calls, probe again after MEMU_BREAKER_RESET seconds.
+# start_session waits at most MEMU_RETRIEVE_BUDGET seconds for memU before
+# answering from local data.
+MEMU_BREAKER_FAILURES = int(os.getenv("MEMU_BREAKER_FAILURES", "5"))
+MEMU_BREAKER_RESET = float(os.getenv("MEMU_BREAKER_RESET", "30"))
+MEMU_RETRIEVE_BUDGET = float(os.getenv("MEMU_RETRIEVE_BUDGET", "1.5"))
+
+RISK_ORDER = {"low": 0, "moderate": 1, "high": 2, "unknown": -1}
+
+
+# Top-level memory keys merged across sessions by store_session.
+MEMORY_KEYS = [
+    "triggers",
+    "effective_strategies",
+    "safety_plan",
+    "situation",
+    "warnings",
+]
+
+
+def _merge_memory(existing, new_data):
+    """Merge one memory key: lists are unioned (first-seen order), dicts updated."""
+    if existing is None:
+        return new_data
+    if isinstance(existing, list) and isinstance(new_data, list):
+        return list(dict.fromkeys(existing + new_data))
+    if isinstance(existing, dict) and isinstance(new_data, dict):
+        return {**existing, **new_data}
+    return new_data
+
+
+def _session_record(
+    session_number: int,
+    volunteer_name: str,
+    conversation: list,
+    extracted_memories: dict,
+) -> dict:
+    """Build the stored session record shared by every structured store."""
+    return {
+        "session_number": session_number,
+        "volunteer": volunteer_name,
+        "date": datetime.now().isoformat(),
+        "summary": extracted_memories.get("session_summary", ""),
+        "risk_level": extracted_memories.get("risk_level", "unknown"),
+        "message_count": len(conversation),
+        "conversation": conversation,
+        "extracted": {
+            "triggers": extracted_memories.get("triggers", []),
+            "effective_strategies": extracted_memories.get(
+                "effective_strategies", []
+            ),
+            "safety_plan": extracted_memories.get("safety_plan", []),
+            "warnings": extracted_memories.get("warnings", []),
+            "situation": extracted_memories.get("situation", {}),
+        },
+    }
+
+
+def risk_rank(level) -> int:
+    """Position of a risk level in RISK_ORDER; -1 for "unknown" or anything
+    that is not a level (LLM output can put a list or dict here)."""
+    if not isinstance(level, str):
+        return -1
+    return RISK_ORDER.get(level, -1)
+
+
+def is_escalation(prev_risk: Optional[str], curr_risk: Optional[str]) -> bool:
+    """True when risk moved up from a known previous level."""
+    prev_ord = risk_rank(prev_risk)
+    return risk_rank(curr_risk) > prev_ord >= 0
+
+
+def _summary_from_timeline(caller_id: str, timeline: dict) -> dict:
+    sess = timeline["sessions"]
+    latest = sess[-1]
+    return {
+        "caller_id": caller_id,
+        "total_sessions": len(sess),
+        "risk_level": latest.get("risk_level", "unknown"),
+        "last_volunteer": latest.get("volunteer", ""),
+        "last_date": latest.get("date", ""),
+        "last_summary": latest.get("summary", ""),
+        "escalations": any(len(s.get("escalations", [])) > 0 for s in sess),
+    }
+
+
+def memory_version(caller_memory: Optional[dict]) -> int:
+    """Version of a caller's memory for keying derived data: it changes
+    exactly when a session is stored."""
+    return len((caller_memory or {}).get("sessions", []))
+
+
+def _new_timeline_state() -> dict:
+    return {
+        "session_count": 0,
+        "seen_triggers": [],
+        "seen_strategies": [],
+        "prev_risk": None,
+    }
+
+
+def _timeline_entry(session: dict, state: dict) -> dict:
+    """
+    Diff one session against everything seen before it.
+
+    ``state`` carries the running sets of seen triggers and strategies plus
+    the previous risk level; it is updated in place, so entries can be
+    computed once at write time instead of replaying the whole history.
+    """
+    extracted = session.get("extracted", {})
+    seen_triggers = set(state["seen_triggers"])
+    seen_strategies = set(state["seen_strategies"])
+    curr_triggers = list(dict.fromkeys(extracted.get("triggers", [])))
+    curr_strategies = list(dict.fromkeys(extracted.get("effective_strategies", [])))
+    curr_risk = session.get("risk_level", "unknown")
+    prev_risk = state["prev_risk"]
+
+    # New info = new triggers + situation key events
+    new_info = [t for t in curr_triggers if t not in seen_triggers]
+    situation = extracted.get("situation", {})
+    if isinstance(situation, dict):
+        new_info += situation.get("key_events", [])
+
+    # Risk escalation detection
+    escalations = []
+    if is_escalation(prev_risk, curr_risk):
+        escalations.append(f"Risk {prev_risk} → {curr_risk}")
+
+    # Resolved = strategies that are new (things that now work)
+    new_strategies = [s for s in curr_strategies if s not in seen_strategies]
+
+    state["session_count"] += 1
+    state["seen_triggers"] += [t for t in curr_triggers if t not in seen_triggers]
+    state["seen_strategies"] += new_strategies
+    state["prev_risk"] = curr_risk
+
+    return {
+        "session_number": session.get("session_number"),
+        "volunteer": session.get("volunteer"),
+        "date": session.get("date"),
+        "summary": session.get("summary"),
+        "risk_level": curr_risk,
+        "new_info": new_info,
+        "escalations": escalations,
+        "new_strategies": new_strategies,
+        "warnings": extracted.get("warnings", []),
+    }
+
 
 class BaseMemoryStore(ABC):
     """Abstract interface — swap between local JSON and memU."""
@@ -36,6 +225,56 @@ class BaseMemoryStore(ABC):
     def clear_caller(self, caller_id: str):
         ...
 
+    def get_transcript(self, caller_id: str, session_number: int) -> Optional[list]:
+        """Return one session's conversation. Transcripts are not part of
+        get_caller_memory(); they are loaded only when explicitly asked for."""
+        return None
+
+    def get_session(self, caller_id: str, session_number: int) -> Optional[dict]:
+        """Return one stored session record with its conversation attached,
+        or None if it does not exist."""
+        memory = self.get_caller_memory(caller_id)
+        for sess in (memory or {}).get("sessions", []):
+            if sess.get("session_number") == session_number:
+                return {
+                    **sess,
+                    "conversation": self.get_transcript(caller_id, session_number)
+                    or [],
+                }
+        return None
+
+    def get_callers_summary(self) -> list:
+        """One summary row per caller — powers the supervisor dashboard.
+
+        The default walks every caller's timeline; stores that keep a
+        materialized index should override this.
+        """
+        summaries = []
+        for cid in self.list_callers():
+            timeline = self.get_timeline(cid)
+            if not timeline or not timeline.get("sessions"):
+                continue
+            summaries.append(_summary_from_timeline(cid, timeline))
+        return summaries
+
+    def metrics(self) -> dict:
+        """Operational counters for /api/metrics. Empty unless overridden."""
+        return {}
+
+    def prefetch(self, caller_id: str) -> bool:
+        """Warm any caches for a caller about to be picked up. Returns
+        whether the caller has memory."""
+        return self.get_caller_memory(caller_id) is not None
+
+    def get_handoff(self, caller_id: str, version: int, language: str) -> Optional[dict]:
+        """Return the precomputed {"briefing", "suggestions"} for this memory
+        version and language, or None. None unless overridden."""
+        return None
+
+    def put_handoff(self, caller_id: str, version: int, language: str, handoff: dict):
+        """Store a precomputed handoff. Entries for older memory versions are
+        dropped; a handoff for a version older than the stored one is ignored."""
+
     def get_session_diff(self, caller_id: str) -> Optional[dict]:
         """Compute what changed in the most recent session vs prior sessions."""
         timeline = self.get_timeline(caller_id)
@@ -52,14 +291,113 @@ class BaseMemoryStore(ABC):
         }
 
 
+class SegmentLog:
+    """
+    Append-only JSON-lines segment with a fixed-width offset index.
+
+    ``<base>.log`` holds one compact JSON record per line; ``<base>.idx`` holds
+    one (offset, length) entry per record. The record count is the index size
+    divided by the entry width, so appends never scan the log, and record N is
+    a single seek into each file. The index is written after the log line, so
+    a torn append leaves an unindexed tail that readers simply ignore.
+    """
+
+    _ENTRY = struct.Struct("<QI")
+
+    def __init__(self, base_path: str):
+        self.log_path = f"{base_path}.log"
+        self.idx_path = f"{base_path}.idx"
+
+    def exists(self) -> bool:
+        return os.path.exists(self.idx_path)
+
+    def count(self) -> int:
+        try:
+            return os.path.getsize(self.idx_path) // self._ENTRY.size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, record: dict) -> int:
+        """Append a record and return its 1-based position."""
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        with open(self.log_path, "ab") as log:
+            offset = log.seek(0, os.SEEK_END)
+            log.write(line)
+        with open(self.idx_path, "ab") as idx:
+            idx.write(self._ENTRY.pack(offset, len(line)))
+        return self.count()
+
+    def truncate(self, count: int):
+        """Drop every record after the first `count` (no-op if there are
+        fewer). The index shrinks first, so a crash part-way leaves only an
+        unindexed log tail."""
+        if count >= self.count():
+            return
+        with open(self.idx_path, "r+b") as idx:
+            idx.seek(count * self._ENTRY.size)
+            end, _ = self._ENTRY.unpack(idx.read(self._ENTRY.size))
+            idx.truncate(count * self._ENTRY.size)
+        with open(self.log_path, "r+b") as log:
+            log.truncate(end)
+
+    def get(self, position: int) -> Optional[dict]:
+        """Fetch the record at a 1-based position by seeking to its offset."""
+        if position < 1 or position > self.count():
+            return None
+        with open(self.idx_path, "rb") as idx:
+            idx.seek((position - 1) * self._ENTRY.size)
+            offset, length = self._ENTRY.unpack(idx.read(self._ENTRY.size))
+        with open(self.log_path, "rb") as log:
+            log.seek(offset)
+            return json.loads(log.read(length))
+
+    def __iter__(self):
+        """Stream records in append order without loading the whole log."""
+        if not self.exists():
+            return
+        with open(self.idx_path, "rb") as idx, open(self.log_path, "rb") as log:
+            while True:
+                entry = idx.read(self._ENTRY.size)
+                if len(entry) < self._ENTRY.size:
+                    break
+                offset, length = self._ENTRY.unpack(entry)
+                log.seek(offset)
+                yield json.loads(log.read(length))
+
+    @classmethod
+    def write_all(cls, base_path: str, records) -> "SegmentLog":
+        """Build a segment from scratch, swapping it in only once complete."""
+        tmp = cls(f"{base_path}.tmp")
+        for path in (tmp.log_path, tmp.idx_path):
+            if os.path.exists(path):
+                os.remove(path)
+        for record in records:
+            tmp.append(record)
+        final = cls(base_path)
+        if not tmp.exists():
+            return final
+        os.replace(tmp.log_path, final.log_path)
+        os.replace(tmp.idx_path, final.idx_path)
+        return final
+
+
 class LocalMemoryStore(BaseMemoryStore):
     """
     Local JSON-based memory store for development.
     Mirrors memU's tiered structure using the filesystem.
     """
 
-    def __init__(self, data_dir: str = DATA_DIR):
+    def __init__(self, data_dir: str = DATA_DIR, session_storage: str = None):
         self.data_dir = data_dir
+        self.session_storage = session_storage or SESSION_STORAGE
+        if self.session_storage not in ("files", "segments"):
+            raise ValueError(
+                f"Unknown session storage {self.session_storage!r} "
+                "(expected 'files' or 'segments')"
+            )
+        # Serializes writers within this process (AsyncMemoryStore runs calls
+        # on a thread pool); the summary index is shared by all callers.
+        self._write_lock = threading.RLock()
         os.makedirs(data_dir, exist_ok=True)
 
     def _caller_dir(self, caller_id: str) -> str:
@@ -67,6 +405,141 @@ class LocalMemoryStore(BaseMemoryStore):
         os.makedirs(path, exist_ok=True)
         return path
 
+    # --- Session records -----------------------------------------------
+    #
+    # A caller's sessions live either in sessions/session_NNN.json files or in
+    # an append-only sessions.log segment. Reads follow whatever is on disk;
+    # self.session_storage only decides the layout of new callers.
+    #
+    # Transcripts are kept apart from the session metadata — in
+    # transcripts/session_NNN.json or a transcripts.log segment whose record
+    # N belongs to session N — so the default memory view never parses them.
+    # Records written before the split still carry an inline "conversation".
+
+    def _session_log(self, caller_dir: str) -> SegmentLog:
+        return SegmentLog(os.path.join(caller_dir, "sessions"))
+
+    def _transcript_log(self, caller_dir: str) -> SegmentLog:
+        return SegmentLog(os.path.join(caller_dir, "transcripts"))
+
+    def _iter_sessions(self, caller_dir: str):
+        log = self._session_log(caller_dir)
+        if log.exists():
+            yield from log
+            return
+        sessions_dir = os.path.join(caller_dir, "sessions")
+        if not os.path.isdir(sessions_dir):
+            return
+        for sf in sorted(os.listdir(sessions_dir)):
+            if sf.endswith(".json"):
+                with open(os.path.join(sessions_dir, sf)) as f:
+                    yield json.load(f)
+
+    def _session_count(self, caller_dir: str) -> int:
+        log = self._session_log(caller_dir)
+        if log.exists():
+            return log.count()
+        sessions_dir = os.path.join(caller_dir, "sessions")
+        if not os.path.isdir(sessions_dir):
+            return 0
+        return len([f for f in os.listdir(sessions_dir) if f.endswith(".json")])
+
+    def _append_session(self, caller_dir: str, session_data: dict):
+        metadata = {k: v for k, v in session_data.items() if k != "conversation"}
+        conversation = session_data.get("conversation", [])
+        number = session_data["session_number"]
+
+        log = self._session_log(caller_dir)
+        sessions_dir = os.path.join(caller_dir, "sessions")
+        if self.session_storage == "segments" or log.exists():
+            if os.path.isdir(sessions_dir):
+                self._migrate_caller_to_segments(caller_dir)
+            transcripts = self._transcript_log(caller_dir)
+            # Keep record N == session N: drop a transcript whose metadata
+            # never got written (a torn earlier store_session), and pad for
+            # callers whose older sessions still hold their transcript inline.
+            transcripts.truncate(number - 1)
+            for _ in range(transcripts.count(), number - 1):
+                transcripts.append(None)
+            transcripts.append(conversation)
+            log.append(metadata)
+            return
+
+        self._write_session_files(caller_dir, metadata, conversation)
+
+    def _write_session_files(self, caller_dir: str, metadata: dict, conversation: list):
+        sessions_dir = os.path.join(caller_dir, "sessions")
+        transcripts_dir = os.path.join(caller_dir, "transcripts")
+        os.makedirs(sessions_dir, exist_ok=True)
+        os.makedirs(transcripts_dir, exist_ok=True)
+        filename = f"session_{metadata['session_number']:03d}.json"
+        with open(os.path.join(transcripts_dir, filename), "w") as f:
+            json.dump(conversation, f, ensure_ascii=False)
+        with open(os.path.join(sessions_dir, filename), "w") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    def _migrate_caller_to_segments(self, caller_dir: str) -> bool:
+        import shutil
+
+        sessions_dir = os.path.join(caller_dir, "sessions")
+        if not os.path.isdir(sessions_dir):
+            return False
+        log = self._session_log(caller_dir)
+        if not log.exists():
+            # The segment doesn't exist yet, so this reads the files layout.
+            sessions = list(self._iter_sessions(caller_dir))
+            transcripts = [
+                self._files_transcript(caller_dir, s["session_number"])
+                for s in sessions
+            ]
+            SegmentLog.write_all(
+                os.path.join(caller_dir, "transcripts"), iter(transcripts)
+            )
+            SegmentLog.write_all(
+                os.path.join(caller_dir, "sessions"),
+                (
+                    {k: v for k, v in s.items() if k != "conversation"}
+                    for s in sessions
+                ),
+            )
+        shutil.rmtree(sessions_dir)
+        shutil.rmtree(os.path.join(caller_dir, "transcripts"), ignore_errors=True)
+        return True
+
+    def migrate_to_segments(self) -> int:
+        """Convert every caller's sessions/ directory into a segment log."""
+        migrated = 0
+        for cid in self.list_callers():
+            if self._migrate_caller_to_segments(os.path.join(self.data_dir, cid)):
+                migrated += 1
+        return migrated
+
+    def split_transcripts(self) -> int:
+        """Move inline conversations out of files-layout session records."""
+        split = 0
+        for cid in self.list_callers():
+            caller_dir = os.path.join(self.data_dir, cid)
+            if self._session_log(caller_dir).exists():
+                continue
+            for session in list(self._iter_sessions(caller_dir)):
+                if "conversation" in session:
+                    conversation = session.pop("conversation")
+                    self._write_session_files(caller_dir, session, conversation)
+                    split += 1
+        return split
+
+    def _files_transcript(self, caller_dir: str, session_number: int) -> Optional[list]:
+        filename = f"session_{session_number:03d}.json"
+        path = os.path.join(caller_dir, "transcripts", filename)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        path = os.path.join(caller_dir, "sessions", filename)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f).get("conversation")
+        return None
+
     def get_caller_memory(self, caller_id: str) -> Optional[dict]:
         caller_dir = os.path.join(self.data_dir, caller_id)
         if not os.path.exists(caller_dir):
@@ -75,37 +548,69 @@ class LocalMemoryStore(BaseMemoryStore):
         memory = {}
         for item in os.listdir(caller_dir):
             filepath = os.path.join(caller_dir, item)
+            if item.startswith("_"):
+                # Internal bookkeeping (e.g. _timeline_state.json), not memory.
+                continue
             if item.endswith(".json") and os.path.isfile(filepath):
                 key = item.replace(".json", "")
                 with open(filepath) as f:
                     memory[key] = json.load(f)
-            elif os.path.isdir(filepath) and item == "sessions":
-                sessions = []
-                for sf in sorted(os.listdir(filepath)):
-                    if sf.endswith(".json"):
-                        with open(os.path.join(filepath, sf)) as f:
-                            sessions.append(json.load(f))
-                memory["sessions"] = sessions
+
+        sessions = [
+            {k: v for k, v in s.items() if k != "conversation"}
+            for s in self._iter_sessions(caller_dir)
+        ]
+        if sessions or os.path.isdir(os.path.join(caller_dir, "sessions")):
+            memory["sessions"] = sessions
 
         return memory if memory else None
 
+    def get_transcript(self, caller_id: str, session_number: int) -> Optional[list]:
+        caller_dir = os.path.join(self.data_dir, caller_id)
+        log = self._session_log(caller_dir)
+        if not log.exists():
+            return self._files_transcript(caller_dir, session_number)
+        record = log.get(session_number)
+        if record is None:
+            return None
+        if "conversation" in record:
+            return record["conversation"]
+        return self._transcript_log(caller_dir).get(session_number)
+
+    def get_session(self, caller_id: str, session_number: int) -> Optional[dict]:
+        caller_dir = os.path.join(self.data_dir, caller_id)
+        log = self._session_log(caller_dir)
+        if not log.exists():
+            return super().get_session(caller_id, session_number)
+        record = log.get(session_number)
+        if record is not None and "conversation" not in record:
+            record["conversation"] = (
+                self._transcript_log(caller_dir).get(session_number) or []
+            )
+        return record
+
     def store_session(
         self,
         caller_id: str,
         volunteer_name: str,
         conversation: list,
         extracted_memories: dict,
+    ):
+        with self._write_lock:
+            self._store_session(
+                caller_id, volunteer_name, conversation, extracted_memories
+            )
+
+    def _store_session(
+        self,
+        caller_id: str,
+        volunteer_name: str,
+        conversation: list,
+        extracted_memories: dict,
     ):
         caller_dir = self._caller_dir(caller_id)
 
-        memory_keys = [
-            "triggers",
-            "effective_strategies",
-            "safety_plan",
-            "situation",
-            "warnings",
-        ]
-        for key in memory_keys:
+        for key in MEMORY_KEYS:
             if key not in extracted_memories:
                 continue
             filepath = os.path.join(caller_dir, f"{key}.json")
@@ -114,116 +619,108 @@ class LocalMemoryStore(BaseMemoryStore):
                 with open(filepath) as f:
                     existing = json.load(f)
 
-            new_data = extracted_memories[key]
-
-            if existing is None:
-                merged = new_data
-            elif isinstance(existing, list) and isinstance(new_data, list):
-                merged = list(set(existing + new_data))
-            elif isinstance(existing, dict) and isinstance(new_data, dict):
-                merged = {**existing, **new_data}
-            else:
-                merged = new_data
+            merged = _merge_memory(existing, extracted_memories[key])
 
             with open(filepath, "w") as f:
                 json.dump(merged, f, indent=2, ensure_ascii=False)
 
         # Store session record with extracted data for timeline diffs
-        sessions_dir = os.path.join(caller_dir, "sessions")
-        os.makedirs(sessions_dir, exist_ok=True)
-
-        session_count = len(
-            [f for f in os.listdir(sessions_dir) if f.endswith(".json")]
+        session_count = self._session_count(caller_dir)
+        session_data = _session_record(
+            session_count + 1, volunteer_name, conversation, extracted_memories
         )
-        session_data = {
-            "session_number": session_count + 1,
-            "volunteer": volunteer_name,
-            "date": datetime.now().isoformat(),
-            "summary": extracted_memories.get("session_summary", ""),
-            "risk_level": extracted_memories.get("risk_level", "unknown"),
-            "message_count": len(conversation),
-            "conversation": conversation,
-            "extracted": {
-                "triggers": extracted_memories.get("triggers", []),
-                "effective_strategies": extracted_memories.get(
-                    "effective_strategies", []
-                ),
-                "safety_plan": extracted_memories.get("safety_plan", []),
-                "warnings": extracted_memories.get("warnings", []),
-                "situation": extracted_memories.get("situation", {}),
-            },
-        }
 
-        session_file = os.path.join(
-            sessions_dir, f"session_{session_count + 1:03d}.json"
-        )
-        with open(session_file, "w") as f:
-            json.dump(session_data, f, indent=2, ensure_ascii=False)
+        self._append_session(caller_dir, session_data)
 
-    def get_timeline(self, caller_id: str) -> Optional[dict]:
-        caller_dir = os.path.join(self.data_dir, caller_id)
-        sessions_dir = os.path.join(caller_dir, "sessions")
-        if not os.path.exists(sessions_dir):
-            return None
+        entry = self._append_timeline(caller_id, session_data)
+        self._update_summary_index(caller_id, entry)
 
-        sessions = []
-        for sf in sorted(os.listdir(sessions_dir)):
-            if sf.endswith(".json"):
-                with open(os.path.join(sessions_dir, sf)) as f:
-                    sessions.append(json.load(f))
+    # --- Timeline --------------------------------------------------------
+    #
+    # Each session's diff is computed once in store_session and appended to
+    # timeline.log; _timeline_state.json holds the running seen-sets and
+    # previous risk needed for the next diff. Data written before the
+    # timeline existed (or seeded by hand) is replayed once on first read.
 
-        if not sessions:
-            return None
+    def _timeline_log(self, caller_dir: str) -> SegmentLog:
+        return SegmentLog(os.path.join(caller_dir, "timeline"))
 
-        risk_order = {"low": 0, "moderate": 1, "high": 2, "unknown": -1}
-        timeline_sessions = []
-        prev_triggers = set()
-        prev_strategies = set()
-        prev_risk = None
-
-        for session in sessions:
-            extracted = session.get("extracted", {})
-            curr_triggers = set(extracted.get("triggers", []))
-            curr_strategies = set(extracted.get("effective_strategies", []))
-            curr_risk = session.get("risk_level", "unknown")
-
-            # New info = new triggers + situation key events
-            new_info = list(curr_triggers - prev_triggers)
-            situation = extracted.get("situation", {})
-            if isinstance(situation, dict):
-                new_info += situation.get("key_events", [])
-
-            # Risk escalation detection
-            escalations = []
-            if prev_risk:
-                prev_ord = risk_order.get(prev_risk, -1)
-                curr_ord = risk_order.get(curr_risk, -1)
-                if curr_ord > prev_ord and prev_ord >= 0:
-                    escalations.append(f"Risk {prev_risk} → {curr_risk}")
-
-            # Resolved = strategies that are new (things that now work)
-            new_strategies = list(curr_strategies - prev_strategies)
-
-            timeline_sessions.append({
-                "session_number": session.get("session_number"),
-                "volunteer": session.get("volunteer"),
-                "date": session.get("date"),
-                "summary": session.get("summary"),
-                "risk_level": curr_risk,
-                "new_info": new_info,
-                "escalations": escalations,
-                "new_strategies": new_strategies,
-                "warnings": extracted.get("warnings", []),
-            })
+    def _timeline_state_path(self, caller_dir: str) -> str:
+        return os.path.join(caller_dir, "_timeline_state.json")
 
-            prev_triggers = prev_triggers | curr_triggers
-            prev_strategies = prev_strategies | curr_strategies
-            prev_risk = curr_risk
+    def _write_timeline_state(self, caller_dir: str, state: dict):
+        path = self._timeline_state_path(caller_dir)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _append_timeline(self, caller_id: str, session_data: dict) -> dict:
+        caller_dir = os.path.join(self.data_dir, caller_id)
+        log = self._timeline_log(caller_dir)
+        state = None
+        state_path = self._timeline_state_path(caller_dir)
+        if log.exists() and os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+        if state is None or state["session_count"] != log.count() or (
+            state["session_count"] + 1 != session_data["session_number"]
+        ):
+            # Missing or out-of-step derived data: replay the history once.
+            return self.rebuild_timeline(caller_id)[-1]
+
+        entry = _timeline_entry(session_data, state)
+        log.append(entry)
+        self._write_timeline_state(caller_dir, state)
+        return entry
+
+    def rebuild_timeline(self, caller_id: str) -> list:
+        """Recompute a caller's timeline from its session records."""
+        caller_dir = os.path.join(self.data_dir, caller_id)
+        if not os.path.isdir(caller_dir):
+            return []
+        with self._write_lock:
+            state = _new_timeline_state()
+            entries = [
+                _timeline_entry(session, state)
+                for session in self._iter_sessions(caller_dir)
+            ]
+            if entries:
+                SegmentLog.write_all(os.path.join(caller_dir, "timeline"), entries)
+                self._write_timeline_state(caller_dir, state)
+        return entries
+
+    def get_timeline(self, caller_id: str) -> Optional[dict]:
+        caller_dir = os.path.join(self.data_dir, caller_id)
+        log = self._timeline_log(caller_dir)
+        if log.exists():
+            entries = list(log)
+        else:
+            entries = self.rebuild_timeline(caller_id)
+        if not entries:
+            return None
 
         return {
             "caller_id": caller_id,
-            "total_sessions": len(sessions),
-            "sessions": timeline_sessions,
+            "total_sessions": len(entries),
+            "sessions": entries,
+        }
+
+    def get_session_diff(self, caller_id: str) -> Optional[dict]:
+        caller_dir = os.path.join(self.data_dir, caller_id)
+        log = self._timeline_log(caller_dir)
+        if not log.exists():
+            return super().get_session_diff(caller_id)
+        count = log.count()
+        latest = log.get(count)
+        if latest is None:
+            return None
+        return {
+            "new_info": latest.get("new_info", []),
+            "escalations": latest.get("escalations", []),
+            "new_strategies": latest.get("new_strategies", []),
+            "risk_level": latest.get("risk_level", "unknown"),
+            "session_count": count,
         }
 
     def list_callers(self) -> list:
@@ -238,9 +735,441 @@ class LocalMemoryStore(BaseMemoryStore):
     def clear_caller(self, caller_id: str):
         import shutil
 
-        caller_dir = os.path.join(self.data_dir, caller_id)
-        if os.path.exists(caller_dir):
-            shutil.rmtree(caller_dir)
+        with self._write_lock:
+            caller_dir = os.path.join(self.data_dir, caller_id)
+            if os.path.exists(caller_dir):
+                shutil.rmtree(caller_dir)
+
+            index = self._load_summary_index()
+            if index is not None and index.pop(caller_id, None) is not None:
+                self._write_summary_index(index)
+
+    # --- Precomputed handoff -------------------------------------------
+    #
+    # _handoff.json: {"version": N, "languages": {lang: {"briefing", ...}}}
+
+    def _handoff_path(self, caller_id: str) -> str:
+        return os.path.join(self.data_dir, caller_id, "_handoff.json")
+
+    def _load_handoff(self, caller_id: str) -> Optional[dict]:
+        try:
+            with open(self._handoff_path(caller_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get_handoff(self, caller_id: str, version: int, language: str) -> Optional[dict]:
+        stored = self._load_handoff(caller_id)
+        if not stored or stored.get("version") != version:
+            return None
+        return stored.get("languages", {}).get(language)
+
+    def put_handoff(self, caller_id: str, version: int, language: str, handoff: dict):
+        with self._write_lock:
+            if not os.path.isdir(os.path.join(self.data_dir, caller_id)):
+                return
+            stored = self._load_handoff(caller_id)
+            if stored and stored.get("version", 0) > version:
+                return
+            if not stored or stored.get("version") != version:
+                stored = {"version": version, "languages": {}}
+            stored["languages"][language] = handoff
+            path = self._handoff_path(caller_id)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(stored, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    # --- Summary index -------------------------------------------------
+
+    def _summary_index_path(self) -> str:
+        return os.path.join(self.data_dir, SUMMARY_INDEX_FILE)
+
+    def _load_summary_index(self) -> Optional[dict]:
+        path = self._summary_index_path()
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_summary_index(self, index: dict):
+        # Write-then-rename so a reader never sees a half-written index.
+        path = self._summary_index_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _update_summary_index(self, caller_id: str, entry: dict):
+        index = self._load_summary_index()
+        if index is None:
+            # No index yet (fresh or pre-index data dir) — build it from disk,
+            # which already includes the session just written.
+            self.rebuild_summary_index()
+            return
+
+        prev = index.get(caller_id)
+        index[caller_id] = {
+            "total_sessions": entry["session_number"],
+            "risk_level": entry["risk_level"],
+            "last_volunteer": entry["volunteer"],
+            "last_date": entry["date"],
+            "last_summary": entry["summary"],
+            "escalations": bool(prev and prev.get("escalations"))
+            or bool(entry["escalations"]),
+        }
+        self._write_summary_index(index)
+
+    def rebuild_summary_index(self) -> int:
+        """Recompute the summary index from every caller's sessions on disk."""
+        with self._write_lock:
+            index = {}
+            for cid in self.list_callers():
+                timeline = self.get_timeline(cid)
+                if not timeline or not timeline.get("sessions"):
+                    continue
+                summary = _summary_from_timeline(cid, timeline)
+                del summary["caller_id"]
+                index[cid] = summary
+            self._write_summary_index(index)
+            return len(index)
+
+    def get_callers_summary(self) -> list:
+        index = self._load_summary_index()
+        if index is None:
+            self.rebuild_summary_index()
+            index = self._load_summary_index()
+        return [{"caller_id": cid, **entry} for cid, entry in index.items()]
+
+
+class MemoryCache:
+    """
+    Size-bounded LRU for per-caller reads, invalidated by version.
+
+    Entries are keyed by (kind, caller_id, version). Bumping a caller's
+    version makes every older entry unreachable — they simply age out of the
+    LRU — so a read that races a write can never repopulate stale data under
+    the new version.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = MEMORY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self, caller_id: str) -> int:
+        with self._lock:
+            return self._versions.get(caller_id, 0)
+
+    def bump(self, caller_id: str):
+        with self._lock:
+            self._versions[caller_id] = self._versions.get(caller_id, 0) + 1
+
+    def get(self, kind: str, caller_id: str, version: int):
+        """Return the cached value, or MemoryCache._MISSING."""
+        key = (kind, caller_id, version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return self._MISSING
+
+    def put(self, kind: str, caller_id: str, version: int, value):
+        if self.max_entries <= 0:
+            return
+        key = (kind, caller_id, version)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class RetrievalCache:
+    """
+    Per-caller TTL cache for memU retrieval results, with stale-while-revalidate.
+
+    An entry is "fresh" for `ttl` seconds and "stale" for `stale` seconds
+    after that: still served, but the reader should refresh it in the
+    background (begin_refresh() makes sure only one refresh runs per caller).
+    invalidate() bumps the caller's generation, so a fetch that started
+    before the invalidation cannot store its older result.
+    """
+
+    FRESH = "fresh"
+    STALE = "stale"
+
+    def __init__(
+        self,
+        ttl: float = MEMU_CACHE_TTL,
+        stale: float = MEMU_CACHE_STALE,
+        max_entries: int = MEMU_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # caller_id -> (stored_at, value)
+        self._generations: dict = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+
+    def generation(self, caller_id: str) -> int:
+        with self._lock:
+            return self._generations.get(caller_id, 0)
+
+    def lookup(self, caller_id: str) -> tuple:
+        """Return (value, FRESH | STALE), or (None, None) on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(caller_id)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(caller_id)
+                    self.hits += 1
+                    return entry[1], self.FRESH
+                if age < self.ttl + self.stale:
+                    self._entries.move_to_end(caller_id)
+                    self.stale_hits += 1
+                    return entry[1], self.STALE
+                del self._entries[caller_id]
+            self.misses += 1
+            return None, None
+
+    def put(self, caller_id: str, generation: int, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if self._generations.get(caller_id, 0) != generation:
+                return
+            self._entries[caller_id] = (time.monotonic(), value)
+            self._entries.move_to_end(caller_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, caller_id: str):
+        with self._lock:
+            self._generations[caller_id] = self._generations.get(caller_id, 0) + 1
+            self._entries.pop(caller_id, None)
+            self.invalidations += 1
+
+    def begin_refresh(self, caller_id: str) -> bool:
+        with self._lock:
+            if caller_id in self._refreshing:
+                return False
+            self._refreshing.add(caller_id)
+            self.refreshes += 1
+            return True
+
+    def end_refresh(self, caller_id: str):
+        with self._lock:
+            self._refreshing.discard(caller_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            served = self.hits + self.stale_hits
+            return {
+                "size": len(self._entries),
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "invalidations": self.invalidations,
+                "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+            }
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker around calls to an external service.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    allow() refuses calls. Once `reset_timeout` has passed it goes half-open
+    and lets a single probe through: success closes it, failure re-opens it.
+    A probe that never reports back is replaced after another reset_timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = MEMU_BREAKER_FAILURES,
+        reset_timeout: float = MEMU_BREAKER_RESET,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_started = None
+            if self.state == self.HALF_OPEN and (
+                self._probe_started is None
+                or now - self._probe_started >= self.reset_timeout
+            ):
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will let a call through (0 if it will now)."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+            if self.state == self.HALF_OPEN and self._probe_started is not None:
+                return max(0.0, self._probe_started + self.reset_timeout - time.monotonic())
+            return 0.0
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+                self.trips += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+class CachedMemoryStore(BaseMemoryStore):
+    """
+    Wraps any BaseMemoryStore with a versioned LRU over get_caller_memory()
+    and get_timeline(). store_session() and clear_caller() bump the caller's
+    version. Versions are per process, so each worker keeps its own cache.
+
+    Returned dicts are shallow copies: callers may add top-level keys (as
+    HybridMemoryStore does) but must treat nested values as read-only.
+    """
+
+    def __init__(self, inner: BaseMemoryStore, max_entries: int = MEMORY_CACHE_SIZE):
+        self._inner = inner
+        self._cache = MemoryCache(max_entries)
+
+    def _cached(self, kind: str, caller_id: str, load):
+        version = self._cache.version(caller_id)
+        value = self._cache.get(kind, caller_id, version)
+        if value is MemoryCache._MISSING:
+            value = load(caller_id)
+            self._cache.put(kind, caller_id, version, value)
+        return copy.copy(value)
+
+    def get_caller_memory(self, caller_id: str) -> Optional[dict]:
+        return self._cached("memory", caller_id, self._inner.get_caller_memory)
+
+    def get_timeline(self, caller_id: str) -> Optional[dict]:
+        return self._cached("timeline", caller_id, self._inner.get_timeline)
+
+    def get_session_diff(self, caller_id: str) -> Optional[dict]:
+        return self._cached("diff", caller_id, self._inner.get_session_diff)
+
+    def store_session(
+        self,
+        caller_id: str,
+        volunteer_name: str,
+        conversation: list,
+        extracted_memories: dict,
+    ):
+        try:
+            self._inner.store_session(
+                caller_id, volunteer_name, conversation, extracted_memories
+            )
+        finally:
+            self._cache.bump(caller_id)
+
+    def clear_caller(self, caller_id: str):
+        try:
+            self._inner.clear_caller(caller_id)
+        finally:
+            self._cache.bump(caller_id)
+
+    def list_callers(self) -> list:
+        return self._inner.list_callers()
+
+    def get_session(self, caller_id: str, session_number: int) -> Optional[dict]:
+        return self._inner.get_session(caller_id, session_number)
+
+    def get_transcript(self, caller_id: str, session_number: int) -> Optional[list]:
+        return self._inner.get_transcript(caller_id, session_number)
+
+    def get_callers_summary(self) -> list:
+        return self._inner.get_callers_summary()
+
+    def get_handoff(self, caller_id: str, version: int, language: str) -> Optional[dict]:
+        return self._inner.get_handoff(caller_id, version, language)
+
+    def put_handoff(self, caller_id: str, version: int, language: str, handoff: dict):
+        self._inner.put_handoff(caller_id, version, language, handoff)
+
+    def metrics(self) -> dict:
+        return {**self._inner.metrics(), "memory_cache": self._cache.stats()}
+
+
+def _write_json_tempfile(data) -> str:
+    import tempfile
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+        json.dump(data, f)
+        return f.name
 
 
 class MemUMemoryStore(BaseMemoryStore):
@@ -249,15 +1178,20 @@ class MemUMemoryStore(BaseMemoryStore):
     pip install memu-py (requires Python 3.13+)
 
     Set MEMU_API_KEY for cloud, or MEMU_LLM_API_KEY for self-hosted.
+
+    The SDK service is async, so the app awaits aget_caller_memory() and
+    astore_session() on its own event loop. The sync methods run them with
+    asyncio.run() for scripts and must not be called from a running loop.
     """
 
-    def __init__(self):
+    def __init__(self, local: BaseMemoryStore = None, service=None):
         self._client = None
-        self._service = None
+        self._service = service
         # Also keep local store for timeline tracking (memU handles memory,
         # we track session metadata locally)
-        self._local = LocalMemoryStore()
-        self._init_backend()
+        self._local = local or LocalMemoryStore()
+        if service is None:
+            self._init_backend()
 
     def _init_backend(self):
         api_key = os.getenv("MEMU_API_KEY")
@@ -297,29 +1231,69 @@ class MemUMemoryStore(BaseMemoryStore):
             })
         return formatted
 
-    def get_caller_memory(self, caller_id: str) -> Optional[dict]:
-        # Try memU retrieval first
+    @functools.cached_property
+    def _memorize_inline(self) -> bool:
+        """Whether the service's memorize() takes the conversation directly."""
         try:
-            query = (
-                f"Get all known information about caller {caller_id}: "
-                "triggers, effective strategies, safety plan, warnings, situation."
+            params = inspect.signature(self._service.memorize).parameters
+        except (TypeError, ValueError):
+            return False
+        return "conversation" in params
+
+    async def _aretrieve(self, caller_id: str):
+        query = (
+            f"Get all known information about caller {caller_id}: "
+            "triggers, effective strategies, safety plan, warnings, situation."
+        )
+        if self._client:
+            # The cloud SDK client is blocking
+            return await asyncio.to_thread(
+                self._client.retrieve, query=query, user_id=caller_id
             )
-            if self._client:
-                result = self._client.retrieve(query=query, user_id=caller_id)
-            else:
-                import asyncio
+        return await self._service.retrieve(
+            queries=[{"role": "user", "content": {"text": query}}],
+            where={"user_id": caller_id},
+            method="llm",
+        )
 
-                result = asyncio.get_event_loop().run_until_complete(
-                    self._service.retrieve(
-                        queries=[{"role": "user", "content": {"text": query}}],
-                        where={"user_id": caller_id},
-                        method="llm",
-                    )
+    async def _amemorize(
+        self, caller_id: str, volunteer_name: str, conversation: list
+    ):
+        formatted = self._format_conversation(conversation)
+        if self._client:
+            await asyncio.to_thread(
+                self._client.memorize_conversation,
+                conversation=formatted,
+                user_name=caller_id,
+                agent_name=volunteer_name,
+                user_id=caller_id,
+                agent_id=f"volunteer_{volunteer_name}",
+            )
+        elif self._memorize_inline:
+            await self._service.memorize(
+                conversation=formatted,
+                modality="conversation",
+                user={"user_id": caller_id},
+            )
+        else:
+            # SDK versions that only read conversations from a resource file
+            temp_path = await asyncio.to_thread(_write_json_tempfile, formatted)
+            try:
+                await self._service.memorize(
+                    resource_url=temp_path,
+                    modality="conversation",
+                    user={"user_id": caller_id},
                 )
+            finally:
+                os.unlink(temp_path)
 
+    async def aget_caller_memory(self, caller_id: str) -> Optional[dict]:
+        # Try memU retrieval first
+        try:
+            result = await self._aretrieve(caller_id)
             if result:
                 # Merge memU result with local session metadata
-                local = self._local.get_caller_memory(caller_id)
+                local = await asyncio.to_thread(self._local.get_caller_memory, caller_id)
                 return {
                     "memu_context": result,
                     "sessions": local.get("sessions", []) if local else [],
@@ -328,9 +1302,9 @@ class MemUMemoryStore(BaseMemoryStore):
             pass
 
         # Fall back to local store
-        return self._local.get_caller_memory(caller_id)
+        return await asyncio.to_thread(self._local.get_caller_memory, caller_id)
 
-    def store_session(
+    async def astore_session(
         self,
         caller_id: str,
         volunteer_name: str,
@@ -338,51 +1312,63 @@ class MemUMemoryStore(BaseMemoryStore):
         extracted_memories: dict,
     ):
         # Store in memU
-        formatted = self._format_conversation(conversation)
         try:
-            if self._client:
-                self._client.memorize_conversation(
-                    conversation=formatted,
-                    user_name=caller_id,
-                    agent_name=volunteer_name,
-                    user_id=caller_id,
-                    agent_id=f"volunteer_{volunteer_name}",
-                )
-            else:
-                import asyncio
-                import tempfile
-
-                with tempfile.NamedTemporaryFile(
-                    mode="w", suffix=".json", delete=False
-                ) as f:
-                    json.dump(formatted, f)
-                    temp_path = f.name
-
-                asyncio.get_event_loop().run_until_complete(
-                    self._service.memorize(
-                        resource_url=temp_path,
-                        modality="conversation",
-                        user={"user_id": caller_id},
-                    )
-                )
-                os.unlink(temp_path)
+            await self._amemorize(caller_id, volunteer_name, conversation)
         except Exception:
             pass
 
         # Always store locally too (for timeline tracking)
-        self._local.store_session(
-            caller_id, volunteer_name, conversation, extracted_memories
+        await asyncio.to_thread(
+            self._local.store_session,
+            caller_id,
+            volunteer_name,
+            conversation,
+            extracted_memories,
+        )
+
+    def get_caller_memory(self, caller_id: str) -> Optional[dict]:
+        return asyncio.run(self.aget_caller_memory(caller_id))
+
+    def store_session(
+        self,
+        caller_id: str,
+        volunteer_name: str,
+        conversation: list,
+        extracted_memories: dict,
+    ):
+        asyncio.run(
+            self.astore_session(
+                caller_id, volunteer_name, conversation, extracted_memories
+            )
         )
 
     def get_timeline(self, caller_id: str) -> Optional[dict]:
         return self._local.get_timeline(caller_id)
 
+    def get_session_diff(self, caller_id: str) -> Optional[dict]:
+        return self._local.get_session_diff(caller_id)
+
     def list_callers(self) -> list:
         return self._local.list_callers()
 
     def clear_caller(self, caller_id: str):
         self._local.clear_caller(caller_id)
 
+    def get_session(self, caller_id: str, session_number: int) -> Optional[dict]:
+        return self._local.get_session(caller_id, session_number)
+
+    def get_transcript(self, caller_id: str, session_number: int) -> Optional[list]:
+        return self._local.get_transcript(caller_id, session_number)
+
+    def get_callers_summary(self) -> list:
+        return self._local.get_callers_summary()
+
+    def get_handoff(self, caller_id: str, version: int, language: str) -> Optional[dict]:
+        return self._local.get_handoff(caller_id, version, language)
+
+    def put_handoff(self, caller_id: str, version: int, language: str, handoff: dict):
+        self._local.put_handoff(caller_id, version, language, handoff)
+
 
 class HybridMemoryStore(BaseMemoryStore):
     """
@@ -391,17 +1377,42 @@ class HybridMemoryStore(BaseMemoryStore):
 
     - get_caller_memory() returns the same dict shape as LocalMemoryStore
       plus an optional 'memu_supplementary' key with memU's semantic context.
-    - store_session() writes to local first, then feeds raw conversation to memU.
+    - store_session() writes to local first, then queues the raw
+      conversation for memU (see memu_queue.py); a background worker started
+      by aopen() feeds it to memU with retries.
+    - memU retrievals are cached per caller (RetrievalCache): served fresh
+      for MEMU_CACHE_TTL, then stale while a background refresh runs, and
+      dropped when the caller stores a session or a memorize job lands.
+    - memU calls go through circuit breakers (retrieve / memorize), and an
+      async read waits at most MEMU_RETRIEVE_BUDGET for memU before
+      answering with local data alone.
     - All other methods delegate to LocalMemoryStore.
+
+    The app goes through the native coroutines (aget_caller_memory,
+    astore_session), which share one pooled httpx.AsyncClient opened and
+    closed with the app lifespan. The sync methods remain for scripts.
     """
 
-    def __init__(self):
-        self._local = LocalMemoryStore()
+    def __init__(self, local: BaseMemoryStore = None, queue=None):
+        self._local = local or LocalMemoryStore()
         self._mode = None  # "cloud" or "self_hosted" or None
         self._cloud_api_key = None
         self._cloud_base_url = None
         self._service = None
+        self._http = None  # httpx.AsyncClient, cloud mode only
+        self._worker = None  # asyncio.Task draining the memorize queue
+        self._wake = None
+        self._memu_cache = RetrievalCache()
+        self._refresh_tasks = set()
+        self._retrieve_breaker = CircuitBreaker("retrieve")
+        self._memorize_breaker = CircuitBreaker("memorize")
+        self._budget_overruns = 0
         self._init_memu()
+        self._queue = queue
+        if self._queue is None and self._memu_available:
+            from memu_queue import MemorizeQueue
+
+            self._queue = MemorizeQueue()
 
     def _init_memu(self):
         try:
@@ -455,48 +1466,225 @@ class HybridMemoryStore(BaseMemoryStore):
     def _memu_available(self) -> bool:
         return self._mode is not None
 
+    # --- memU HTTP client -----------------------------------------------
+
+    def _cloud_headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self._cloud_api_key}",
+            "Content-Type": "application/json",
+        }
+
+    async def aopen(self):
+        """Open the memU client and start the memorize worker (app lifespan)."""
+        await self._open_http()
+        if self._queue is not None and self._worker is None:
+            self._wake = asyncio.Event()
+            self._worker = asyncio.create_task(self._run_memu_queue())
+
+    async def aclose(self):
+        for task in [self._worker, *self._refresh_tasks]:
+            if task is not None:
+                task.cancel()
+        for task in [self._worker, *self._refresh_tasks]:
+            if task is not None:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._worker = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _open_http(self):
+        if self._mode != "cloud" or self._http is not None:
+            return
+        import httpx
+
+        self._http = httpx.AsyncClient(
+            base_url=self._cloud_base_url,
+            headers=self._cloud_headers(),
+            limits=httpx.Limits(
+                max_connections=MEMU_MAX_CONNECTIONS,
+                max_keepalive_connections=MEMU_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(MEMU_RETRIEVE_TIMEOUT),
+            http2=MEMU_HTTP2,
+        )
+
+    async def _cloud_post(self, path: str, payload: dict, timeout: float) -> dict:
+        if self._http is None:
+            await self._open_http()
+        resp = await self._http.post(path, json=payload, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    @staticmethod
+    def _memu_query(caller_id: str) -> str:
+        return (
+            f"Get all known information about caller {caller_id}: "
+            "triggers, effective strategies, safety plan, warnings, situation, "
+            "emotional patterns, and anything else relevant for a counselor."
+        )
+
+    @staticmethod
+    def _retrieve_payload(caller_id: str, query: str) -> dict:
+        return {
+            "user_id": caller_id,
+            "agent_id": "crisis-memory-bridge",
+            "query": query,
+        }
+
+    def _format_service_result(self, result) -> Optional[str]:
+        if isinstance(result, dict):
+            return self._format_memu_response(result)
+        return str(result) if result else None
+
     def _query_memu(self, caller_id: str) -> Optional[str]:
-        if not self._memu_available:
+        value, state = self._memu_cache.lookup(caller_id)
+        if state == RetrievalCache.STALE and self._memu_cache.begin_refresh(caller_id):
+            threading.Thread(
+                target=self._refresh_memu, args=(caller_id,), daemon=True
+            ).start()
+        if state is not None:
+            return value
+        return self._fetch_and_cache(caller_id)
+
+    def _fetch_and_cache(self, caller_id: str) -> Optional[str]:
+        generation = self._memu_cache.generation(caller_id)
+        value = self._fetch_memu(caller_id)
+        if value is not None:
+            self._memu_cache.put(caller_id, generation, value)
+        return value
+
+    def _refresh_memu(self, caller_id: str):
+        try:
+            self._fetch_and_cache(caller_id)
+        finally:
+            self._memu_cache.end_refresh(caller_id)
+
+    async def _aquery_memu(self, caller_id: str) -> Optional[str]:
+        value, state = self._memu_cache.lookup(caller_id)
+        if state == RetrievalCache.STALE and self._memu_cache.begin_refresh(caller_id):
+            task = asyncio.create_task(self._arefresh_memu(caller_id))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        if state is not None:
+            return value
+        return await self._afetch_and_cache(caller_id)
+
+    async def _afetch_and_cache(self, caller_id: str) -> Optional[str]:
+        generation = self._memu_cache.generation(caller_id)
+        value = await self._afetch_memu(caller_id)
+        if value is not None:
+            self._memu_cache.put(caller_id, generation, value)
+        return value
+
+    async def _arefresh_memu(self, caller_id: str):
+        try:
+            await self._afetch_and_cache(caller_id)
+        finally:
+            self._memu_cache.end_refresh(caller_id)
+
+    def _fetch_memu(self, caller_id: str) -> Optional[str]:
+        if not self._memu_available or not self._retrieve_breaker.allow():
             return None
+        start = time.monotonic()
         try:
-            query = (
-                f"Get all known information about caller {caller_id}: "
-                "triggers, effective strategies, safety plan, warnings, situation, "
-                "emotional patterns, and anything else relevant for a counselor."
-            )
+            query = self._memu_query(caller_id)
             if self._mode == "cloud":
                 import httpx
 
                 resp = httpx.post(
                     f"{self._cloud_base_url}/api/v3/memory/retrieve",
-                    headers={
-                        "Authorization": f"Bearer {self._cloud_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "user_id": caller_id,
-                        "agent_id": "crisis-memory-bridge",
-                        "query": query,
-                    },
-                    timeout=30.0,
+                    headers=self._cloud_headers(),
+                    json=self._retrieve_payload(caller_id, query),
+                    timeout=MEMU_RETRIEVE_TIMEOUT,
                 )
                 resp.raise_for_status()
                 data = resp.json()
                 # Build a readable summary from memU's structured response
-                return self._format_memu_response(data)
+                result = self._format_memu_response(data)
             else:
-                result = self._service.retrieve(
-                    queries=[
-                        {"role": "user", "content": {"text": query}}
-                    ],
-                    where={"user_id": caller_id},
+                result = self._format_service_result(
+                    self._service.retrieve(
+                        queries=[
+                            {"role": "user", "content": {"text": query}}
+                        ],
+                        where={"user_id": caller_id},
+                    )
+                )
+        except Exception as e:
+            self._retrieve_breaker.record_failure()
+            print(f"WARNING: memU retrieval failed ({e}), continuing without")
+            return None
+        self._record_retrieval(time.monotonic() - start)
+        return result
+
+    async def _afetch_memu(self, caller_id: str) -> Optional[str]:
+        if not self._memu_available or not self._retrieve_breaker.allow():
+            return None
+        start = time.monotonic()
+        try:
+            query = self._memu_query(caller_id)
+            if self._mode == "cloud":
+                data = await self._cloud_post(
+                    "/api/v3/memory/retrieve",
+                    self._retrieve_payload(caller_id, query),
+                    MEMU_RETRIEVE_TIMEOUT,
+                )
+                result = self._format_memu_response(data)
+            else:
+                result = self._format_service_result(
+                    await self._call_service(
+                        self._service.retrieve,
+                        queries=[{"role": "user", "content": {"text": query}}],
+                        where={"user_id": caller_id},
+                    )
                 )
-                if isinstance(result, dict):
-                    return self._format_memu_response(result)
-                return str(result) if result else None
         except Exception as e:
+            self._retrieve_breaker.record_failure()
             print(f"WARNING: memU retrieval failed ({e}), continuing without")
             return None
+        self._record_retrieval(time.monotonic() - start)
+        return result
+
+    def _record_retrieval(self, elapsed: float):
+        # A retrieval slower than the budget is useless to start_session, so
+        # it counts against the breaker even though it succeeded.
+        if elapsed > MEMU_RETRIEVE_BUDGET:
+            self._retrieve_breaker.record_failure()
+        else:
+            self._retrieve_breaker.record_success()
+
+    async def _aquery_memu_within_budget(self, caller_id: str) -> Optional[str]:
+        """Cached retrieval, given up after MEMU_RETRIEVE_BUDGET seconds.
+
+        An over-budget fetch keeps running in the background so its result
+        still lands in the cache for the next read.
+        """
+        task = asyncio.create_task(self._aquery_memu(caller_id))
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), MEMU_RETRIEVE_BUDGET)
+        except asyncio.TimeoutError:
+            self._budget_overruns += 1
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+            print(
+                f"WARNING: memU retrieval over {MEMU_RETRIEVE_BUDGET}s budget, "
+                "using local data"
+            )
+            return None
+
+    @staticmethod
+    async def _call_service(method, **kwargs):
+        """Await a memU SDK method whether it is a coroutine or blocking."""
+        if inspect.iscoroutinefunction(method):
+            return await method(**kwargs)
+        result = await asyncio.to_thread(method, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
 
     def _format_memu_response(self, data: dict) -> Optional[str]:
         """Format memU retrieval response into readable context for LLM prompts."""
@@ -523,67 +1711,177 @@ class HybridMemoryStore(BaseMemoryStore):
                 parts.append(f"Session note: {caption}")
         return "\n".join(parts) if parts else None
 
-    def _store_to_memu(
-        self, caller_id: str, volunteer_name: str, conversation: list
-    ):
-        if not self._memu_available:
-            return
-        try:
-            formatted = []
-            for msg in conversation:
-                formatted.append({
-                    "role": "user" if msg["role"] == "caller" else "assistant",
-                    "content": msg["content"],
-                })
-
-            if self._mode == "cloud":
-                import httpx
+    @staticmethod
+    def _memorize_payload(
+        caller_id: str, volunteer_name: str, conversation: list
+    ) -> dict:
+        formatted = []
+        for msg in conversation:
+            formatted.append({
+                "role": "user" if msg["role"] == "caller" else "assistant",
+                "content": msg["content"],
+            })
+        return {
+            "user_id": caller_id,
+            "agent_id": f"volunteer_{volunteer_name}",
+            "conversation": formatted,
+        }
 
-                resp = httpx.post(
-                    f"{self._cloud_base_url}/api/v3/memory/memorize",
-                    headers={
-                        "Authorization": f"Bearer {self._cloud_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "user_id": caller_id,
-                        "agent_id": f"volunteer_{volunteer_name}",
-                        "conversation": formatted,
-                    },
-                    timeout=60.0,
+    @staticmethod
+    def _write_service_resource(conversation: list) -> str:
+        memu_formatted = []
+        for msg in conversation:
+            memu_formatted.append({
+                "role": "user" if msg["role"] == "caller" else "assistant",
+                "content": {"text": msg["content"]},
+                "created_at": datetime.now().isoformat(),
+            })
+        return _write_json_tempfile(memu_formatted)
+
+    def _memorize(self, caller_id: str, volunteer_name: str, conversation: list):
+        """Send one conversation to memU; raises on failure."""
+        if self._mode == "cloud":
+            import httpx
+
+            resp = httpx.post(
+                f"{self._cloud_base_url}/api/v3/memory/memorize",
+                headers=self._cloud_headers(),
+                json=self._memorize_payload(caller_id, volunteer_name, conversation),
+                timeout=MEMU_MEMORIZE_TIMEOUT,
+            )
+            resp.raise_for_status()
+            result = resp.json()
+            task_id = result.get("task_id", "unknown")
+            print(f"memU: memorize task {task_id} ({result.get('status', '')})")
+        else:
+            temp_path = self._write_service_resource(conversation)
+            try:
+                self._service.memorize(
+                    resource_url=temp_path,
+                    modality="conversation",
+                    user={"user_id": caller_id},
                 )
-                resp.raise_for_status()
-                result = resp.json()
-                task_id = result.get("task_id", "unknown")
-                print(f"memU: memorize task {task_id} ({result.get('status', '')})")
-            else:
-                import tempfile
-
-                memu_formatted = []
-                for msg in conversation:
-                    memu_formatted.append({
-                        "role": "user" if msg["role"] == "caller" else "assistant",
-                        "content": {"text": msg["content"]},
-                        "created_at": datetime.now().isoformat(),
-                    })
-
-                with tempfile.NamedTemporaryFile(
-                    mode="w", suffix=".json", delete=False
-                ) as f:
-                    json.dump(memu_formatted, f)
-                    temp_path = f.name
+            finally:
+                os.unlink(temp_path)
 
-                self._service.memorize(
+    async def _amemorize(
+        self, caller_id: str, volunteer_name: str, conversation: list
+    ):
+        if self._mode == "cloud":
+            result = await self._cloud_post(
+                "/api/v3/memory/memorize",
+                self._memorize_payload(caller_id, volunteer_name, conversation),
+                MEMU_MEMORIZE_TIMEOUT,
+            )
+            task_id = result.get("task_id", "unknown")
+            print(f"memU: memorize task {task_id} ({result.get('status', '')})")
+        else:
+            temp_path = await asyncio.to_thread(
+                self._write_service_resource, conversation
+            )
+            try:
+                await self._call_service(
+                    self._service.memorize,
                     resource_url=temp_path,
                     modality="conversation",
                     user={"user_id": caller_id},
                 )
+            finally:
                 os.unlink(temp_path)
+
+    # --- memorize queue --------------------------------------------------
+
+    def _enqueue_memu(self, caller_id: str, volunteer_name: str, conversation: list):
+        if self._queue is None:
+            return
+        try:
+            self._queue.enqueue(caller_id, volunteer_name, conversation)
         except Exception as e:
             print(
-                f"WARNING: memU store failed ({e}), structured data saved locally"
+                f"WARNING: memU enqueue failed ({e}), structured data saved locally"
             )
 
+    def _job_failed(self, job: dict, error: Exception):
+        print(
+            f"WARNING: memU store failed for {job['caller_id']} "
+            f"(attempt {job['attempts'] + 1}: {error}), will retry"
+        )
+        self._memorize_breaker.record_failure()
+        self._queue.fail(job, repr(error))
+
+    def _job_done(self, job: dict):
+        self._memorize_breaker.record_success()
+        self._queue.complete(job)
+        self._memu_cache.invalidate(job["caller_id"])
+
+    async def process_memu_queue(self) -> int:
+        """Send one batch of due jobs to memU concurrently; returns batch size.
+
+        memU's memorize endpoint takes a single conversation, so a batch is
+        several requests in flight together over the pooled client.
+        """
+        jobs = await asyncio.to_thread(self._queue.due)
+        if not jobs:
+            return 0
+        if not self._memorize_breaker.allow():
+            await asyncio.to_thread(self._queue.release, jobs)
+            return 0
+        if self._memorize_breaker.state == CircuitBreaker.HALF_OPEN:
+            # probe with a single job; the rest go back unsent
+            await asyncio.to_thread(self._queue.release, jobs[1:])
+            jobs = jobs[:1]
+        results = await asyncio.gather(
+            *(
+                self._amemorize(job["caller_id"], job["volunteer"], job["conversation"])
+                for job in jobs
+            ),
+            return_exceptions=True,
+        )
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                await asyncio.to_thread(self._job_failed, job, result)
+            else:
+                await asyncio.to_thread(self._job_done, job)
+        return len(jobs)
+
+    async def _run_memu_queue(self):
+        while True:
+            self._wake.clear()
+            try:
+                if await self.process_memu_queue():
+                    continue
+                wait = self._memorize_breaker.retry_after() or await asyncio.to_thread(
+                    self._queue.seconds_until_due
+                )
+            except Exception as e:
+                print(f"WARNING: memU queue worker error ({e})")
+                wait = MEMU_MEMORIZE_TIMEOUT
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def flush_memu_queue(self) -> int:
+        """Synchronously send every due job (for scripts without the app)."""
+        if self._queue is None:
+            return 0
+        processed = 0
+        while jobs := self._queue.due():
+            for i, job in enumerate(jobs):
+                if not self._memorize_breaker.allow():
+                    self._queue.release(jobs[i:])
+                    return processed
+                try:
+                    self._memorize(job["caller_id"], job["volunteer"], job["conversation"])
+                except Exception as e:
+                    self._job_failed(job, e)
+                else:
+                    self._job_done(job)
+                processed += 1
+        return processed
+
+    # --- BaseMemoryStore -------------------------------------------------
+
     def get_caller_memory(self, caller_id: str) -> Optional[dict]:
         memory = self._local.get_caller_memory(caller_id)
         if memory is None:
@@ -605,27 +1903,277 @@ class HybridMemoryStore(BaseMemoryStore):
         self._local.store_session(
             caller_id, volunteer_name, conversation, extracted_memories
         )
-        self._store_to_memu(caller_id, volunteer_name, conversation)
+        self._memu_cache.invalidate(caller_id)
+        self._enqueue_memu(caller_id, volunteer_name, conversation)
+
+    async def aget_caller_memory(self, caller_id: str) -> Optional[dict]:
+        memory = await asyncio.to_thread(self._local.get_caller_memory, caller_id)
+        if memory is None:
+            return None
+
+        memu_result = await self._aquery_memu_within_budget(caller_id)
+        if memu_result:
+            memory["memu_supplementary"] = memu_result
+
+        return memory
+
+    async def astore_session(
+        self,
+        caller_id: str,
+        volunteer_name: str,
+        conversation: list,
+        extracted_memories: dict,
+    ):
+        await asyncio.to_thread(
+            self._local.store_session,
+            caller_id,
+            volunteer_name,
+            conversation,
+            extracted_memories,
+        )
+        self._memu_cache.invalidate(caller_id)
+        await asyncio.to_thread(
+            self._enqueue_memu, caller_id, volunteer_name, conversation
+        )
+        if self._wake is not None:
+            self._wake.set()
+
+    def prefetch(self, caller_id: str) -> bool:
+        if not self._local.prefetch(caller_id):
+            return False
+        if self._memu_cache.lookup(caller_id)[1] != RetrievalCache.FRESH:
+            self._fetch_and_cache(caller_id)
+        return True
+
+    async def aprefetch(self, caller_id: str) -> bool:
+        if not await asyncio.to_thread(self._local.prefetch, caller_id):
+            return False
+        if self._memu_cache.lookup(caller_id)[1] != RetrievalCache.FRESH:
+            await self._afetch_and_cache(caller_id)
+        return True
 
     def get_timeline(self, caller_id: str) -> Optional[dict]:
         return self._local.get_timeline(caller_id)
 
+    def get_session_diff(self, caller_id: str) -> Optional[dict]:
+        return self._local.get_session_diff(caller_id)
+
     def list_callers(self) -> list:
         return self._local.list_callers()
 
     def clear_caller(self, caller_id: str):
         self._local.clear_caller(caller_id)
+        self._memu_cache.invalidate(caller_id)
+
+    def get_session(self, caller_id: str, session_number: int) -> Optional[dict]:
+        return self._local.get_session(caller_id, session_number)
+
+    def get_transcript(self, caller_id: str, session_number: int) -> Optional[list]:
+        return self._local.get_transcript(caller_id, session_number)
+
+    def get_callers_summary(self) -> list:
+        return self._local.get_callers_summary()
+
+    def get_handoff(self, caller_id: str, version: int, language: str) -> Optional[dict]:
+        return self._local.get_handoff(caller_id, version, language)
+
+    def put_handoff(self, caller_id: str, version: int, language: str, handoff: dict):
+        self._local.put_handoff(caller_id, version, language, handoff)
+
+    def metrics(self) -> dict:
+        metrics = {
+            **self._local.metrics(),
+            "memu_cache": self._memu_cache.stats(),
+            "memu_breaker": {
+                "retrieve": self._retrieve_breaker.stats(),
+                "memorize": self._memorize_breaker.stats(),
+                "retrieve_budget_s": MEMU_RETRIEVE_BUDGET,
+                "budget_overruns": self._budget_overruns,
+            },
+        }
+        if self._queue is not None:
+            metrics = {**metrics, "memu_queue": self._queue.stats()}
+        return metrics
+
+
+class AsyncMemoryStore:
+    """
+    Awaitable front for a BaseMemoryStore — what the FastAPI handlers use.
+
+    Blocking store calls (file I/O, SQLite, memU HTTP) run on a bounded thread
+    pool so they never stall the event loop. When the wrapped store offers a
+    native coroutine for a method, named with an ``a`` prefix (e.g.
+    ``aget_caller_memory``), that is awaited directly instead.
+    """
+
+    def __init__(self, store: BaseMemoryStore, max_workers: int = MEMORY_STORE_THREADS):
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="memory-store"
+        )
+
+    async def _call(self, name: str, *args, **kwargs):
+        native = getattr(self.store, f"a{name}", None)
+        if native is not None:
+            return await native(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(getattr(self.store, name), *args, **kwargs)
+        )
+
+    async def get_caller_memory(self, caller_id: str) -> Optional[dict]:
+        return await self._call("get_caller_memory", caller_id)
+
+    async def store_session(
+        self,
+        caller_id: str,
+        volunteer_name: str,
+        conversation: list,
+        extracted_memories: dict,
+    ):
+        return await self._call(
+            "store_session", caller_id, volunteer_name, conversation, extracted_memories
+        )
+
+    async def get_timeline(self, caller_id: str) -> Optional[dict]:
+        return await self._call("get_timeline", caller_id)
+
+    async def get_session_diff(self, caller_id: str) -> Optional[dict]:
+        return await self._call("get_session_diff", caller_id)
+
+    async def get_session(self, caller_id: str, session_number: int) -> Optional[dict]:
+        return await self._call("get_session", caller_id, session_number)
+
+    async def get_transcript(self, caller_id: str, session_number: int) -> Optional[list]:
+        return await self._call("get_transcript", caller_id, session_number)
+
+    async def list_callers(self) -> list:
+        return await self._call("list_callers")
+
+    async def clear_caller(self, caller_id: str):
+        return await self._call("clear_caller", caller_id)
+
+    async def get_callers_summary(self) -> list:
+        return await self._call("get_callers_summary")
+
+    async def prefetch(self, caller_id: str) -> bool:
+        return await self._call("prefetch", caller_id)
+
+    async def get_handoff(self, caller_id: str, version: int, language: str) -> Optional[dict]:
+        return await self._call("get_handoff", caller_id, version, language)
+
+    async def put_handoff(self, caller_id: str, version: int, language: str, handoff: dict):
+        return await self._call("put_handoff", caller_id, version, language, handoff)
+
+    def metrics(self) -> dict:
+        return self.store.metrics()
+
+    async def aopen(self):
+        """Start store resources tied to the app lifespan, if any."""
+        opener = getattr(self.store, "aopen", None)
+        if opener is not None:
+            await opener()
+
+    async def aclose(self):
+        closer = getattr(self.store, "aclose", None)
+        if closer is not None:
+            await closer()
+        self._executor.shutdown(wait=False)
 
 
 def create_memory_store() -> BaseMemoryStore:
-    """Factory: returns hybrid store (local + memU) if configured, otherwise local JSON."""
+    """Factory: returns hybrid store (local + memU) if configured, otherwise local JSON.
+
+    MEMORY_BACKEND selects the structured store (local JSON or SQLite); it is
+    wrapped in CachedMemoryStore unless MEMORY_CACHE_SIZE is 0.
+    """
+    if MEMORY_BACKEND == "sqlite":
+        from sqlite_store import SqliteMemoryStore
+
+        local = SqliteMemoryStore()
+    else:
+        local = LocalMemoryStore()
+    if MEMORY_CACHE_SIZE > 0:
+        local = CachedMemoryStore(local)
     if os.getenv("MEMU_API_KEY") or os.getenv("MEMU_LLM_API_KEY"):
         try:
-            return HybridMemoryStore()
+            return HybridMemoryStore(local=local)
         except ImportError:
             print("memu-py not installed, falling back to local store")
-    return LocalMemoryStore()
+    return local
 
 
 # Default export — used by app.py
 MemoryStore = create_memory_store
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Memory store maintenance")
+    parser.add_argument(
+        "--data-dir", default=DATA_DIR, help="LocalMemoryStore data directory"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser(
+        "rebuild-index", help="Rebuild the per-caller summary index from disk"
+    )
+    sub.add_parser(
+        "rebuild-timelines",
+        help="Recompute every caller's stored timeline diffs from its sessions",
+    )
+    sub.add_parser(
+        "migrate-segments",
+        help="Convert sessions/ directories into append-only segment logs",
+    )
+    sub.add_parser(
+        "split-transcripts",
+        help="Move inline conversations out of session records (files layout)",
+    )
+    sqlite_parser = sub.add_parser(
+        "migrate-sqlite", help="Copy every caller into a SQLite database"
+    )
+    sqlite_parser.add_argument(
+        "--db", default=None, help="Target database (default: SQLITE_PATH)"
+    )
+    queue_parser = sub.add_parser(
+        "memu-queue", help="Show pending/dead memU memorize jobs"
+    )
+    queue_parser.add_argument(
+        "--retry-dead", action="store_true", help="Requeue jobs that gave up"
+    )
+    args = parser.parse_args(argv)
+
+    store = LocalMemoryStore(args.data_dir)
+    if args.command == "rebuild-index":
+        count = store.rebuild_summary_index()
+        print(f"Rebuilt summary index for {count} caller(s) in {args.data_dir}")
+    elif args.command == "rebuild-timelines":
+        callers = store.list_callers()
+        for cid in callers:
+            store.rebuild_timeline(cid)
+        store.rebuild_summary_index()
+        print(f"Rebuilt timelines for {len(callers)} caller(s) in {args.data_dir}")
+    elif args.command == "migrate-segments":
+        count = store.migrate_to_segments()
+        print(f"Migrated {count} caller(s) to segment logs in {args.data_dir}")
+    elif args.command == "split-transcripts":
+        count = store.split_transcripts()
+        print(f"Split {count} session transcript(s) in {args.data_dir}")
+    elif args.command == "migrate-sqlite":
+        from sqlite_store import SQLITE_PATH, SqliteMemoryStore, migrate_from_local
+
+        db_path = args.db or SQLITE_PATH
+        count = migrate_from_local(store, SqliteMemoryStore(db_path))
+        print(f"Migrated {count} caller(s) from {args.data_dir} to {db_path}")
+    elif args.command == "memu-queue":
+        from memu_queue import MemorizeQueue
+
+        queue = MemorizeQueue()
+        if args.retry_dead:
+            print(f"Requeued {queue.requeue_dead()} dead job(s)")
+        print(json.dumps(queue.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Durable queue for memU memorize calls.
+
+HybridMemoryStore.store_session() writes locally and enqueues the
+conversation here instead of waiting on memU. A background worker in the
+app drains the queue, retrying failures with exponential backoff; jobs that
+keep failing are parked as "dead" rather than dropped. The queue is a small
+SQLite file, so pending work survives restarts.
+
+due() claims the jobs it returns by pushing their retry time out by
+MEMU_QUEUE_LEASE seconds, so a `memu-queue` flush running next to the app
+worker (or a second app process) never sends the same job twice. A job
+whose worker dies mid-call becomes due again once its lease runs out.
+
+Inspect or requeue dead jobs with:
+
+    python memory_store.py memu-queue [--retry-dead]
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from memory_store import DATA_DIR, MEMU_MEMORIZE_TIMEOUT
+
+MEMU_QUEUE_PATH = os.getenv("MEMU_QUEUE_PATH", os.path.join(DATA_DIR, "memu_queue.db"))
+MEMU_QUEUE_BATCH = int(os.getenv("MEMU_QUEUE_BATCH", "8"))
+MEMU_QUEUE_MAX_ATTEMPTS = int(os.getenv("MEMU_QUEUE_MAX_ATTEMPTS", "8"))
+MEMU_QUEUE_BACKOFF = float(os.getenv("MEMU_QUEUE_BACKOFF", "2"))
+MEMU_QUEUE_MAX_BACKOFF = float(os.getenv("MEMU_QUEUE_MAX_BACKOFF", "600"))
+MEMU_QUEUE_LEASE = float(os.getenv("MEMU_QUEUE_LEASE", str(MEMU_MEMORIZE_TIMEOUT)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id              INTEGER PRIMARY KEY,
+    caller_id       TEXT NOT NULL,
+    volunteer       TEXT NOT NULL,
+    conversation    TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    created_at      REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    last_error      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs(status, next_attempt_at);
+"""
+
+_INSERT_JOB = (
+    "INSERT INTO jobs (caller_id, volunteer, conversation, created_at, "
+    "next_attempt_at) VALUES (?, ?, ?, ?, ?)"
+)
+_SELECT_DUE = (
+    "SELECT id, caller_id, volunteer, conversation, attempts, created_at "
+    "FROM jobs WHERE status = 'pending' AND next_attempt_at <= ? "
+    "ORDER BY next_attempt_at, id LIMIT ?"
+)
+_CLAIM_JOB = "UPDATE jobs SET next_attempt_at = ? WHERE id = ?"
+_DELETE_JOB = "DELETE FROM jobs WHERE id = ?"
+_RETRY_JOB = (
+    "UPDATE jobs SET attempts = ?, next_attempt_at = ?, last_error = ? "
+    "WHERE id = ?"
+)
+_BURY_JOB = (
+    "UPDATE jobs SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?"
+)
+_REQUEUE_DEAD = (
+    "UPDATE jobs SET status = 'pending', attempts = 0, next_attempt_at = ? "
+    "WHERE status = 'dead'"
+)
+_COUNTS = "SELECT status, COUNT(*), MIN(created_at) FROM jobs GROUP BY status"
+_NEXT_DUE = "SELECT MIN(next_attempt_at) FROM jobs WHERE status = 'pending'"
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait before retry number `attempts` (1-based)."""
+    return min(MEMU_QUEUE_MAX_BACKOFF, MEMU_QUEUE_BACKOFF * 2 ** (attempts - 1))
+
+
+class MemorizeQueue:
+    """SQLite-backed job queue; safe to share between threads."""
+
+    def __init__(self, path: str = None, max_attempts: int = None):
+        self.path = path or MEMU_QUEUE_PATH
+        self.max_attempts = max_attempts or MEMU_QUEUE_MAX_ATTEMPTS
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.completed = 0
+        self.retried = 0
+        self.buried = 0
+        self.last_lag = None  # enqueue -> memorized, seconds
+
+    def enqueue(self, caller_id: str, volunteer_name: str, conversation: list) -> int:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                _INSERT_JOB,
+                (caller_id, volunteer_name, json.dumps(conversation), now, now),
+            )
+            return cur.lastrowid
+
+    def due(self, limit: int = None) -> list:
+        """Claim pending jobs whose retry time has come, oldest first.
+
+        Select and claim run in one write transaction, so concurrent readers
+        (other connections or processes) get disjoint batches.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    _SELECT_DUE, (now, limit or MEMU_QUEUE_BATCH)
+                ).fetchall()
+                self._conn.executemany(
+                    _CLAIM_JOB, [(now + MEMU_QUEUE_LEASE, row[0]) for row in rows]
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return [
+            {
+                "id": row[0],
+                "caller_id": row[1],
+                "volunteer": row[2],
+                "conversation": json.loads(row[3]),
+                "attempts": row[4],
+                "created_at": row[5],
+            }
+            for row in rows
+        ]
+
+    def release(self, jobs: list):
+        """Hand claimed jobs back unsent, due again immediately."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(_CLAIM_JOB, [(now, job["id"]) for job in jobs])
+
+    def complete(self, job: dict):
+        with self._lock:
+            self._conn.execute(_DELETE_JOB, (job["id"],))
+            self.completed += 1
+            self.last_lag = time.time() - job["created_at"]
+
+    def fail(self, job: dict, error: str):
+        """Schedule a retry with backoff, or park the job once it runs out."""
+        attempts = job["attempts"] + 1
+        with self._lock:
+            if attempts >= self.max_attempts:
+                self._conn.execute(_BURY_JOB, (attempts, error, job["id"]))
+                self.buried += 1
+            else:
+                self._conn.execute(
+                    _RETRY_JOB,
+                    (attempts, time.time() + backoff_delay(attempts), error, job["id"]),
+                )
+                self.retried += 1
+
+    def requeue_dead(self) -> int:
+        with self._lock:
+            return self._conn.execute(_REQUEUE_DEAD, (time.time(),)).rowcount
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Time until the next pending job is due, or None if none pending."""
+        with self._lock:
+            (next_due,) = self._conn.execute(_NEXT_DUE).fetchone()
+        if next_due is None:
+            return None
+        return max(0.0, next_due - time.time())
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(_COUNTS).fetchall()
+        counts = {status: (count, oldest) for status, count, oldest in rows}
+        pending, oldest = counts.get("pending", (0, None))
+        return {
+            "depth": pending,
+            "dead": counts.get("dead", (0, None))[0],
+            "oldest_pending_age_s": round(time.time() - oldest, 1) if oldest else 0.0,
+            "last_lag_s": round(self.last_lag, 3) if self.last_lag is not None else None,
+            "completed": self.completed,
+            "retried": self.retried,
+            "buried": self.buried,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
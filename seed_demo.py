@@ -11,6 +11,8 @@ Usage:
 import json
 import os
 
+from memory_store import LocalMemoryStore
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data", "caller-001")
 SESSIONS_DIR = os.path.join(DATA_DIR, "sessions")
 
@@ -103,6 +105,12 @@ def seed():
     with open(os.path.join(SESSIONS_DIR, "session_001.json"), "w") as f:
         json.dump(session, f, indent=2, ensure_ascii=False)
 
+    # Files were written directly, so refresh the derived timeline and the
+    # supervisor summary index.
+    store = LocalMemoryStore()
+    store.rebuild_timeline("caller-001")
+    store.rebuild_summary_index()
+
     print(f"Seeded demo data for caller-001 in {DATA_DIR}")
     print("  - triggers.json")
     print("  - effective_strategies.json")
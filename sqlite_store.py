@@ -0,0 +1,455 @@
+"""
+SQLite-backed memory store.
+
+One database file instead of the JSON tree under data/: safe with several
+writers (WAL mode, one short write transaction per session), queryable
+across callers, and indexed by caller, date and risk level.
+
+Select it with MEMORY_BACKEND=sqlite (database path: SQLITE_PATH).
+Existing LocalMemoryStore data is imported with:
+
+    python memory_store.py migrate-sqlite
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from memory_store import (
+    DATA_DIR,
+    MEMORY_KEYS,
+    BaseMemoryStore,
+    _merge_memory,
+    _new_timeline_state,
+    _session_record,
+    _timeline_entry,
+)
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(DATA_DIR, "memory.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS callers (
+    caller_id       TEXT PRIMARY KEY,
+    memory          TEXT NOT NULL DEFAULT '{}',
+    timeline_state  TEXT NOT NULL,
+    session_count   INTEGER NOT NULL DEFAULT 0,
+    risk_level      TEXT,
+    last_volunteer  TEXT,
+    last_date       TEXT,
+    last_summary    TEXT,
+    escalated       INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id              INTEGER PRIMARY KEY,
+    caller_id       TEXT NOT NULL REFERENCES callers(caller_id) ON DELETE CASCADE,
+    session_number  INTEGER NOT NULL,
+    volunteer       TEXT,
+    date            TEXT,
+    summary         TEXT,
+    risk_level      TEXT,
+    message_count   INTEGER,
+    extracted       TEXT NOT NULL,
+    timeline        TEXT NOT NULL,
+    UNIQUE (caller_id, session_number)
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions(date);
+CREATE INDEX IF NOT EXISTS idx_sessions_risk ON sessions(risk_level);
+
+CREATE TABLE IF NOT EXISTS extracted_items (
+    session_id      INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    caller_id       TEXT NOT NULL,
+    kind            TEXT NOT NULL,
+    value           TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_caller ON extracted_items(caller_id, kind);
+CREATE INDEX IF NOT EXISTS idx_items_session ON extracted_items(session_id);
+
+CREATE TABLE IF NOT EXISTS handoffs (
+    caller_id       TEXT NOT NULL REFERENCES callers(caller_id) ON DELETE CASCADE,
+    language        TEXT NOT NULL,
+    version         INTEGER NOT NULL,
+    handoff         TEXT NOT NULL,
+    PRIMARY KEY (caller_id, language)
+);
+
+CREATE TABLE IF NOT EXISTS messages (
+    session_id      INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq             INTEGER NOT NULL,
+    role            TEXT NOT NULL,
+    content         TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache prepares each one once and reuses it.
+_SELECT_CALLER = (
+    "SELECT memory, timeline_state, session_count, escalated "
+    "FROM callers WHERE caller_id = ?"
+)
+_INSERT_CALLER = (
+    "INSERT INTO callers (caller_id, memory, timeline_state) VALUES (?, ?, ?)"
+)
+_UPDATE_CALLER = (
+    "UPDATE callers SET memory = ?, timeline_state = ?, session_count = ?, "
+    "risk_level = ?, last_volunteer = ?, last_date = ?, last_summary = ?, "
+    "escalated = ? WHERE caller_id = ?"
+)
+_DELETE_CALLER = "DELETE FROM callers WHERE caller_id = ?"
+_INSERT_SESSION = (
+    "INSERT INTO sessions (caller_id, session_number, volunteer, date, summary, "
+    "risk_level, message_count, extracted, timeline) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_ITEM = (
+    "INSERT INTO extracted_items (session_id, caller_id, kind, value) "
+    "VALUES (?, ?, ?, ?)"
+)
+_INSERT_MESSAGE = (
+    "INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)"
+)
+_SELECT_SESSIONS = (
+    "SELECT id, session_number, volunteer, date, summary, risk_level, "
+    "message_count, extracted FROM sessions WHERE caller_id = ? "
+    "ORDER BY session_number"
+)
+_SELECT_SESSION = (
+    "SELECT id, session_number, volunteer, date, summary, risk_level, "
+    "message_count, extracted FROM sessions "
+    "WHERE caller_id = ? AND session_number = ?"
+)
+_SELECT_SESSION_MESSAGES = (
+    "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq"
+)
+_SELECT_TIMELINE = (
+    "SELECT timeline FROM sessions WHERE caller_id = ? ORDER BY session_number"
+)
+_SELECT_LATEST_TIMELINE = (
+    "SELECT timeline FROM sessions WHERE caller_id = ? "
+    "ORDER BY session_number DESC LIMIT 1"
+)
+_SELECT_HANDOFF = (
+    "SELECT handoff FROM handoffs WHERE caller_id = ? AND language = ? AND version = ?"
+)
+_SELECT_HANDOFF_VERSION = "SELECT MAX(version) FROM handoffs WHERE caller_id = ?"
+_DELETE_OLD_HANDOFFS = "DELETE FROM handoffs WHERE caller_id = ? AND version < ?"
+_UPSERT_HANDOFF = (
+    "INSERT OR REPLACE INTO handoffs (caller_id, language, version, handoff) "
+    "VALUES (?, ?, ?, ?)"
+)
+_SELECT_CALLER_IDS = "SELECT caller_id FROM callers ORDER BY caller_id"
+_SELECT_SUMMARIES = (
+    "SELECT caller_id, session_count, risk_level, last_volunteer, last_date, "
+    "last_summary, escalated FROM callers WHERE session_count > 0 "
+    "ORDER BY caller_id"
+)
+
+
+class SqliteMemoryStore(BaseMemoryStore):
+    """
+    BaseMemoryStore on a single SQLite database in WAL mode.
+
+    Each thread gets its own connection. Every store_session() runs in one
+    BEGIN IMMEDIATE transaction, so concurrent writers serialize cleanly and
+    readers never block. Timeline diffs are computed at write time exactly as
+    in LocalMemoryStore.
+    """
+
+    def __init__(self, db_path: str = SQLITE_PATH):
+        self.db_path = db_path
+        parent = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(parent, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=30.0,
+                isolation_level=None,
+                cached_statements=64,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _write(self, fn):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    @staticmethod
+    def _session_from_row(row) -> dict:
+        _, number, volunteer, date, summary, risk, message_count, extracted = row
+        return {
+            "session_number": number,
+            "volunteer": volunteer,
+            "date": date,
+            "summary": summary,
+            "risk_level": risk,
+            "message_count": message_count,
+            "extracted": json.loads(extracted),
+        }
+
+    def _insert_session(self, conn, caller_id: str, session: dict, entry: dict):
+        extracted = session.get("extracted", {})
+        cur = conn.execute(
+            _INSERT_SESSION,
+            (
+                caller_id,
+                session["session_number"],
+                session.get("volunteer"),
+                session.get("date"),
+                session.get("summary"),
+                session.get("risk_level", "unknown"),
+                session.get("message_count", 0),
+                json.dumps(extracted, ensure_ascii=False),
+                json.dumps(entry, ensure_ascii=False),
+            ),
+        )
+        session_id = cur.lastrowid
+        conn.executemany(
+            _INSERT_ITEM,
+            [
+                (session_id, caller_id, kind, value)
+                for kind in ("triggers", "effective_strategies", "safety_plan", "warnings")
+                for value in extracted.get(kind, [])
+            ],
+        )
+        conn.executemany(
+            _INSERT_MESSAGE,
+            [
+                (session_id, seq, msg["role"], msg["content"])
+                for seq, msg in enumerate(session.get("conversation", []))
+            ],
+        )
+
+    def _update_caller(self, conn, caller_id, memory, state, escalated, entry):
+        conn.execute(
+            _UPDATE_CALLER,
+            (
+                json.dumps(memory, ensure_ascii=False),
+                json.dumps(state, ensure_ascii=False),
+                state["session_count"],
+                entry["risk_level"],
+                entry["volunteer"],
+                entry["date"],
+                entry["summary"],
+                int(escalated or bool(entry["escalations"])),
+                caller_id,
+            ),
+        )
+
+    def get_caller_memory(self, caller_id: str) -> Optional[dict]:
+        conn = self._conn()
+        row = conn.execute(_SELECT_CALLER, (caller_id,)).fetchone()
+        if row is None:
+            return None
+
+        # Session metadata only — transcripts stay in the messages table
+        # until get_session()/get_transcript() asks for them.
+        memory = json.loads(row[0])
+        memory["sessions"] = [
+            self._session_from_row(r)
+            for r in conn.execute(_SELECT_SESSIONS, (caller_id,))
+        ]
+        return memory
+
+    def store_session(
+        self,
+        caller_id: str,
+        volunteer_name: str,
+        conversation: list,
+        extracted_memories: dict,
+    ):
+        def write(conn):
+            row = conn.execute(_SELECT_CALLER, (caller_id,)).fetchone()
+            if row is None:
+                state = _new_timeline_state()
+                conn.execute(
+                    _INSERT_CALLER, (caller_id, "{}", json.dumps(state))
+                )
+                memory, escalated = {}, False
+            else:
+                memory = json.loads(row[0])
+                state = json.loads(row[1])
+                escalated = bool(row[3])
+
+            for key in MEMORY_KEYS:
+                if key in extracted_memories:
+                    memory[key] = _merge_memory(
+                        memory.get(key), extracted_memories[key]
+                    )
+
+            session = _session_record(
+                state["session_count"] + 1,
+                volunteer_name,
+                conversation,
+                extracted_memories,
+            )
+            entry = _timeline_entry(session, state)
+            self._insert_session(conn, caller_id, session, entry)
+            self._update_caller(conn, caller_id, memory, state, escalated, entry)
+
+        self._write(write)
+
+    def import_caller(self, caller_id: str, memory: dict, sessions: list):
+        """Replace a caller with already-stored memory and session records.
+
+        Used by the LocalMemoryStore migrator: the merged memory is copied as-is
+        and the original session records (dates, numbers) are preserved.
+        """
+
+        def write(conn):
+            conn.execute(_DELETE_CALLER, (caller_id,))
+            state = _new_timeline_state()
+            conn.execute(_INSERT_CALLER, (caller_id, "{}", json.dumps(state)))
+            escalated = False
+            entry = None
+            for session in sessions:
+                entry = _timeline_entry(session, state)
+                self._insert_session(conn, caller_id, session, entry)
+                escalated = escalated or bool(entry["escalations"])
+            structured = {k: v for k, v in memory.items() if k != "sessions"}
+            if entry is None:
+                conn.execute(
+                    "UPDATE callers SET memory = ? WHERE caller_id = ?",
+                    (json.dumps(structured, ensure_ascii=False), caller_id),
+                )
+            else:
+                self._update_caller(
+                    conn, caller_id, structured, state, escalated, entry
+                )
+
+        self._write(write)
+
+    def _messages(self, conn, session_id: int) -> list:
+        return [
+            {"role": role, "content": content}
+            for role, content in conn.execute(_SELECT_SESSION_MESSAGES, (session_id,))
+        ]
+
+    def get_session(self, caller_id: str, session_number: int) -> Optional[dict]:
+        conn = self._conn()
+        row = conn.execute(_SELECT_SESSION, (caller_id, session_number)).fetchone()
+        if row is None:
+            return None
+        session = self._session_from_row(row)
+        session["conversation"] = self._messages(conn, row[0])
+        return session
+
+    def get_transcript(self, caller_id: str, session_number: int) -> Optional[list]:
+        conn = self._conn()
+        row = conn.execute(_SELECT_SESSION, (caller_id, session_number)).fetchone()
+        if row is None:
+            return None
+        return self._messages(conn, row[0])
+
+    def get_timeline(self, caller_id: str) -> Optional[dict]:
+        entries = [
+            json.loads(r[0])
+            for r in self._conn().execute(_SELECT_TIMELINE, (caller_id,))
+        ]
+        if not entries:
+            return None
+        return {
+            "caller_id": caller_id,
+            "total_sessions": len(entries),
+            "sessions": entries,
+        }
+
+    def get_session_diff(self, caller_id: str) -> Optional[dict]:
+        conn = self._conn()
+        row = conn.execute(_SELECT_LATEST_TIMELINE, (caller_id,)).fetchone()
+        if row is None:
+            return None
+        latest = json.loads(row[0])
+        return {
+            "new_info": latest.get("new_info", []),
+            "escalations": latest.get("escalations", []),
+            "new_strategies": latest.get("new_strategies", []),
+            "risk_level": latest.get("risk_level", "unknown"),
+            "session_count": latest.get("session_number"),
+        }
+
+    def list_callers(self) -> list:
+        return [r[0] for r in self._conn().execute(_SELECT_CALLER_IDS)]
+
+    def clear_caller(self, caller_id: str):
+        self._write(lambda conn: conn.execute(_DELETE_CALLER, (caller_id,)))
+
+    def get_handoff(self, caller_id: str, version: int, language: str) -> Optional[dict]:
+        row = self._conn().execute(_SELECT_HANDOFF, (caller_id, language, version)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_handoff(self, caller_id: str, version: int, language: str, handoff: dict):
+        def write(conn):
+            if conn.execute(_SELECT_CALLER, (caller_id,)).fetchone() is None:
+                return
+            (stored,) = conn.execute(_SELECT_HANDOFF_VERSION, (caller_id,)).fetchone()
+            if stored is not None and stored > version:
+                return
+            conn.execute(_DELETE_OLD_HANDOFFS, (caller_id, version))
+            conn.execute(
+                _UPSERT_HANDOFF,
+                (caller_id, language, version, json.dumps(handoff, ensure_ascii=False)),
+            )
+
+        self._write(write)
+
+    def get_callers_summary(self) -> list:
+        return [
+            {
+                "caller_id": cid,
+                "total_sessions": count,
+                "risk_level": risk or "unknown",
+                "last_volunteer": volunteer or "",
+                "last_date": date or "",
+                "last_summary": summary or "",
+                "escalations": bool(escalated),
+            }
+            for cid, count, risk, volunteer, date, summary, escalated in (
+                self._conn().execute(_SELECT_SUMMARIES)
+            )
+        ]
+
+
+def migrate_from_local(local: BaseMemoryStore, target: SqliteMemoryStore) -> int:
+    """Copy every caller from a LocalMemoryStore into a SqliteMemoryStore."""
+    migrated = 0
+    for cid in local.list_callers():
+        memory = local.get_caller_memory(cid)
+        if memory is None:
+            continue
+        sessions = []
+        for summary in memory.get("sessions", []):
+            session = local.get_session(cid, summary["session_number"])
+            if session is None:
+                print(
+                    f"WARNING: {cid} session {summary['session_number']} record is missing, "
+                    "migrating its summary without the transcript"
+                )
+                session = {**summary, "conversation": []}
+            sessions.append(session)
+        target.import_caller(cid, memory, sessions)
+        migrated += 1
+    return migrated
@@ -399,6 +399,7 @@ async function sendMessage() {
   // Prepare a caller message bubble that we will stream into
   let callerBubble = null;
   let callerTextEl = null;
+  let riskAlertShownTo = null;
 
   try {
     const res = await fetch(streamUrl);
@@ -463,6 +464,18 @@ async function sendMessage() {
           state.sending = false;
           sendBtn.disabled = false;
           messageInput.focus();
+        } else if (event.type === "live_context_partial") {
+          // Risk level / warnings ahead of the rest of the analysis
+          state.lastLiveContext = { ...state.lastLiveContext, [event.field]: event.value };
+          updateLiveContext(state.lastLiveContext);
+          if (event.risk_alert) {
+            riskAlertShownTo = event.risk_alert.to;
+            showRiskAlert(event.risk_alert);
+            playAlertSound();
+            if (event.risk_alert.to === "high") {
+              showEmergencyProtocol();
+            }
+          }
         } else if (event.type === "done") {
           // Context, coaching, and suggestions arrived (async after stream_end)
 
@@ -482,8 +495,8 @@ async function sendMessage() {
             state.coachingHistory.push(event.coaching);
           }
 
-          // Show risk escalation alert
-          if (event.risk_alert) {
+          // Show risk escalation alert (unless a partial event already did)
+          if (event.risk_alert && event.risk_alert.to !== riskAlertShownTo) {
             showRiskAlert(event.risk_alert);
             playAlertSound();
             // Trigger emergency protocol on HIGH
@@ -0,0 +1,613 @@
+"""
+In-process tests for the FastAPI app with the LLM stubbed out.
+
+Usage:
+    python -m pytest -q test_app.py
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import app as app_module
+from memory_store import AsyncMemoryStore, LocalMemoryStore
+
+STREAM_TOKENS = 10
+TOKEN_DELAY = 0.02
+SLOW_STORE_DELAY = 0.8
+
+
+class SlowStore(LocalMemoryStore):
+    """LocalMemoryStore whose reads for "slow-*" callers block the calling
+    thread, like a slow disk or memU request."""
+
+    def get_caller_memory(self, caller_id: str):
+        if caller_id.startswith("slow-"):
+            time.sleep(SLOW_STORE_DELAY)
+        return super().get_caller_memory(caller_id)
+
+
+def _stub_llm(monkeypatch):
+    async def caller_stream(conversation, caller_memory=None, language="en", memory_context=None):
+        for i in range(STREAM_TOKENS):
+            await asyncio.sleep(TOKEN_DELAY)
+            yield f"tok{i} "
+
+    async def live_context(conversation, language="en", digest=None, on_partial=None):
+        if on_partial:
+            on_partial("risk_level", "low")
+        return {"risk_level": "low", "warnings": []}
+
+    async def coaching(conversation, language="en", digest=None):
+        return {"score": "good", "feedback": "Nice.", "technique": "Validation"}
+
+    async def suggestions(conversation, caller_memory=None, language="en", memory_context=None, digest=None):
+        return ["How are you feeling now?"]
+
+    monkeypatch.setattr(app_module.llm, "generate_caller_response_stream", caller_stream)
+    monkeypatch.setattr(app_module.llm, "extract_live_context", live_context)
+    monkeypatch.setattr(app_module.llm, "score_volunteer_response", coaching)
+    monkeypatch.setattr(app_module.llm, "generate_reply_suggestions", suggestions)
+
+
+def _events(body: str) -> list:
+    return [
+        json.loads(line[len("data: "):])
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+def test_streams_keep_flowing_during_slow_store_call(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+    store = AsyncMemoryStore(SlowStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = await client.post(
+                "/api/sessions/start",
+                json={"caller_id": "c-stream", "volunteer_name": "A"},
+            )
+            session_id = started.json()["session_id"]
+
+            t0 = time.perf_counter()
+
+            async def stream():
+                resp = await client.get(
+                    "/api/messages/stream",
+                    params={"session_id": session_id, "message": "Hi"},
+                )
+                return time.perf_counter() - t0, _events(resp.text)
+
+            async def slow_start():
+                await client.post(
+                    "/api/sessions/start",
+                    json={"caller_id": "slow-caller", "volunteer_name": "B"},
+                )
+                return time.perf_counter() - t0
+
+            stream_task = asyncio.create_task(stream())
+            await asyncio.sleep(TOKEN_DELAY * 2)  # stream is mid-flight
+            slow_task = asyncio.create_task(slow_start())
+            stream_elapsed, events = await stream_task
+            slow_elapsed = await slow_task
+            return stream_elapsed, events, slow_elapsed
+
+    try:
+        stream_elapsed, events, slow_elapsed = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    tokens = [e for e in events if e["type"] == "token"]
+    assert len(tokens) == STREAM_TOKENS
+    assert events[-1]["type"] == "done"
+    assert slow_elapsed >= SLOW_STORE_DELAY
+    # With a blocking store on the event loop the stream would wait out the
+    # slow read; off the loop it finishes well before it.
+    assert stream_elapsed < SLOW_STORE_DELAY
+
+
+def test_coaching_overlaps_caller_stream(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+    seen = {}
+
+    async def coaching(conversation, language="en", digest=None):
+        seen["started"] = time.perf_counter()
+        seen["last_role"] = conversation[-1]["role"]
+        await asyncio.sleep(STREAM_TOKENS * TOKEN_DELAY)  # as long as the stream
+        return {"score": "good", "feedback": "Nice.", "technique": "Validation"}
+
+    monkeypatch.setattr(app_module.llm, "score_volunteer_response", coaching)
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = await client.post(
+                "/api/sessions/start", json={"caller_id": "c-overlap", "volunteer_name": "A"}
+            )
+            t0 = time.perf_counter()
+            resp = await client.get(
+                "/api/messages/stream",
+                params={"session_id": started.json()["session_id"], "message": "Hi"},
+            )
+            return t0, time.perf_counter() - t0, _events(resp.text)
+
+    try:
+        t0, elapsed, events = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert seen["last_role"] == "volunteer"
+    assert seen["started"] - t0 < TOKEN_DELAY * 2  # before the first token
+    assert events[-1]["coaching"]["score"] == "good"
+    # Stream and coaching overlap: well under their sum.
+    assert elapsed < STREAM_TOKENS * TOKEN_DELAY * 1.8
+
+
+def test_risk_escalation_is_sent_before_the_rest_of_the_analysis(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+    risk_levels = iter(["low", "high"])
+
+    async def live_context(conversation, language="en", digest=None, on_partial=None):
+        risk = next(risk_levels)
+        on_partial("risk_level", risk)
+        on_partial("warnings", ["Mentions a plan"])
+        await asyncio.sleep(0.05)  # rest of the object still generating
+        return {"risk_level": risk, "warnings": ["Mentions a plan"], "current_mood": "Flat"}
+
+    monkeypatch.setattr(app_module.llm, "extract_live_context", live_context)
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = await client.post(
+                "/api/sessions/start", json={"caller_id": "c-partial", "volunteer_name": "A"}
+            )
+            turns = []
+            for message in ("Hi", "Tell me more"):
+                resp = await client.get(
+                    "/api/messages/stream",
+                    params={"session_id": started.json()["session_id"], "message": message},
+                )
+                turns.append(_events(resp.text))
+            return turns
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert [e["type"] for e in second[-3:]] == ["live_context_partial", "live_context_partial", "done"]
+    risk, warnings, done = second[-3:]
+    assert (risk["field"], risk["value"]) == ("risk_level", "high")
+    assert risk["risk_alert"] == {"from": "low", "to": "high"}
+    assert (warnings["field"], warnings["value"], warnings["risk_alert"]) == ("warnings", ["Mentions a plan"], None)
+    assert done["risk_alert"] == risk["risk_alert"]
+    assert done["live_context"]["current_mood"] == "Flat"
+    assert first[-3]["risk_alert"] is None and first[-1]["risk_alert"] is None
+
+
+def test_unconfirmed_partial_risk_is_sent_once_and_not_kept(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+    # Turn 2: the fused reply streams "high", then fails to parse; the redone
+    # extraction reports "moderate" and also fails, leaving no final level.
+    turns = iter([
+        ([("risk_level", "low")], "low"),
+        ([("risk_level", "high"), ("warnings", ["Plan"]), ("risk_level", "moderate")], "unknown"),
+        ([], "moderate"),
+    ])
+
+    async def analyze_turn(*args, coaching=None, on_partial=None, **kwargs):
+        partials, final = next(turns)
+        for field, value in partials:
+            on_partial(field, value)
+        return {"live_context": {"risk_level": final}, "coaching": None, "suggestions": []}
+
+    monkeypatch.setattr(app_module.llm, "analyze_turn", analyze_turn)
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = await client.post(
+                "/api/sessions/start", json={"caller_id": "c-unconfirmed", "volunteer_name": "A"}
+            )
+            events = []
+            for message in ("One", "Two", "Three"):
+                resp = await client.get(
+                    "/api/messages/stream",
+                    params={"session_id": started.json()["session_id"], "message": message},
+                )
+                events.append(_events(resp.text))
+            return events
+
+    try:
+        _, second, third = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    partial_risks = [
+        e for e in second if e["type"] == "live_context_partial" and e["field"] == "risk_level"
+    ]
+    assert [e["value"] for e in partial_risks] == ["high"]
+    assert second[-1]["risk_alert"] is None
+    # The baseline is still turn 1's final "low", not the unconfirmed "high".
+    assert third[-1]["risk_alert"] == {"from": "low", "to": "moderate"}
+
+
+def test_malformed_risk_level_does_not_break_the_stream(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+    turns = iter([(["high"], {"level": "high"}), ("low", "low"), ("high", ["high"])])
+
+    async def analyze_turn(*args, coaching=None, on_partial=None, **kwargs):
+        partial, final = next(turns)
+        on_partial("risk_level", partial)
+        return {"live_context": {"risk_level": final}, "coaching": None, "suggestions": []}
+
+    monkeypatch.setattr(app_module.llm, "analyze_turn", analyze_turn)
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = await client.post(
+                "/api/sessions/start", json={"caller_id": "c-malformed", "volunteer_name": "A"}
+            )
+            session_id = started.json()["session_id"]
+            events = []
+            for message in ("One", "Two", "Three"):
+                resp = await client.get(
+                    "/api/messages/stream", params={"session_id": session_id, "message": message}
+                )
+                events.append(_events(resp.text))
+            return events, app_module.sessions[session_id]["prev_risk"]
+
+    try:
+        turns_events, prev_risk = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert [events[-1]["type"] for events in turns_events] == ["done"] * 3
+    partial, done = turns_events[2][-2:]
+    assert partial["risk_alert"] == {"from": "low", "to": "high"}  # the partial was a level
+    assert done["risk_alert"] is None and prev_risk == "low"  # the final one was not
+
+
+def test_prefetch_endpoint_warms_known_callers(monkeypatch, tmp_path):
+    local = LocalMemoryStore(str(tmp_path))
+    local.store_session("c-known", "A", [{"role": "caller", "content": "hi"}], {})
+    store = AsyncMemoryStore(local)
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            known = await client.post("/api/callers/c-known/prefetch")
+            unknown = await client.post("/api/callers/c-new/prefetch")
+            return known.json(), unknown.json()
+
+    try:
+        known, unknown = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert known == {"caller_id": "c-known", "prefetched": True}
+    assert unknown == {"caller_id": "c-new", "prefetched": False}
+
+
+def test_session_replay_is_a_direct_lookup(monkeypatch, tmp_path):
+    local = LocalMemoryStore(str(tmp_path))
+    local.store_session("c-replay", "A", [{"role": "caller", "content": "hi"}], {})
+    monkeypatch.setattr(local, "list_callers", lambda: pytest.fail("scanned all callers"))
+    store = AsyncMemoryStore(local)
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [
+                await client.get(f"/api/callers/{caller_id}/sessions/{n}")
+                for caller_id, n in (("c-replay", 1), ("c-replay", 2), ("c-unknown", 1))
+            ]
+
+    try:
+        found, missing, unknown = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert found.json()["conversation"] == [{"role": "caller", "content": "hi"}]
+    assert missing.status_code == unknown.status_code == 404
+
+
+def test_health_reports_ok_without_memu(monkeypatch, tmp_path):
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (await client.get("/api/health")).json()
+
+    try:
+        assert asyncio.run(scenario()) == {"status": "ok", "memu": {}}
+    finally:
+        asyncio.run(store.aclose())
+
+
+def test_handoff_is_precomputed_at_end_and_reused_at_start(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+    calls = []
+
+    async def extract(conversation, language="en"):
+        return {"session_summary": "Talked about sleep.", "risk_level": "low"}
+
+    async def briefing(caller_memory, language="en", memory_context=None):
+        calls.append(("briefing", language, len(caller_memory["sessions"])))
+        return f"Briefing {language} v{len(caller_memory['sessions'])}"
+
+    async def openers(caller_memory, language="en", memory_context=None):
+        calls.append(("openers", language, len(caller_memory["sessions"])))
+        return [f"Hello again ({language})"]
+
+    monkeypatch.setattr(app_module.llm, "extract_memories", extract)
+    monkeypatch.setattr(app_module.llm, "generate_briefing", briefing)
+    monkeypatch.setattr(app_module.llm, "generate_opener_suggestions", openers)
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def session(language="en", end=True):
+                started = (await client.post(
+                    "/api/sessions/start",
+                    json={"caller_id": "c-handoff", "volunteer_name": "A", "language": language},
+                )).json()
+                if end:
+                    await client.post("/api/sessions/end", json={"session_id": started["session_id"]})
+                    await asyncio.gather(*app_module.background_tasks)
+                return started
+
+            await session()  # first call: nothing to brief
+            assert calls == [("briefing", "en", 1), ("openers", "en", 1)]  # precomputed
+
+            warm = await session(end=False)
+            assert warm["briefing"] == "Briefing en v1" and len(calls) == 2
+
+            other_language = await session(language="ja", end=False)
+            assert other_language["briefing"] == "Briefing ja v1" and len(calls) == 4
+            again = await session(language="ja")
+            assert again["briefing"] == "Briefing ja v1"
+            # Ending that session stored v2 and precomputed its handoff.
+            assert calls[4:] == [("briefing", "ja", 2), ("openers", "ja", 2)]
+
+            warm_v2 = await session(language="ja", end=False)
+            assert warm_v2["briefing"] == "Briefing ja v2" and len(calls) == 6
+            stale = await session(end=False)  # English handoff is still v1
+            assert stale["briefing"] == "Briefing en v2" and len(calls) == 8
+            return stale
+
+    try:
+        stale = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+    assert stale["suggestions"] == ["Hello again (en)"]
+
+
+def test_handoff_without_openers_is_not_reused(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+    openers = iter([[], ["Welcome back."]])
+    calls = []
+
+    async def briefing(caller_memory, language="en", memory_context=None):
+        calls.append("briefing")
+        return "Briefing"
+
+    async def opener_suggestions(caller_memory, language="en", memory_context=None):
+        return next(openers)  # the first call fails and yields nothing
+
+    monkeypatch.setattr(app_module.llm, "generate_briefing", briefing)
+    monkeypatch.setattr(app_module.llm, "generate_opener_suggestions", opener_suggestions)
+    local = LocalMemoryStore(str(tmp_path))
+    local.store_session("c-openers", "A", [{"role": "caller", "content": "hi"}], {})
+    store = AsyncMemoryStore(local)
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [
+                (await client.post(
+                    "/api/sessions/start", json={"caller_id": "c-openers", "volunteer_name": "A"}
+                )).json()
+                for _ in range(3)
+            ]
+
+    try:
+        first, second, third = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert first["suggestions"] == []
+    assert second["suggestions"] == third["suggestions"] == ["Welcome back."]
+    assert calls == ["briefing", "briefing"]  # regenerated once, then reused
+
+
+def test_shutdown_waits_for_cancelled_background_tasks(monkeypatch, tmp_path):
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+    events = []
+    close = store.aclose
+
+    async def aclose():
+        events.append("store closed")
+        await close()
+
+    async def precompute():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            await asyncio.sleep(0.01)  # e.g. a handoff write finishing
+            events.append("task unwound")
+
+    monkeypatch.setattr(store, "aclose", aclose)
+
+    async def scenario():
+        async with app_module.lifespan(app_module.app):
+            app_module._spawn(precompute())
+            await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert events == ["task unwound", "store closed"]
+
+
+def test_new_turn_and_disconnect_cancel_stale_analysis(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+    analysed = []
+
+    async def live_context(conversation, language="en", digest=None, on_partial=None):
+        volunteer_message = conversation[-2]["content"]
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            analysed.append(("cancelled", volunteer_message))
+            raise
+        analysed.append(("finished", volunteer_message))
+        return {"risk_level": "low", "warnings": []}
+
+    monkeypatch.setattr(app_module.llm, "extract_live_context", live_context)
+    monkeypatch.setattr(
+        app_module, "turn_cancellations", dict.fromkeys(app_module.turn_cancellations, 0)
+    )
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+    stream_time = STREAM_TOKENS * TOKEN_DELAY
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = await client.post(
+                "/api/sessions/start", json={"caller_id": "c-cancel", "volunteer_name": "A"}
+            )
+            session_id = started.json()["session_id"]
+
+            def send(message):
+                return asyncio.create_task(client.get(
+                    "/api/messages/stream", params={"session_id": session_id, "message": message}
+                ))
+
+            first = send("First")
+            await asyncio.sleep(stream_time + 0.2)  # first turn is analysing
+            second = send("Second")
+            first_events = _events((await first).text)
+            second_events = _events((await second).text)
+
+            third = send("Third")
+            await asyncio.sleep(stream_time + 0.2)
+            third.cancel()  # client disconnects mid-analysis
+            await asyncio.gather(third, return_exceptions=True)
+            await asyncio.sleep(0.05)
+            metrics = (await client.get("/api/metrics")).json()
+            return first_events, second_events, metrics
+
+    try:
+        first_events, second_events, metrics = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert first_events[-1]["type"] == "stream_end"  # no stale "done"
+    assert second_events[-1]["type"] == "done"
+    assert analysed == [
+        ("cancelled", "First"),
+        ("finished", "Second"),
+        ("cancelled", "Third"),
+    ]
+    assert metrics["turn_cancellations"]["superseded"] == 1
+    assert metrics["turn_cancellations"]["disconnected"] == 1
+
+
+def test_failed_stream_is_not_counted_as_disconnect(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+
+    async def caller_stream(conversation, caller_memory=None, language="en", memory_context=None):
+        yield "tok "
+        raise RuntimeError("stream broke")
+
+    async def coaching(conversation, language="en", digest=None):
+        await asyncio.sleep(1.0)
+
+    monkeypatch.setattr(app_module.llm, "generate_caller_response_stream", caller_stream)
+    monkeypatch.setattr(app_module.llm, "score_volunteer_response", coaching)
+    monkeypatch.setattr(
+        app_module, "turn_cancellations", dict.fromkeys(app_module.turn_cancellations, 0)
+    )
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = await client.post(
+                "/api/sessions/start", json={"caller_id": "c-broken", "volunteer_name": "A"}
+            )
+            with pytest.raises(Exception):  # the app error, possibly in an ExceptionGroup
+                await client.get(
+                    "/api/messages/stream",
+                    params={"session_id": started.json()["session_id"], "message": "Hi"},
+                )
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert app_module.turn_cancellations["disconnected"] == 0
+
+
+def test_end_session_stops_a_running_digest_fold(monkeypatch, tmp_path):
+    _stub_llm(monkeypatch)
+
+    async def extract(conversation, language="en"):
+        return {"session_summary": "Talked.", "risk_level": "low"}
+
+    monkeypatch.setattr(app_module.llm, "extract_memories", extract)
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+    folds = []
+
+    async def fold():
+        try:
+            await asyncio.sleep(1.0)
+            folds.append("written")
+        except asyncio.CancelledError:
+            folds.append("cancelled")
+            raise
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = (await client.post(
+                "/api/sessions/start", json={"caller_id": "c-fold", "volunteer_name": "A"}
+            )).json()
+            app_module.sessions[started["session_id"]]["digest_task"] = asyncio.create_task(fold())
+            await asyncio.sleep(0)
+            await client.post("/api/sessions/end", json={"session_id": started["session_id"]})
+            return list(folds)
+
+    try:
+        at_end = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    assert at_end == ["cancelled"]  # stopped before end_session returned
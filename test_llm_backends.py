@@ -0,0 +1,132 @@
+"""
+Offline tests for llm_backends — the stub backend drives the real
+LLMService and app code paths without network access.
+
+Usage:
+    python -m pytest -q test_llm_backends.py
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import app as app_module
+import llm_service
+from llm_backends import CALLER_LINES, StubBackend, StubBackendError, create_llm_backend
+from llm_service import LLMService
+from memory_store import AsyncMemoryStore, LocalMemoryStore
+
+CONVERSATION = [
+    {"role": "volunteer", "content": "Hi, I'm here to listen."},
+    {"role": "caller", "content": "I lost my job."},
+]
+
+
+def _stub(monkeypatch, **kwargs) -> StubBackend:
+    backend = StubBackend(**{"latency": 0, "tokens_per_s": 1e6, **kwargs})
+    monkeypatch.setattr(llm_service, "backend", backend)
+    monkeypatch.setattr(llm_service, "usage", llm_service.UsageCounters())
+    monkeypatch.setattr(llm_service, "response_cache", llm_service.ResponseCache(max_entries=0, directory=""))
+    return backend
+
+
+def test_factory_selects_stub_by_name():
+    assert create_llm_backend("stub").name == "stub"
+
+
+@pytest.mark.parametrize("fused", [False, True])
+def test_stub_gives_valid_replies_for_every_method(monkeypatch, fused):
+    _stub(monkeypatch)
+    monkeypatch.setattr(llm_service, "FUSED_ANALYSIS", fused)
+    service = LLMService()
+    memory = {"sessions": [{"session_number": 1, "summary": "Talked."}], "warnings": []}
+
+    async def run():
+        chunks = [c async for c in service.generate_caller_response_stream(CONVERSATION[:1])]
+        return (
+            chunks,
+            await service.analyze_turn(CONVERSATION),
+            await service.extract_memories(CONVERSATION),
+            await service.generate_opener_suggestions(memory),
+            await service.generate_briefing(memory),
+        )
+
+    chunks, turn, extracted, openers, briefing = asyncio.run(run())
+    assert "".join(chunks) == CALLER_LINES[0] and len(chunks) > 1
+    assert turn["live_context"]["risk_level"] == "moderate"
+    assert turn["coaching"]["score"] == "good"
+    assert len(turn["suggestions"]) == 3
+    assert extracted["risk_level"] == "moderate" and extracted["session_summary"]
+    assert len(openers) == 3
+    assert briefing.startswith("RETURNING CALLER")
+    usage = service.metrics()["usage"]
+    assert usage["caller_stream"]["output_tokens"] > 0
+
+
+def test_stub_failure_injection_is_seeded(monkeypatch):
+    def pattern(**kwargs):
+        backend = StubBackend(latency=0, tokens_per_s=1e6, failure_rate=0.5, seed=7, **kwargs)
+        out = []
+        for _ in range(20):
+            try:
+                asyncio.run(backend.complete("coaching", messages=CONVERSATION))
+                out.append("ok")
+            except StubBackendError as e:
+                out.append(e.status_code)
+        return out
+
+    first = pattern()
+    assert first == pattern() and {"ok", 500} == set(first)
+    assert 429 in pattern(failure_mode="rate_limit")
+
+    _stub(monkeypatch, failure_rate=1.0, failure_mode="malformed")
+    assert asyncio.run(LLMService().score_volunteer_response(CONVERSATION)) is None
+
+
+def test_stub_serves_recorded_replies_in_turn(monkeypatch):
+    _stub(monkeypatch, replies={
+        "suggestions": [["First?"], ["Second?"]],
+        "coaching": {"score": "caution", "feedback": "Slow down.", "technique": "Pacing"},
+    })
+    service = LLMService()
+
+    async def run():
+        return [await service.generate_reply_suggestions(CONVERSATION) for _ in range(3)]
+
+    assert asyncio.run(run()) == [["First?"], ["Second?"], ["First?"]]
+    assert asyncio.run(service.score_volunteer_response(CONVERSATION))["score"] == "caution"
+
+
+def test_whole_app_runs_on_stub_backend(monkeypatch, tmp_path):
+    _stub(monkeypatch, latency=0.01, tokens_per_s=2000)
+    store = AsyncMemoryStore(LocalMemoryStore(str(tmp_path)))
+    monkeypatch.setattr(app_module, "memory", store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for _ in range(2):
+                started = (await client.post(
+                    "/api/sessions/start", json={"caller_id": "c-stub", "volunteer_name": "A"}
+                )).json()
+                resp = await client.get(
+                    "/api/messages/stream",
+                    params={"session_id": started["session_id"], "message": "Hello"},
+                )
+                ended = (await client.post(
+                    "/api/sessions/end", json={"session_id": started["session_id"]}
+                )).json()
+                await asyncio.gather(*app_module.background_tasks)
+            return started, resp.text, ended
+
+    try:
+        started, body, ended = asyncio.run(scenario())
+    finally:
+        asyncio.run(store.aclose())
+
+    done = [json.loads(line[6:]) for line in body.splitlines() if line.startswith("data: ")][-1]
+    assert done["type"] == "done" and done["live_context"]["risk_level"] == "moderate"
+    assert ended["extracted_memories"]["risk_level"] == "moderate"
+    assert started["is_returning"] and started["briefing"].startswith("RETURNING CALLER")
@@ -0,0 +1,595 @@
+"""
+Offline tests for llm_service — no API calls are made.
+
+Usage:
+    python -m pytest -q test_llm_service.py
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_service
+from json_stream import IncrementalJSONObject
+from llm_backends import AnthropicBackend, estimate_request_tokens, estimate_tokens
+from llm_service import (
+    CACHE_CONTROL,
+    FAST_MODEL,
+    MODEL,
+    LLMOverloaded,
+    LLMScheduler,
+    LLMService,
+    Route,
+    SessionDigest,
+    _parse_routes,
+    build_memory_context,
+)
+
+
+def _caller_memory(n_sessions: int) -> dict:
+    conversation = [{"role": "caller", "content": "I can't sleep. " * 40}] * 20
+    return {
+        "warnings": ["Avoid pushing for details about Yumi too early"],
+        "safety_plan": ["Call hotline if dark thoughts intensify"],
+        "triggers": [f"Trigger {i}" for i in range(30)],
+        "effective_strategies": ["Breathing exercises (4-7-8 technique)"],
+        "situation": {"description": "Lost job, living alone.", "key_events": ["Eviction notice"]},
+        "memu_supplementary": "volunteer-only semantic context",
+        "sessions": [
+            {
+                "session_number": n,
+                "volunteer": f"Volunteer {n}",
+                "date": "2026-02-05T14:30:00",
+                "summary": f"Summary of session {n}.",
+                "risk_level": "moderate",
+                "conversation": conversation,
+            }
+            for n in range(1, n_sessions + 1)
+        ],
+    }
+
+
+def test_memory_context_ranks_and_respects_budget():
+    block = build_memory_context(_caller_memory(40), budget_tokens=200)
+    assert estimate_tokens(block) <= 230
+    assert block.startswith("Previous sessions: 40")
+    assert block.index("WARNINGS") < block.index("SAFETY PLAN") < block.index("RECENT SESSIONS")
+    assert "Summary of session 40." in block
+    assert "Summary of session 1." not in block
+    assert "more omitted" in block
+    assert "I can't sleep" not in block
+    assert "volunteer-only" not in block
+
+
+def test_memory_context_includes_everything_when_it_fits():
+    block = build_memory_context(_caller_memory(2), budget_tokens=10_000)
+    assert "Trigger 29" in block
+    assert "EARLIER SESSIONS" not in block
+    assert "Summary of session 1." in block
+    assert "Eviction notice" in block
+
+
+class _FakeMessages:
+    """Records request kwargs; replies like the Anthropic client would."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.requests = []
+        self.usage = SimpleNamespace(
+            input_tokens=20,
+            output_tokens=5,
+            cache_read_input_tokens=1500,
+            cache_creation_input_tokens=100,
+        )
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        reply = self.reply(kwargs) if callable(self.reply) else self.reply
+        return SimpleNamespace(content=[SimpleNamespace(text=reply)], usage=self.usage)
+
+    def stream(self, **kwargs):
+        self.requests.append(kwargs)
+        fake = self
+
+        class _Stream:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            @property
+            async def text_stream(self):
+                reply = fake.reply(kwargs) if callable(fake.reply) else fake.reply
+                for chunk in [reply] if isinstance(reply, str) else reply:
+                    yield chunk
+
+            async def get_final_message(self):
+                return SimpleNamespace(usage=fake.usage)
+
+        return _Stream()
+
+
+def _use_messages(monkeypatch, messages: _FakeMessages) -> _FakeMessages:
+    """Serve llm_service's backend from `messages`, with fresh counters."""
+    monkeypatch.setattr(llm_service, "backend", AnthropicBackend(SimpleNamespace(messages=messages)))
+    monkeypatch.setattr(llm_service, "usage", llm_service.UsageCounters())
+    monkeypatch.setattr(llm_service, "latency", llm_service.LatencyStats())
+    monkeypatch.setattr(llm_service, "response_cache", llm_service.ResponseCache(directory=""))
+    return messages
+
+
+@pytest.fixture
+def fake(monkeypatch) -> _FakeMessages:
+    """A fake client behind llm_service; tests set `fake.reply`."""
+    return _use_messages(monkeypatch, _FakeMessages(""))
+
+
+CONVERSATION = [
+    {"role": "volunteer", "content": "Hi, how are you?"},
+    {"role": "caller", "content": "Not great."},
+    {"role": "volunteer", "content": "I'm here to listen."},
+]
+
+
+def test_caller_stream_marks_system_and_latest_turn_for_caching(fake):
+    fake.reply = "..."
+    memory = _caller_memory(2)
+    context = build_memory_context(memory)
+
+    async def run():
+        return [t async for t in LLMService().generate_caller_response_stream(
+            CONVERSATION, memory, memory_context=context)]
+
+    assert asyncio.run(run()) == ["..."]
+    request = fake.requests[0]
+    (system,) = request["system"]
+    assert system["cache_control"] == CACHE_CONTROL and context in system["text"]
+    messages = request["messages"]
+    assert [m["role"] for m in messages] == ["user", "assistant", "user"]
+    assert messages[0]["content"] == "Hi, how are you?"
+    assert messages[-1]["content"] == [
+        {"type": "text", "text": "I'm here to listen.", "cache_control": CACHE_CONTROL}
+    ]
+    assert LLMService().metrics()["usage"]["caller_stream"]["cache_read_input_tokens"] == 1500
+
+
+def test_analysis_prompt_keeps_text_and_caches_transcript_prefix(fake):
+    fake.reply = '{"risk_level": "low", "warnings": []}'
+    service = LLMService()
+
+    result = asyncio.run(service.extract_live_context(CONVERSATION))
+    asyncio.run(service.extract_live_context(CONVERSATION + [{"role": "caller", "content": "Thanks."}]))
+
+    assert result["risk_level"] == "low"
+    first, second = (r["messages"][0]["content"] for r in fake.requests)
+    text = "".join(block["text"] for block in first)
+    assert text.endswith("Conversation:\n\nVOLUNTEER: Hi, how are you?\nCALLER: Not great.\nVOLUNTEER: I'm here to listen.")
+    assert [b.get("cache_control") for b in first] == [None, None, None, CACHE_CONTROL]
+    # The next turn's request starts with exactly the blocks cached by this one.
+    assert [b["text"] for b in second[: len(first)]] == [b["text"] for b in first]
+
+    stats = service.metrics()["usage"]["live_context"]
+    assert stats["calls"] == 2
+    assert stats["cache_creation_input_tokens"] == 200
+    assert stats["cache_hit_rate"] == round(1500 / 1620, 3)
+
+
+FUSED_REPLY = {
+    "live_context": {"risk_level": "moderate", "warnings": ["Job loss"]},
+    "coaching": {"score": "good", "feedback": "Warm.", "technique": "Validation"},
+    "suggestions": ["a", "b", "c", "d"],
+}
+
+
+def test_fused_analysis_makes_one_call(fake, monkeypatch):
+    fake.reply = json.dumps(FUSED_REPLY)
+    monkeypatch.setattr(llm_service, "FUSED_ANALYSIS", True)
+
+    parts = asyncio.run(LLMService().analyze_turn(CONVERSATION))
+
+    assert len(fake.requests) == 1
+    assert parts == {**FUSED_REPLY, "suggestions": ["a", "b", "c"]}
+
+
+def test_fused_analysis_redoes_only_missing_parts(fake, monkeypatch):
+    def reply(request):
+        if "three parts" in request["messages"][0]["content"][0]["text"]:
+            return json.dumps({"live_context": FUSED_REPLY["live_context"], "coaching": "oops"})
+        if "trainer" in request["system"]:
+            return json.dumps(FUSED_REPLY["coaching"])
+        return json.dumps(["x", "y"])
+
+    fake.reply = reply
+    monkeypatch.setattr(llm_service, "FUSED_ANALYSIS", True)
+
+    parts = asyncio.run(LLMService().analyze_turn(CONVERSATION))
+
+    assert len(fake.requests) == 3  # fused + coaching + suggestions
+    assert parts["live_context"] == FUSED_REPLY["live_context"]
+    assert parts["coaching"] == FUSED_REPLY["coaching"]
+    assert parts["suggestions"] == ["x", "y"]
+
+
+def test_analyze_turn_uses_coaching_started_early(fake, monkeypatch):
+    def reply(request):
+        if "trainer" in request["system"]:
+            return json.dumps(FUSED_REPLY["coaching"])
+        if "clinical insights" in request["system"]:
+            return json.dumps(FUSED_REPLY["live_context"])
+        return json.dumps(["x", "y"])
+
+    fake.reply = reply
+    service = LLMService()
+
+    async def run():
+        coaching = service.begin_coaching(CONVERSATION)
+        conversation = CONVERSATION + [{"role": "caller", "content": "Okay."}]
+        return await service.analyze_turn(conversation, coaching=coaching)
+
+    parts = asyncio.run(run())
+    assert len(fake.requests) == 3
+    coaching_request = next(r for r in fake.requests if "trainer" in r["system"])
+    assert "Okay." not in json.dumps(coaching_request["messages"])
+    assert parts["coaching"] == FUSED_REPLY["coaching"]
+
+    monkeypatch.setattr(llm_service, "FUSED_ANALYSIS", True)
+    assert service.begin_coaching(CONVERSATION) is None
+
+
+def test_incremental_json_object_emits_members_as_they_complete():
+    text = (
+        '```json\n{"risk_level": "high", "warnings": ["Said \\"no point\\", twice", "{not a brace}"],\n'
+        ' "situation": {"key_events": ["a", "b"], "note": "x, y"}, "score": 3}\n```'
+    )
+    parser = IncrementalJSONObject()
+    seen = []
+    for i in range(0, len(text), 3):
+        for name, value in parser.feed(text[i:i + 3]).items():
+            seen.append((i, name, value))
+
+    assert [name for _, name, _ in seen] == ["risk_level", "warnings", "situation", "score"]
+    assert seen[0][0] < text.index('"warnings"')  # as soon as its comma arrives
+    assert parser.complete and parser.fields == json.loads(text.split("\n", 1)[1].rsplit("```", 1)[0])
+
+
+def test_live_context_streams_risk_and_warnings_early(fake, monkeypatch):
+    reply = json.dumps({
+        "risk_level": "high",
+        "warnings": ["Mentions a plan"],
+        "triggers": ["Eviction"],
+        "current_mood": "Flat",
+    })
+    chunks = [reply[i:i + 8] for i in range(0, len(reply), 8)]
+    streamed = []
+
+    def reply_chunks(request):
+        for chunk in chunks:
+            streamed.append(chunk)
+            yield chunk
+
+    fake.reply = reply_chunks
+    partials = []
+    result = asyncio.run(LLMService().extract_live_context(
+        CONVERSATION, on_partial=lambda field, value: partials.append((field, value, len(streamed)))
+    ))
+
+    assert result == json.loads(reply)
+    assert [(f, v) for f, v, _ in partials] == [("risk_level", "high"), ("warnings", ["Mentions a plan"])]
+    # Each field is reported once the chunk closing it arrives, not at the end.
+    assert partials[0][2] <= reply.index('"warnings"') // 8 + 1
+    assert partials[1][2] <= reply.index('"triggers"') // 8 + 1 < len(chunks)
+    assert LLMService().metrics()["usage"]["live_context"]["calls"] == 1
+
+    monkeypatch.setattr(llm_service, "FUSED_ANALYSIS", True)
+    fused = []
+    fake.reply = json.dumps(FUSED_REPLY)
+    parts = asyncio.run(LLMService().analyze_turn(
+        CONVERSATION, on_partial=lambda field, value: fused.append((field, value))
+    ))
+    assert fused == [("risk_level", "moderate"), ("warnings", ["Job loss"])]
+    assert parts["live_context"] == FUSED_REPLY["live_context"]
+
+
+def test_session_digest_bounds_analysis_prompts(fake):
+    def reply(request):
+        if request["system"].startswith("You keep running notes"):
+            return "Caller lost job; passive dark thoughts; breathing helped."
+        return json.dumps({"risk_level": "moderate"})
+
+    fake.reply = reply
+    service = LLMService()
+    digest = SessionDigest(recent_messages=4, fold_chunk=4)
+    conversation = [
+        {"role": "volunteer" if i % 2 == 0 else "caller", "content": f"message {i} " + "words " * 30}
+        for i in range(40)
+    ]
+
+    prompt_sizes = []
+    for n in range(2, 41, 2):
+        turn = conversation[:n]
+        asyncio.run(service.extract_live_context(turn, digest=digest))
+        content = fake.requests[-1]["messages"][0]["content"]
+        prompt_sizes.append(estimate_tokens("".join(b["text"] for b in content)))
+        asyncio.run(service.update_digest(digest, turn))
+
+    assert digest.folded == 36 and "breathing helped" in digest.summary
+    content = fake.requests[-2]["messages"][0]["content"]  # last analysis prompt
+    text = "".join(b["text"] for b in content)
+    assert "[Summary of the 32 earlier messages: Caller lost job" in text
+    assert "message 31 " not in text and "message 32 " in text and "message 39 " in text
+    # Prompt size stops growing once folding kicks in.
+    assert max(prompt_sizes[6:]) - min(prompt_sizes[6:]) < 200
+    assert prompt_sizes[-1] < prompt_sizes[5] * 1.5
+
+
+def test_scheduler_serves_by_priority_and_sheds_lowest_class():
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=1, requests_per_minute=0, max_queue=2)
+        order = []
+
+        async def request(cls, name):
+            try:
+                async with scheduler.slot(cls):
+                    order.append(name)
+                    await asyncio.sleep(0)
+            except LLMOverloaded:
+                order.append(f"shed {name}")
+
+        await scheduler.acquire("coaching")  # occupy the only slot
+        tasks = [asyncio.create_task(request("coaching", "c1"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("coaching", "c2")))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("extraction", "e1")))  # queue full: evicts c1
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("coaching", "c3")))  # nothing lower: rejected
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("stream", "s1")))  # never shed
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["shed c1", "shed c3", "s1", "e1", "c2"]
+    assert stats["classes"]["coaching"]["shed"] == 2
+    assert stats["classes"]["stream"]["admitted"] == 1
+    assert stats["classes"]["extraction"]["wait_ms_max"] > 0
+    assert stats["in_flight"] == 0
+
+
+def test_scheduler_does_not_count_cancelled_waiters_against_queue():
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=1, requests_per_minute=0, max_queue=2)
+        await scheduler.acquire("coaching")  # occupy the only slot
+        waiters = [asyncio.create_task(scheduler.acquire("coaching")) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+        # Both cancelled entries are still in the heap; the queue is empty.
+        queued = [asyncio.create_task(scheduler.acquire("coaching")) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert not any(task.done() for task in queued)
+        for _ in queued:
+            scheduler.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*queued)
+        scheduler.release()
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["classes"]["coaching"]["shed"] == 0
+    assert stats["classes"]["coaching"]["admitted"] == 3
+    assert stats["in_flight"] == 0
+
+
+def test_cancelled_calls_count_estimated_tokens_saved(fake, monkeypatch):
+    fake.reply = "{}"
+    scheduler = LLMScheduler(max_in_flight=1, requests_per_minute=0)
+    monkeypatch.setattr(llm_service, "scheduler", scheduler)
+    messages = [{"role": "user", "content": "Score this. " * 50}]
+
+    async def scenario():
+        await scheduler.acquire("coaching")  # queue the next call
+        queued = asyncio.create_task(
+            llm_service._chat("Trainer.", messages, max_tokens=300, task="coaching")
+        )
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        scheduler.release()
+
+    asyncio.run(scenario())
+    row = LLMService().metrics()["usage"]["coaching"]
+    assert fake.requests == []
+    assert row["cancelled"] == 1 and row["calls"] == 0
+    assert row["tokens_saved_est"] == estimate_request_tokens("Trainer.", messages) + 300
+
+
+def test_scheduler_token_bucket_limits_request_rate():
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=10, requests_per_minute=1200, burst=1)
+        start = time.perf_counter()
+        for _ in range(5):
+            async with scheduler.slot("extraction"):
+                pass
+        return time.perf_counter() - start
+
+    # 20 requests/s with a burst of 1: the first is immediate, then 50 ms each
+    assert 0.18 < asyncio.run(scenario()) < 0.5
+
+
+def test_response_cache_hits_coalesces_and_keys_on_language(fake):
+    fake.reply = "RETURNING CALLER — 2 previous session(s)"
+    memory = _caller_memory(2)
+    service = LLMService()
+
+    async def run():
+        first = await asyncio.gather(*(service.generate_briefing(memory) for _ in range(3)))
+        again = await service.generate_briefing(memory)
+        await service.generate_briefing(memory, language="ja")
+        await service.score_volunteer_response(CONVERSATION)
+        await service.score_volunteer_response(CONVERSATION)
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert first == [again] * 3
+    tasks = [
+        "briefing" if "briefing" in str(r["system"]) else "coaching" for r in fake.requests
+    ]
+    assert tasks == ["briefing", "briefing", "coaching", "coaching"]  # en once, ja once
+    stats = service.metrics()["response_cache"]["tasks"]
+    assert stats["briefing"] == {
+        "memory_hits": 1, "disk_hits": 0, "coalesced": 2, "misses": 2, "hit_rate": 0.6,
+    }
+    assert "coaching" not in stats
+
+
+def test_response_cache_disk_tier_survives_restart_until_ttl(fake, monkeypatch, tmp_path):
+    fake.reply = '{"session_summary": "Talked.", "risk_level": "low"}'
+    cache_dir = str(tmp_path / "llm_cache")
+
+    def extract(cache):
+        monkeypatch.setattr(llm_service, "response_cache", cache)
+        return asyncio.run(LLMService().extract_memories(CONVERSATION))
+
+    assert extract(llm_service.ResponseCache(directory=cache_dir))["risk_level"] == "low"
+    restarted = llm_service.ResponseCache(max_entries=0, directory=cache_dir)
+    assert extract(restarted)["session_summary"] == "Talked."
+    assert len(fake.requests) == 1
+    assert restarted.stats()["tasks"]["extract_memories"]["disk_hits"] == 1
+
+    expired = llm_service.ResponseCache(directory=cache_dir, ttl=-1)
+    extract(expired)
+    assert len(fake.requests) == 2
+
+
+def test_response_cache_skips_unusable_and_fallback_replies(fake, monkeypatch):
+    class RateLimited(Exception):
+        status_code = 429
+
+    replies = iter(["Sorry, I can't do that.", RateLimited(), '{"risk_level": "low"}'])
+
+    def reply(request):
+        if request["model"] != "backup-model":
+            answer = next(replies)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+        return '{"risk_level": "moderate"}'
+
+    fake.reply = reply
+    monkeypatch.setattr(llm_service, "LLM_FALLBACK_MODEL", "backup-model")
+    service = LLMService()
+
+    def extract():
+        return asyncio.run(service.extract_memories(CONVERSATION))["risk_level"]
+
+    assert extract() == "unknown"  # not JSON: used once, not cached
+    assert extract() == "moderate"  # fallback model: not cached under the primary's key
+    assert extract() == "low"
+    assert extract() == "low"
+    assert [r["model"] for r in fake.requests] == [MODEL, MODEL, "backup-model", MODEL]
+    assert service.metrics()["response_cache"]["tasks"]["extract_memories"]["memory_hits"] == 1
+
+
+def test_routes_pick_model_tier_and_max_tokens(fake):
+    fake.reply = json.dumps(FUSED_REPLY["coaching"])
+    service = LLMService()
+    asyncio.run(service.score_volunteer_response(CONVERSATION))
+    asyncio.run(service.extract_live_context(CONVERSATION))
+    coaching, live = fake.requests
+    assert (coaching["model"], coaching["max_tokens"]) == (FAST_MODEL, 300)
+    assert (live["model"], live["max_tokens"]) == (MODEL, 1500)
+    assert service.metrics()["latency"]["coaching"]["models"] == {FAST_MODEL: 1}
+
+    routes = _parse_routes(
+        "coaching=large, briefing=fast:600:20, new_task=fast, bogus",
+        {"coaching": Route("fast", 300, 15), "briefing": Route("large", 500, 45)},
+    )
+    assert routes["coaching"] == Route("large", 300, 15)
+    assert routes["briefing"] == Route("fast", 600, 20.0)
+    assert routes["new_task"].tier == "fast"
+
+
+def test_rate_limited_or_slow_calls_fall_back(monkeypatch):
+    class RateLimited(Exception):
+        status_code = 429
+
+    class Messages(_FakeMessages):
+        async def create(self, **kwargs):
+            self.requests.append(kwargs)
+            if kwargs["model"] == FAST_MODEL:
+                if self.reply == "slow":
+                    await asyncio.sleep(1)
+                raise RateLimited()
+            return SimpleNamespace(
+                content=[SimpleNamespace(text=json.dumps(["ok"]))], usage=self.usage
+            )
+
+    messages = _use_messages(monkeypatch, Messages("rate_limited"))
+    monkeypatch.setitem(llm_service.TASK_ROUTES, "suggestions", Route("fast", 300, 0.05))
+    service = LLMService()
+
+    # Without a fallback model: the 429 surfaces, the timeout is skipped.
+    monkeypatch.setattr(llm_service, "LLM_FALLBACK_MODEL", "")
+    messages.reply = "slow"
+    assert asyncio.run(service.generate_reply_suggestions(CONVERSATION)) == []
+
+    monkeypatch.setattr(llm_service, "LLM_FALLBACK_MODEL", "backup-model")
+    assert asyncio.run(service.generate_reply_suggestions(CONVERSATION)) == ["ok"]
+    messages.reply = "rate_limited"
+    assert asyncio.run(service.generate_reply_suggestions(CONVERSATION)) == ["ok"]
+
+    stats = service.metrics()["latency"]["suggestions"]
+    assert [r["model"] for r in messages.requests] == [
+        FAST_MODEL, FAST_MODEL, "backup-model", FAST_MODEL, "backup-model"
+    ]
+    assert stats["fallbacks"] == {"timeout": 1, "rate_limited": 1}
+    assert stats["failures"] == {"timeout": 1}
+    assert stats["models"] == {"backup-model": 2}
+
+
+def test_stream_that_hangs_before_first_token_falls_back(monkeypatch):
+    class Messages(_FakeMessages):
+        def stream(self, **kwargs):
+            opened = super().stream(**kwargs)
+            if kwargs["model"] != MODEL:
+                return opened
+
+            class Hung(type(opened)):
+                @property
+                async def text_stream(self):
+                    await asyncio.sleep(10)  # accepted the request, never answers
+                    yield "too late"
+
+            return Hung()
+
+    messages = _use_messages(monkeypatch, Messages("Hello."))
+    monkeypatch.setitem(llm_service.TASK_ROUTES, "caller_stream", Route("large", 500, 0.05))
+    service = LLMService()
+
+    def stream():
+        async def run():
+            return [t async for t in service.generate_caller_response_stream(CONVERSATION)]
+
+        return asyncio.run(run())
+
+    monkeypatch.setattr(llm_service, "LLM_FALLBACK_MODEL", "")
+    with pytest.raises(LLMOverloaded):
+        stream()
+
+    monkeypatch.setattr(llm_service, "LLM_FALLBACK_MODEL", "backup-model")
+    assert stream() == ["Hello."]
+
+    assert [r["model"] for r in messages.requests] == [MODEL, MODEL, "backup-model"]
+    stats = service.metrics()["latency"]["caller_stream"]
+    assert stats["failures"] == {"timeout": 1}
+    assert stats["fallbacks"] == {"timeout": 1}
+    assert stats["models"] == {"backup-model": 1}
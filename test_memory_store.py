@@ -0,0 +1,635 @@
+"""
+Behavioural tests for the memory stores.
+
+Runs against throwaway data directories — never touches ./data.
+
+Usage:
+    python -m pytest -q test_memory_store.py
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from memory_store import (
+    CachedMemoryStore,
+    LocalMemoryStore,
+    SUMMARY_INDEX_FILE,
+    SegmentLog,
+    memory_version,
+)
+from sqlite_store import SqliteMemoryStore, migrate_from_local
+
+
+CONVERSATION = [
+    {"role": "volunteer", "content": "Hi, how are you feeling today?"},
+    {"role": "caller", "content": "Not great. I lost my job last week."},
+]
+
+
+def _extracted(risk_level: str, triggers=None, summary: str = "") -> dict:
+    return {
+        "triggers": triggers or ["Job loss"],
+        "effective_strategies": ["Active listening"],
+        "safety_plan": ["Call hotline if needed"],
+        "situation": {"description": "Test caller", "key_events": []},
+        "warnings": ["Monitor for escalation"],
+        "session_summary": summary,
+        "risk_level": risk_level,
+    }
+
+
+@pytest.fixture(params=["files", "segments", "sqlite"])
+def store(request, tmp_path):
+    """Every structured backend must pass the same behavioural checks."""
+    if request.param == "sqlite":
+        return SqliteMemoryStore(str(tmp_path / "memory.db"))
+    return LocalMemoryStore(str(tmp_path), session_storage=request.param)
+
+
+def test_store_behaviour(store):
+    assert store.get_caller_memory("c1") is None
+    assert store.get_timeline("c1") is None
+    assert store.get_session_diff("c1") is None
+    assert store.get_session("c1", 1) is None
+
+    store.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low", ["Job loss"], "First."))
+    store.store_session("c1", "Volunteer B", CONVERSATION, _extracted("high", ["Job loss", "Eviction"], "Second."))
+    store.store_session("c2", "Volunteer A", CONVERSATION, _extracted("moderate"))
+
+    memory = store.get_caller_memory("c1")
+    assert sorted(memory["triggers"]) == ["Eviction", "Job loss"]
+    assert memory["situation"]["description"] == "Test caller"
+    assert [s["session_number"] for s in memory["sessions"]] == [1, 2]
+    assert all("conversation" not in s for s in memory["sessions"])
+
+    session = store.get_session("c1", 2)
+    assert session["volunteer"] == "Volunteer B"
+    assert session["conversation"] == CONVERSATION
+    assert store.get_transcript("c1", 1) == CONVERSATION
+    assert store.get_transcript("c1", 3) is None
+    assert session["extracted"]["triggers"] == ["Job loss", "Eviction"]
+
+    timeline = store.get_timeline("c1")
+    assert timeline["total_sessions"] == 2
+    assert [s["new_info"] for s in timeline["sessions"]] == [["Job loss"], ["Eviction"]]
+    assert timeline["sessions"][1]["escalations"] == ["Risk low → high"]
+
+    diff = store.get_session_diff("c1")
+    assert diff["session_count"] == 2
+    assert diff["risk_level"] == "high"
+    assert diff["new_info"] == ["Eviction"]
+
+    rows = {row["caller_id"]: row for row in store.get_callers_summary()}
+    assert rows["c1"]["total_sessions"] == 2
+    assert rows["c1"]["last_summary"] == "Second."
+    assert rows["c1"]["escalations"] is True
+    assert rows["c2"]["escalations"] is False
+    assert sorted(store.list_callers()) == ["c1", "c2"]
+
+    store.clear_caller("c1")
+    assert store.get_caller_memory("c1") is None
+    assert store.get_timeline("c1") is None
+    assert store.list_callers() == ["c2"]
+
+
+def test_handoff_keyed_by_memory_version_and_language(store):
+    handoff = {"briefing": "Brief", "suggestions": ["Hi"]}
+    store.put_handoff("c1", 1, "en", handoff)  # unknown caller: ignored
+    assert store.get_handoff("c1", 1, "en") is None
+
+    store.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low"))
+    version = memory_version(store.get_caller_memory("c1"))
+    store.put_handoff("c1", version, "en", handoff)
+    store.put_handoff("c1", version, "ja", {"briefing": "ブリーフ", "suggestions": []})
+    assert store.get_handoff("c1", version, "en") == handoff
+    assert store.get_handoff("c1", version, "ja")["briefing"] == "ブリーフ"
+    assert store.get_handoff("c1", version, "es") is None
+
+    store.store_session("c1", "Volunteer B", CONVERSATION, _extracted("low"))
+    newer = memory_version(store.get_caller_memory("c1"))
+    assert newer == version + 1
+    assert store.get_handoff("c1", newer, "en") is None
+    store.put_handoff("c1", newer, "en", {"briefing": "Newer", "suggestions": []})
+    store.put_handoff("c1", version, "en", handoff)  # late, older write loses
+    assert store.get_handoff("c1", newer, "en")["briefing"] == "Newer"
+    assert store.get_handoff("c1", version, "ja") is None
+
+    store.clear_caller("c1")
+    assert store.get_handoff("c1", newer, "en") is None
+
+
+def test_migrate_local_to_sqlite(tmp_path):
+    local = LocalMemoryStore(str(tmp_path / "data"))
+    local.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low"))
+    local.store_session("c1", "Volunteer B", CONVERSATION, _extracted("high", ["Eviction"]))
+    local.store_session("c2", "Volunteer A", CONVERSATION, _extracted("moderate"))
+
+    target = SqliteMemoryStore(str(tmp_path / "memory.db"))
+    assert migrate_from_local(local, target) == 2
+    for cid in ("c1", "c2"):
+        assert target.get_caller_memory(cid) == local.get_caller_memory(cid)
+        assert target.get_timeline(cid) == local.get_timeline(cid)
+    key = lambda row: row["caller_id"]
+    assert sorted(target.get_callers_summary(), key=key) == sorted(
+        local.get_callers_summary(), key=key
+    )
+
+
+def test_torn_session_write_does_not_shift_transcripts(tmp_path, monkeypatch):
+    store = LocalMemoryStore(str(tmp_path), session_storage="segments")
+    store.store_session("c1", "A", [{"role": "caller", "content": "first"}], _extracted("low"))
+
+    # Crash after the transcript is appended but before the metadata is.
+    append = SegmentLog.append
+
+    def torn_append(self, record):
+        if self.log_path.endswith("sessions.log"):
+            raise OSError("crashed before the session record was written")
+        return append(self, record)
+
+    monkeypatch.setattr(SegmentLog, "append", torn_append)
+    with pytest.raises(OSError):
+        store.store_session("c1", "A", [{"role": "caller", "content": "lost"}], _extracted("low"))
+    monkeypatch.setattr(SegmentLog, "append", append)
+
+    store.store_session("c1", "A", [{"role": "caller", "content": "second"}], _extracted("high"))
+    store.store_session("c1", "A", [{"role": "caller", "content": "third"}], _extracted("high"))
+
+    assert [store.get_transcript("c1", n)[0]["content"] for n in (1, 2, 3)] == [
+        "first", "second", "third"
+    ]
+    assert store.get_session("c1", 2)["conversation"][0]["content"] == "second"
+
+
+def test_migration_keeps_sessions_whose_record_is_missing(tmp_path):
+    local = LocalMemoryStore(str(tmp_path / "local"), session_storage="segments")
+    local.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low", summary="First."))
+    local.store_session("c1", "Volunteer B", CONVERSATION, _extracted("high", summary="Second."))
+    # Drop session 1's record: session 2 now sits at position 1, so looking
+    # it up by number finds nothing.
+    sessions_base = str(tmp_path / "local" / "c1" / "sessions")
+    SegmentLog.write_all(sessions_base, list(SegmentLog(sessions_base))[1:])
+    assert local.get_session("c1", 2) is None
+
+    target = SqliteMemoryStore(str(tmp_path / "memory.db"))
+    assert migrate_from_local(local, target) == 1
+    migrated = target.get_session("c1", 2)
+    assert migrated["summary"] == "Second." and migrated["conversation"] == []
+    assert [s["session_number"] for s in target.get_timeline("c1")["sessions"]] == [2]
+
+
+def test_summary_index_tracks_store_session(tmp_path):
+    store = LocalMemoryStore(str(tmp_path))
+    store.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low", summary="First."))
+    store.store_session("c1", "Volunteer B", CONVERSATION, _extracted("high", summary="Second."))
+    store.store_session("c2", "Volunteer A", CONVERSATION, _extracted("moderate"))
+
+    rows = {row["caller_id"]: row for row in store.get_callers_summary()}
+    assert rows["c1"]["total_sessions"] == 2
+    assert rows["c1"]["risk_level"] == "high"
+    assert rows["c1"]["last_volunteer"] == "Volunteer B"
+    assert rows["c1"]["last_summary"] == "Second."
+    assert rows["c1"]["escalations"] is True
+    assert rows["c2"]["escalations"] is False
+
+    # The index must agree with a full recompute from the timelines.
+    index_path = os.path.join(str(tmp_path), SUMMARY_INDEX_FILE)
+    with open(index_path) as f:
+        incremental = json.load(f)
+    store.rebuild_summary_index()
+    with open(index_path) as f:
+        assert json.load(f) == incremental
+
+    store.clear_caller("c1")
+    assert [row["caller_id"] for row in store.get_callers_summary()] == ["c2"]
+
+
+def test_summary_index_rebuilt_for_existing_data_dir(tmp_path):
+    store = LocalMemoryStore(str(tmp_path))
+    store.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low"))
+    os.remove(os.path.join(str(tmp_path), SUMMARY_INDEX_FILE))
+
+    rows = store.get_callers_summary()
+    assert [row["caller_id"] for row in rows] == ["c1"]
+    assert "callers_index.json" not in store.list_callers()
+
+
+def test_segment_storage_round_trip(tmp_path):
+    store = LocalMemoryStore(str(tmp_path), session_storage="segments")
+    for risk in ("low", "moderate", "high"):
+        store.store_session("c1", "Volunteer A", CONVERSATION, _extracted(risk))
+
+    caller_dir = os.path.join(str(tmp_path), "c1")
+    assert not os.path.exists(os.path.join(caller_dir, "sessions"))
+    assert os.path.exists(os.path.join(caller_dir, "sessions.log"))
+
+    memory = store.get_caller_memory("c1")
+    assert [s["session_number"] for s in memory["sessions"]] == [1, 2, 3]
+    assert store.get_session("c1", 2)["risk_level"] == "moderate"
+    assert store.get_session("c1", 4) is None
+
+    timeline = store.get_timeline("c1")
+    assert timeline["total_sessions"] == 3
+    assert timeline["sessions"][2]["escalations"] == ["Risk moderate → high"]
+
+
+def test_migrate_files_to_segments(tmp_path):
+    files_store = LocalMemoryStore(str(tmp_path), session_storage="files")
+    files_store.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low"))
+    files_store.store_session("c1", "Volunteer B", CONVERSATION, _extracted("high"))
+    before = files_store.get_caller_memory("c1")
+
+    assert files_store.migrate_to_segments() == 1
+    caller_dir = os.path.join(str(tmp_path), "c1")
+    assert not os.path.exists(os.path.join(caller_dir, "sessions"))
+    assert files_store.get_caller_memory("c1") == before
+
+    # Appends continue numbering from the migrated segment.
+    files_store.store_session("c1", "Volunteer C", CONVERSATION, _extracted("low"))
+    assert files_store.get_session("c1", 3)["volunteer"] == "Volunteer C"
+
+
+def test_cached_store_invalidates_on_write(tmp_path):
+    store = CachedMemoryStore(LocalMemoryStore(str(tmp_path)), max_entries=2)
+    assert store.get_caller_memory("c1") is None
+    store.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low"))
+
+    first = store.get_caller_memory("c1")
+    assert len(first["sessions"]) == 1
+    first["memu_supplementary"] = "added by a caller"
+    assert "memu_supplementary" not in store.get_caller_memory("c1")
+
+    store.store_session("c1", "Volunteer B", CONVERSATION, _extracted("high"))
+    assert len(store.get_caller_memory("c1")["sessions"]) == 2
+    assert store.get_timeline("c1")["total_sessions"] == 2
+
+    store.get_timeline("c2")
+    stats = store.metrics()["memory_cache"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 5
+    assert stats["evictions"] >= 1
+    assert stats["size"] == 2
+
+    store.clear_caller("c1")
+    assert store.get_caller_memory("c1") is None
+
+
+def test_timeline_computed_at_write_matches_replay(tmp_path):
+    store = LocalMemoryStore(str(tmp_path))
+    store.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low", ["Job loss"]))
+    store.store_session("c1", "Volunteer B", CONVERSATION, _extracted("high", ["Job loss", "Eviction"]))
+    store.store_session("c1", "Volunteer C", CONVERSATION, _extracted("moderate", ["Eviction"]))
+
+    stored = store.get_timeline("c1")
+    assert [s["new_info"] for s in stored["sessions"]] == [["Job loss"], ["Eviction"], []]
+    assert [s["escalations"] for s in stored["sessions"]] == [[], ["Risk low → high"], []]
+
+    diff = store.get_session_diff("c1")
+    assert diff["session_count"] == 3
+    assert diff["risk_level"] == "moderate"
+
+    # Dropping the derived files forces a replay, which must agree.
+    caller_dir = os.path.join(str(tmp_path), "c1")
+    for name in ("timeline.log", "timeline.idx", "_timeline_state.json"):
+        os.remove(os.path.join(caller_dir, name))
+    assert store.get_timeline("c1") == stored
+    assert "_timeline_state" not in store.get_caller_memory("c1")
+
+    store.store_session("c1", "Volunteer D", CONVERSATION, _extracted("high", ["Insomnia"]))
+    latest = store.get_timeline("c1")["sessions"][-1]
+    assert latest["new_info"] == ["Insomnia"]
+    assert latest["escalations"] == ["Risk moderate → high"]
+
+
+def test_legacy_inline_transcripts(tmp_path):
+    store = LocalMemoryStore(str(tmp_path))
+    store.store_session("c1", "Volunteer A", CONVERSATION, _extracted("low"))
+    # Rewrite session 1 the way it was stored before transcripts were split.
+    caller_dir = os.path.join(str(tmp_path), "c1")
+    os.remove(os.path.join(caller_dir, "transcripts", "session_001.json"))
+    session_file = os.path.join(caller_dir, "sessions", "session_001.json")
+    with open(session_file) as f:
+        legacy = json.load(f)
+    legacy["conversation"] = CONVERSATION
+    with open(session_file, "w") as f:
+        json.dump(legacy, f)
+
+    assert "conversation" not in store.get_caller_memory("c1")["sessions"][0]
+    assert store.get_transcript("c1", 1) == CONVERSATION
+
+    segments = LocalMemoryStore(str(tmp_path), session_storage="segments")
+    segments.store_session("c1", "Volunteer B", CONVERSATION[:1], _extracted("low"))
+    assert segments.get_session("c1", 1)["conversation"] == CONVERSATION
+    assert segments.get_transcript("c1", 2) == CONVERSATION[:1]
+
+    assert store.split_transcripts() == 0
+
+
+def _hybrid(monkeypatch, tmp_path, handler, max_attempts=None):
+    import httpx
+
+    from memory_store import HybridMemoryStore
+    from memu_queue import MemorizeQueue
+
+    monkeypatch.setenv("MEMU_API_KEY", "test-key")
+    monkeypatch.setenv("MEMU_BASE_URL", "http://memu.test")
+    queue = MemorizeQueue(str(tmp_path / "memu_queue.db"), max_attempts=max_attempts)
+    hybrid = HybridMemoryStore(local=LocalMemoryStore(str(tmp_path)), queue=queue)
+
+    async def open_client():
+        await hybrid._open_http()
+        hybrid._http._transport = httpx.MockTransport(handler)
+        return hybrid._http
+
+    return hybrid, open_client
+
+
+def test_hybrid_reuses_one_pooled_memu_client(monkeypatch, tmp_path):
+    import asyncio
+
+    import httpx
+
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, request.headers["authorization"]))
+        if request.url.path.endswith("/retrieve"):
+            return httpx.Response(200, json={"items": [{"content": "Likes tea"}]})
+        return httpx.Response(200, json={"task_id": "t1", "status": "queued"})
+
+    hybrid, open_client = _hybrid(monkeypatch, tmp_path, handler)
+
+    async def scenario():
+        client = await open_client()
+        await hybrid.aopen()  # starts the memorize worker
+        await hybrid.astore_session("c1", "Ann", [{"role": "caller", "content": "hi"}], {})
+        for _ in range(200):
+            if hybrid.metrics()["memu_queue"]["completed"]:
+                break
+            await asyncio.sleep(0.01)
+        memory = await hybrid.aget_caller_memory("c1")
+        assert hybrid._http is client
+        await hybrid.aclose()
+        return memory
+
+    memory = asyncio.run(scenario())
+    assert "Likes tea" in memory["memu_supplementary"]
+    assert [path for path, _ in seen] == ["/api/v3/memory/memorize", "/api/v3/memory/retrieve"]
+    assert all(auth == "Bearer test-key" for _, auth in seen)
+    assert hybrid._http is None
+
+
+def test_memu_queue_retries_parks_and_survives_restart(monkeypatch, tmp_path):
+    import asyncio
+
+    import httpx
+
+    import memu_queue
+    from memu_queue import MemorizeQueue
+
+    monkeypatch.setattr(memu_queue, "MEMU_QUEUE_BACKOFF", 0)
+    status = {"code": 503}
+
+    def handler(request):
+        return httpx.Response(status["code"], json={"task_id": "t1"})
+
+    hybrid, open_client = _hybrid(monkeypatch, tmp_path, handler, max_attempts=2)
+    conversation = [{"role": "caller", "content": "hi"}]
+
+    async def drain():
+        await open_client()
+        processed = await hybrid.process_memu_queue()
+        await hybrid.aclose()
+        return processed
+
+    # store_session returns after the local write; memU is only queued.
+    hybrid.store_session("c1", "Ann", conversation, {"risk_level": "low"})
+    assert len(hybrid._local.get_caller_memory("c1")["sessions"]) == 1
+    assert hybrid.metrics()["memu_queue"]["depth"] == 1
+
+    assert asyncio.run(drain()) == 1
+    stats = hybrid.metrics()["memu_queue"]
+    assert (stats["depth"], stats["retried"], stats["dead"]) == (1, 1, 0)
+
+    asyncio.run(drain())
+    stats = hybrid.metrics()["memu_queue"]
+    assert (stats["depth"], stats["dead"]) == (0, 1)
+
+    # A fresh queue on the same file sees the parked job.
+    reopened = MemorizeQueue(str(tmp_path / "memu_queue.db"))
+    assert reopened.requeue_dead() == 1
+    job = reopened.due()[0]
+    assert (job["caller_id"], job["conversation"]) == ("c1", conversation)
+    reopened.release([job])
+
+    status["code"] = 200
+    assert asyncio.run(drain()) == 1
+    stats = hybrid.metrics()["memu_queue"]
+    assert (stats["depth"], stats["dead"], stats["completed"]) == (0, 0, 1)
+
+
+def test_memu_queue_hands_each_job_to_one_reader_per_lease(monkeypatch, tmp_path):
+    import memu_queue
+    from memu_queue import MemorizeQueue
+
+    # Two connections on one file stand in for the app worker and a flush.
+    path = str(tmp_path / "memu_queue.db")
+    worker, flush = MemorizeQueue(path), MemorizeQueue(path)
+    for caller_id in ("c1", "c2", "c3"):
+        worker.enqueue(caller_id, "Ann", [{"role": "caller", "content": "hi"}])
+
+    first = worker.due(limit=2)
+    second = flush.due()
+    assert [job["caller_id"] for job in first] == ["c1", "c2"]
+    assert [job["caller_id"] for job in second] == ["c3"]
+    assert worker.due() == [] and flush.due() == []
+    assert worker.stats()["depth"] == 3  # claimed, not removed
+
+    # Released jobs are due again at once; an expired lease frees a job
+    # whose worker never reported back.
+    flush.release(second)
+    worker.complete(first[0])
+    monkeypatch.setattr(memu_queue, "MEMU_QUEUE_LEASE", 0.05)
+    assert [job["caller_id"] for job in worker.due()] == ["c3"]
+    assert flush.due() == []
+    time.sleep(0.1)
+    assert [job["caller_id"] for job in flush.due()] == ["c3"]
+    assert worker.stats()["depth"] == 2  # c2 still held under its first lease
+    worker.close()
+    flush.close()
+
+
+def test_memu_retrieval_cache_ttl_stale_and_invalidation(monkeypatch, tmp_path):
+    import asyncio
+    import time
+
+    import httpx
+
+    from memory_store import RetrievalCache
+
+    fetches = []
+
+    def handler(request):
+        fetches.append(request.url.path)
+        return httpx.Response(200, json={"items": [{"content": f"fact {len(fetches)}"}]})
+
+    hybrid, open_client = _hybrid(monkeypatch, tmp_path, handler)
+    hybrid._memu_cache = RetrievalCache(ttl=0.05, stale=60)
+    hybrid._local.store_session("c1", "Ann", [{"role": "caller", "content": "hi"}], {})
+
+    async def scenario():
+        await open_client()
+        assert await hybrid.aprefetch("c1") is True
+        assert await hybrid.aprefetch("unknown") is False
+        first = (await hybrid.aget_caller_memory("c1"))["memu_supplementary"]
+        assert len(fetches) == 1 and "fact 1" in first  # prefetched, then fresh hit
+
+        await asyncio.sleep(0.06)
+        stale = (await hybrid.aget_caller_memory("c1"))["memu_supplementary"]
+        assert "fact 1" in stale  # served stale ...
+        await asyncio.gather(*hybrid._refresh_tasks)
+        assert "fact 2" in (await hybrid.aget_caller_memory("c1"))["memu_supplementary"]
+
+        await hybrid.astore_session("c1", "Ann", [{"role": "caller", "content": "again"}], {})
+        assert "fact 3" in (await hybrid.aget_caller_memory("c1"))["memu_supplementary"]
+        await hybrid.aclose()
+
+    asyncio.run(scenario())
+    stats = hybrid.metrics()["memu_cache"]
+    assert (stats["hits"], stats["stale_hits"], stats["refreshes"]) == (2, 1, 1)
+    assert fetches == ["/api/v3/memory/retrieve"] * 3
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    import time
+
+    from memory_store import CircuitBreaker
+
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats()["trips"] == 2
+
+
+def test_hybrid_falls_back_to_local_within_budget(monkeypatch, tmp_path):
+    import asyncio
+    import time
+
+    import httpx
+
+    import memory_store
+    from memory_store import CircuitBreaker
+
+    monkeypatch.setattr(memory_store, "MEMU_RETRIEVE_BUDGET", 0.05)
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"items": [{"content": "late fact"}]})
+
+    hybrid, open_client = _hybrid(monkeypatch, tmp_path, handler)
+    hybrid._retrieve_breaker = CircuitBreaker("retrieve", failure_threshold=1, reset_timeout=60)
+    hybrid._local.store_session("c1", "Ann", [{"role": "caller", "content": "hi"}], {})
+
+    async def scenario():
+        await open_client()
+        start = time.perf_counter()
+        memory = await hybrid.aget_caller_memory("c1")
+        elapsed = time.perf_counter() - start
+        await asyncio.gather(*hybrid._refresh_tasks)
+        hybrid._memu_cache.invalidate("c1")
+        again = await hybrid.aget_caller_memory("c1")  # breaker open: no call
+        await hybrid.aclose()
+        return memory, elapsed, again
+
+    memory, elapsed, again = asyncio.run(scenario())
+    assert "memu_supplementary" not in memory and memory["sessions"]
+    assert elapsed < 0.15
+    assert "memu_supplementary" not in again
+    assert calls == ["/api/v3/memory/retrieve"]
+    breaker = hybrid.metrics()["memu_breaker"]
+    assert breaker["retrieve"]["state"] == "open"
+    assert breaker["retrieve"]["rejected"] == 1
+    assert breaker["budget_overruns"] == 1
+
+
+class _FakeMemUService:
+    """Async stand-in for memu's MemUService that insists on a running loop."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.memorized = []
+
+    async def retrieve(self, queries, where, method):
+        import asyncio
+
+        asyncio.get_running_loop()
+        if self.fail:
+            raise RuntimeError("memU down")
+        return {"items": [{"content": f"fact about {where['user_id']}"}]}
+
+    async def memorize(self, conversation, modality, user):
+        import asyncio
+
+        asyncio.get_running_loop()
+        if self.fail:
+            raise RuntimeError("memU down")
+        self.memorized.append((user["user_id"], conversation))
+
+
+def test_memu_store_awaits_service_on_live_loop(tmp_path):
+    import asyncio
+
+    from memory_store import AsyncMemoryStore, MemUMemoryStore
+
+    service = _FakeMemUService()
+    store = AsyncMemoryStore(MemUMemoryStore(LocalMemoryStore(str(tmp_path)), service=service))
+    conversation = [{"role": "caller", "content": "hi"}, {"role": "volunteer", "content": "hello"}]
+
+    async def scenario():
+        await store.store_session("c1", "Ann", conversation, {"risk_level": "low"})
+        memory = await store.get_caller_memory("c1")
+        await store.aclose()
+        return memory
+
+    memory = asyncio.run(scenario())
+    assert memory["memu_context"] == {"items": [{"content": "fact about c1"}]}
+    assert [s["session_number"] for s in memory["sessions"]] == [1]
+    (caller, sent), = service.memorized
+    assert caller == "c1"
+    assert [m["role"] for m in sent] == ["user", "assistant"]
+    assert sent[0]["content"] == {"text": "hi"}
+
+
+def test_memu_store_falls_back_to_local_when_service_fails(tmp_path):
+    import asyncio
+
+    from memory_store import MemUMemoryStore
+
+    store = MemUMemoryStore(LocalMemoryStore(str(tmp_path)), service=_FakeMemUService(fail=True))
+
+    async def scenario():
+        await store.astore_session("c1", "Ann", [{"role": "caller", "content": "hi"}], {"triggers": ["x"]})
+        return await store.aget_caller_memory("c1")
+
+    memory = asyncio.run(scenario())
+    assert memory["triggers"] == ["x"] and "memu_context" not in memory
+    # The blocking wrappers work from scripts (no running loop).
+    assert store.get_caller_memory("c1")["triggers"] == ["x"]
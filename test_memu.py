@@ -92,6 +92,8 @@ def test_store_session(store):
             extracted_memories=extracted,
         )
         print("OK: store_session() completed without error")
+        sent = store.flush_memu_queue()
+        print(f"OK: flushed {sent} queued memU job(s)")
     except Exception as e:
         print(f"FAIL: store_session() raised {type(e).__name__}: {e}")
         return False